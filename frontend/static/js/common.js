@@ -58,6 +58,7 @@ class CommonUtils {
         const fieldMap = {
             'name': 'statusNameError',
             'transaction_type_name': 'transactionTypeNameError',
+            'direction': 'transactionTypeDirectionError',
             'category_name': 'categoryNameError',
             'subcategory_name': 'subcategoryNameError',
             'category': 'subcategoryCategoryError',
@@ -5,7 +5,7 @@ $(document).ready(function() {
 
   $("#recordCategory").change(function() {
     const selectedCategoryId = $(this).val();
-    CommonUtils.loadSubcategoriesForCategory(selectedCategoryId);
+    loadSubcategoriesForCategory(selectedCategoryId);
   });
 
   // Filter change handlers
@@ -141,65 +141,58 @@ function loadRecords(filters = {}) {
   });
 }
 
+// Active subcategories by category id from /api/references/bootstrap/
+let subcategoriesByCategory = {};
+
 function loadReferenceData() {
-  // Load statuses for both form and filter
-  $.ajax({
-    url: "/api/statuses/?is_active=true",
+  // One request for all references; the browser revalidates it by ETag
+  return $.ajax({
+    url: "/api/references/bootstrap/",
     type: "GET",
     dataType: "json",
     success: function (data) {
+      subcategoriesByCategory = {};
+      data.categories.forEach(category => {
+        subcategoriesByCategory[category.id] = category.subcategories;
+      });
+
       const statusOptions = '<option value="">Выберите статус</option>' +
-        data.results.map(status => `<option value="${status.id}">${status.name}</option>`).join("");
+        data.statuses.map(status => `<option value="${status.id}">${status.name}</option>`).join("");
       $("#recordStatus").html(statusOptions);
 
       const filterStatusOptions = '<option value="">Все статусы</option>' +
-        data.results.map(status => `<option value="${status.id}">${status.name}</option>`).join("");
+        data.statuses.map(status => `<option value="${status.id}">${status.name}</option>`).join("");
       $("#statusFilter").html(filterStatusOptions);
-    },
-    error: function (xhr, status, error) {
-      console.log("Error loading statuses:", error);
-    },
-  });
 
-  // Load transaction types for both form and filter
-  $.ajax({
-    url: "/api/transaction-types/?is_active=true",
-    type: "GET",
-    dataType: "json",
-    success: function (data) {
       const typeOptions = '<option value="">Выберите тип операции</option>' +
-        data.results.map(type => `<option value="${type.id}">${type.name}</option>`).join("");
+        data.transaction_types.map(type => `<option value="${type.id}">${type.name}</option>`).join("");
       $("#recordTransactionType").html(typeOptions);
 
       const filterTypeOptions = '<option value="">Все типы</option>' +
-        data.results.map(type => `<option value="${type.id}">${type.name}</option>`).join("");
+        data.transaction_types.map(type => `<option value="${type.id}">${type.name}</option>`).join("");
       $("#transactionTypeFilter").html(filterTypeOptions);
-    },
-    error: function (xhr, status, error) {
-      console.log("Error loading transaction types:", error);
-    },
-  });
 
-  // Load categories for both form and filter
-  $.ajax({
-    url: "/api/categories/?is_active=true",
-    type: "GET",
-    dataType: "json",
-    success: function (data) {
       const categoryOptions = '<option value="">Выберите категорию</option>' +
-        data.results.map(category => `<option value="${category.id}">${category.name}</option>`).join("");
+        data.categories.map(category => `<option value="${category.id}">${category.name}</option>`).join("");
       $("#recordCategory").html(categoryOptions);
 
       const filterCategoryOptions = '<option value="">Все категории</option>' +
-        data.results.map(category => `<option value="${category.id}">${category.name}</option>`).join("");
+        data.categories.map(category => `<option value="${category.id}">${category.name}</option>`).join("");
       $("#categoryFilter").html(filterCategoryOptions);
     },
     error: function (xhr, status, error) {
-      console.log("Error loading categories:", error);
+      console.log("Error loading reference data:", error);
     },
   });
 }
 
+function subcategoryOptions(categoryId, emptyLabel) {
+  const subcategories = subcategoriesByCategory[categoryId] || [];
+  return `<option value="">${emptyLabel}</option>` + subcategories.map(
+    subcategory => `<option value="${subcategory.id}">${subcategory.name}</option>`
+  ).join("");
+}
+
 function showToast(message, type = 'info') {
   // Create toast if it doesn't exist
   if (!$('#toast').length) {
@@ -233,22 +226,19 @@ function editRecord(id) {
       $("#cashFlowRecordForm").attr("action", `/api/cash-flow-records/${id}/`);
       $("#cashFlowRecordForm").attr("method", "PUT");
 
-      // Load reference data for editing
-      loadReferenceData();
-
       // Set form values
       $("#recordAmount").val(data.amount);
       $("#recordComment").val(data.comment || '');
 
-      // Set dropdown values after a short delay to ensure options are loaded
-      setTimeout(() => {
+      // Reload reference data for editing (usually answered with 304) and set dropdowns
+      loadReferenceData().then(() => {
         $("#recordStatus").val(data.status.id);
         $("#recordTransactionType").val(data.transaction_type.id);
         $("#recordCategory").val(data.category.id);
 
         // Load subcategories for the selected category
         loadSubcategoriesForCategory(data.category.id, data.subcategory.id);
-      }, 100);
+      });
     },
     error: function (xhr, status, error) {
       console.log("Error loading record:", error);
@@ -258,32 +248,11 @@ function editRecord(id) {
 }
 
 function loadSubcategoriesForCategory(categoryId, selectedSubcategoryId = null) {
-  if (!categoryId) {
-    $("#recordSubcategory").html('<option value="">Выберите подкатегорию</option>');
-    return;
-  }
+  $("#recordSubcategory").html(subcategoryOptions(categoryId, "Выберите подкатегорию"));
 
-  $.ajax({
-    url: `/api/subcategories/?category=${categoryId}&is_active=true`,
-    type: "GET",
-    dataType: "json",
-    success: function (data) {
-      let options = '<option value="">Выберите подкатегорию</option>';
-      if (data.results && data.results.length > 0) {
-        options += data.results.map(
-          subcategory => `<option value="${subcategory.id}">${subcategory.name}</option>`
-        ).join("");
-      }
-      $("#recordSubcategory").html(options);
-
-      if (selectedSubcategoryId) {
-        $("#recordSubcategory").val(selectedSubcategoryId);
-      }
-    },
-    error: function (xhr, status, error) {
-      console.log("Error loading subcategories:", error);
-    },
-  });
+  if (selectedSubcategoryId) {
+    $("#recordSubcategory").val(selectedSubcategoryId);
+  }
 }
 
 
@@ -342,26 +311,5 @@ function clearFilters() {
 }
 
 function loadSubcategoriesForFilter(categoryId) {
-  if (!categoryId) {
-    $("#subcategoryFilter").html('<option value="">Все подкатегории</option>');
-    return;
-  }
-
-  $.ajax({
-    url: `/api/subcategories/?category=${categoryId}&is_active=true`,
-    type: "GET",
-    dataType: "json",
-    success: function (data) {
-      let options = '<option value="">Все подкатегории</option>';
-      if (data.results && data.results.length > 0) {
-        options += data.results.map(
-          subcategory => `<option value="${subcategory.id}">${subcategory.name}</option>`
-        ).join("");
-      }
-      $("#subcategoryFilter").html(options);
-    },
-    error: function (xhr, status, error) {
-      console.log("Error loading subcategories for filter:", error);
-    },
-  });
+  $("#subcategoryFilter").html(subcategoryOptions(categoryId, "Все подкатегории"));
 }
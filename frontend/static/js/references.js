@@ -203,6 +203,7 @@ function editTransactionType(id) {
         success: function (data) {
             $("#transactionTypeModalTitle").text("Редактирование типа операции");
             $("#transactionTypeName").val(data.name);
+            $("#transactionTypeDirection").val(data.direction);
         },
         error: function (xhr, status, error) {
             console.log("Error loading transaction type:", error);
@@ -213,7 +214,10 @@ function editTransactionType(id) {
 
 function saveTransactionType() {
     try {
-        const formData = { name: $("#transactionTypeName").val().trim() };
+        const formData = {
+            name: $("#transactionTypeName").val().trim(),
+            direction: $("#transactionTypeDirection").val(),
+        };
         clearFormErrors('transactionTypeForm');
 
         if (!formData.name) {
@@ -221,6 +225,11 @@ function saveTransactionType() {
             return;
         }
 
+        if (!formData.direction) {
+            showFieldError('transactionTypeDirectionError', 'Направление обязательно для заполнения');
+            return;
+        }
+
         if (CommonUtils.currentEditingId) {
             $.ajax({
                 url: `/api/transaction-types/${CommonUtils.currentEditingId}/`,
@@ -581,6 +590,7 @@ function getFieldErrorId(field) {
     const fieldMap = {
         'name': 'statusNameError',
         'transaction_type_name': 'transactionTypeNameError',
+        'direction': 'transactionTypeDirectionError',
         'category_name': 'categoryNameError',
         'subcategory_name': 'subcategoryNameError',
         'category': 'subcategoryCategoryError'
@@ -0,0 +1,36 @@
+"""Разовые замеры вне приложения: python src/benchmarks <замер> [параметры]
+
+Замер - модуль этого каталога с командой Django (Command); параметры - как у
+команды manage.py, справка - python src/benchmarks <замер> --help.
+"""
+
+import importlib
+import os
+import pkgutil
+import sys
+from pathlib import Path
+
+import django
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+
+
+def main() -> None:
+    names = sorted(
+        module.name
+        for module in pkgutil.iter_modules([str(BENCHMARKS_DIR)])
+        if not module.name.startswith('_')
+    )
+    if len(sys.argv) < 2 or sys.argv[1] not in names:  # noqa: PLR2004
+        sys.exit(f'Использование: python {sys.argv[0]} {{{",".join(names)}}} [параметры]')
+    # Каталог src вместо каталога замеров: модули замеров импортируются как benchmarks.*
+    sys.path[0] = str(BENCHMARKS_DIR.parent)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+    name = sys.argv[1]
+    command = importlib.import_module(f'benchmarks.{name}').Command()
+    command.run_from_argv([sys.argv[0], name, *sys.argv[2:]])
+
+
+if __name__ == '__main__':
+    main()
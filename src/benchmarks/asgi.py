@@ -0,0 +1,233 @@
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.core.wsgi import WSGIHandler
+from django.db import connections
+
+from transfers.models import CashFlowRecord
+
+SERVERS = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает чтение записей ДДС под WSGI (пул потоков) и под ASGI (асинхронные '
+        'представления) при медленных клиентах: запросы в процессе, без сети'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--clients', type=int, default=50, help='Одновременных клиентов')
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Потоков WSGI-сервера (как gunicorn --threads)',
+        )
+        parser.add_argument(
+            '--client-kbps',
+            type=float,
+            default=64,
+            help='Скорость чтения ответа клиентом, КБ/с',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--url',
+            action='append',
+            dest='paths',
+            help='Адрес запроса, можно несколько; по умолчанию карточки и справочники',
+        )
+        parser.add_argument('--server', choices=SERVERS, help='Замер одного сервера (JSON)')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options['server']:
+            urls = self.urls(options['requests'], options['seed'], options['paths'])
+            run = self.run_wsgi if options['server'] == 'wsgi' else self.run_asgi
+            self.stdout.write(json.dumps(run(urls, options)))
+            return
+
+        # Набор URL выбирается при импорте transfers.urls, поэтому каждый сервер
+        # замеряется в отдельном процессе со своим ASYNC_READS
+        results = {}
+        for server in SERVERS:
+            command = [
+                sys.executable,
+                str(settings.BASE_DIR / 'benchmarks'),
+                'asgi',
+                f'--server={server}',
+                *(
+                    f'--{name.replace("_", "-")}={options[name]}'
+                    for name in ('requests', 'clients', 'threads', 'client_kbps', 'seed')
+                ),
+                *(f'--url={path}' for path in options['paths'] or ()),
+            ]
+            env = {**os.environ, 'ASYNC_READS': str(server == 'asgi')}
+            completed = subprocess.run(  # noqa: S603
+                command,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+            if completed.returncode:
+                msg = f'Замер {server} завершился с ошибкой:\n{completed.stderr}'
+                raise CommandError(msg)
+            results[server] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(
+            f'{options["requests"]} запросов, {options["clients"]} клиентов по '
+            f'{options["client_kbps"]:g} КБ/с, WSGI: {options["threads"]} потоков',
+        )
+        for server, result in results.items():
+            self.stdout.write(
+                f'{server.upper()}: {result["rps"]:.1f} запр/с, p50 {result["p50"]:.0f} мс, '
+                f'p95 {result["p95"]:.0f} мс, ошибок {result["errors"]}',
+            )
+        speedup = results['asgi']['rps'] / results['wsgi']['rps']
+        self.stdout.write(
+            self.style.SUCCESS(f'ASGI/WSGI по пропускной способности: x{speedup:.1f}'),
+        )
+
+    @staticmethod
+    def urls(count: int, seed: int, paths: list[str] | None) -> list[str]:
+        """Адреса запросов, постоянные для seed.
+
+        По умолчанию - карточки записей и справочники: их время определяется клиентом,
+        а не базой, в отличие от списка записей без фильтров, где COUNT по всей таблице
+        одинаково занимает сервер при любом способе обслуживания.
+        """
+        rng = random.Random(seed)
+        if paths:
+            return [rng.choice(paths) for _ in range(count)]
+        ids = list(
+            CashFlowRecord.objects.filter(is_active=True)
+            .order_by('?')
+            .values_list('id', flat=True)[:200],
+        )
+        if not ids:
+            msg = 'Нет записей ДДС для замера'
+            raise CommandError(msg)
+        return [
+            rng.choice(
+                (
+                    f'/api/cash-flow-records/{rng.choice(ids)}/',
+                    f'/api/cash-flow-records/{rng.choice(ids)}/',
+                    '/api/categories/',
+                    '/api/subcategories/',
+                    '/api/references/bootstrap/',
+                ),
+            )
+            for _ in range(count)
+        ]
+
+    @staticmethod
+    def summary(timings: list[float], errors: int, elapsed: float) -> dict[str, float]:
+        quantiles = statistics.quantiles(timings, n=100)
+        return {
+            'rps': len(timings) / elapsed,
+            'p50': statistics.median(timings),
+            'p95': quantiles[94],
+            'errors': errors,
+        }
+
+    def run_wsgi(self, urls: list[str], options: dict[str, Any]) -> dict[str, float]:
+        handler = WSGIHandler()
+        # Потоки сервера: клиент ждет свободный поток и держит его, пока читает ответ
+        workers = threading.BoundedSemaphore(options['threads'])
+        bytes_per_second = options['client_kbps'] * 1024
+        timings: list[float] = []
+        errors = 0
+
+        def request(url: str) -> None:
+            nonlocal errors
+            path, _, query = url.partition('?')
+            environ = {'PATH_INFO': path, 'QUERY_STRING': query}
+            setup_testing_defaults(environ)
+            statuses = []
+            started = time.perf_counter()
+            with workers:
+                body = handler(environ, lambda status, _: statuses.append(status))
+                try:
+                    for chunk in body:
+                        time.sleep(len(chunk) / bytes_per_second)
+                finally:
+                    body.close()
+            timings.append((time.perf_counter() - started) * 1000)
+            errors += not statuses[0].startswith('200')
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['clients']) as clients:
+            list(clients.map(request, urls))
+        elapsed = time.perf_counter() - started
+        connections.close_all()
+        return self.summary(timings, errors, elapsed)
+
+    def run_asgi(self, urls: list[str], options: dict[str, Any]) -> dict[str, float]:
+        handler = ASGIHandler()
+        bytes_per_second = options['client_kbps'] * 1024
+        timings: list[float] = []
+        errors = 0
+
+        async def request(url: str, clients: asyncio.Semaphore) -> None:
+            nonlocal errors
+            path, _, query = url.partition('?')
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': query.encode(),
+                'root_path': '',
+                'headers': [(b'host', b'127.0.0.1')],
+                'client': ('127.0.0.1', 0),
+                'server': ('127.0.0.1', 80),
+            }
+            done = asyncio.Event()
+            received = False
+            statuses = []
+
+            async def receive() -> dict[str, Any]:
+                nonlocal received
+                if not received:
+                    received = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message: dict[str, Any]) -> None:
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+                elif message['type'] == 'http.response.body':
+                    await asyncio.sleep(len(message.get('body', b'')) / bytes_per_second)
+
+            async with clients:
+                started = time.perf_counter()
+                await handler(scope, receive, send)
+                done.set()
+                timings.append((time.perf_counter() - started) * 1000)
+            errors += statuses[0] != 200  # noqa: PLR2004
+
+        async def main() -> float:
+            clients = asyncio.Semaphore(options['clients'])
+            started = time.perf_counter()
+            await asyncio.gather(*(request(url, clients) for url in urls))
+            return time.perf_counter() - started
+
+        elapsed = asyncio.run(main())
+        return self.summary(timings, errors, elapsed)
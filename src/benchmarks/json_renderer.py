@@ -0,0 +1,81 @@
+import io
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from transfers.models import CashFlowRecord
+from transfers.parsers import FastJSONParser
+from transfers.renderers import FastJSONRenderer, orjson
+from transfers.serializers import CashFlowRecordReadSerializer
+
+PAGE_SIZES = (20, 200, 1000)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает FastJSONRenderer и FastJSONParser со стандартными JSONRenderer и '
+        'JSONParser на страницах списка записей ДДС и проверяет совпадение вывода'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--page-size', type=int, action='append', dest='page_sizes')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING('orjson не установлен, FastJSONRenderer использует json'),
+            )
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        queryset = CashFlowRecord.objects.filter(is_active=True).order_by('-created_at')
+
+        for size in options['page_sizes'] or PAGE_SIZES:
+            rows = queryset.values(*CashFlowRecordReadSerializer.values_fields())[:size]
+            # Та же структура, что у ответа /api/cash-flow-records/
+            payload = {
+                'count': queryset.count(),
+                'next': 'http://localhost/api/cash-flow-records/?page=2',
+                'previous': None,
+                'results': CashFlowRecordReadSerializer(rows, many=True).data,
+            }
+            body = stock.render(payload)
+            if fast.render(payload) != body:
+                msg = f'Вывод FastJSONRenderer отличается при page_size={size}'
+                raise CommandError(msg)
+            if FastJSONParser().parse(io.BytesIO(body)) != JSONParser().parse(io.BytesIO(body)):
+                msg = f'Результат FastJSONParser отличается при page_size={size}'
+                raise CommandError(msg)
+
+            render = self.compare(
+                lambda renderer, payload=payload: renderer.render(payload),
+                stock,
+                fast,
+                options['repeat'],
+            )
+            parse = self.compare(
+                lambda parser, body=body: parser.parse(io.BytesIO(body)),
+                JSONParser(),
+                FastJSONParser(),
+                options['repeat'],
+            )
+            self.stdout.write(
+                f'page_size={size} ({len(body) / 1024:.0f} КБ): render {render}; parse {parse}',
+            )
+
+    @staticmethod
+    def compare(run: Callable[[Any], Any], stock: Any, fast: Any, repeat: int) -> str:
+        """Медианы времени стандартной и быстрой реализации в миллисекундах"""
+        timings: dict[str, list[float]] = {'stock': [], 'fast': []}
+        for _ in range(repeat):
+            for name, implementation in (('stock', stock), ('fast', fast)):
+                started = time.perf_counter()
+                run(implementation)
+                timings[name].append((time.perf_counter() - started) * 1000)
+        stock_ms = statistics.median(timings['stock'])
+        fast_ms = statistics.median(timings['fast'])
+        return f'{stock_ms:.2f} -> {fast_ms:.2f} мс (x{stock_ms / fast_ms:.1f})'
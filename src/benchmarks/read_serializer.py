@@ -0,0 +1,59 @@
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from rest_framework.renderers import JSONRenderer
+
+from transfers.models import CashFlowRecord
+from transfers.serializers import CashFlowRecordReadSerializer, CashFlowRecordSerializer
+
+PAGE_SIZES = (20, 200, 1000)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время страницы списка записей ДДС (запрос, сериализация, JSON) '
+        'для CashFlowRecordSerializer и CashFlowRecordReadSerializer'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, action='append', dest='page_sizes')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        renderer = JSONRenderer()
+        queryset = CashFlowRecord.objects.filter(is_active=True).order_by('-created_at')
+
+        def model_page(size: int) -> bytes:
+            records = queryset.select_related(
+                'status',
+                'transaction_type',
+                'category',
+                'subcategory__category',
+            )[:size]
+            return renderer.render(CashFlowRecordSerializer(records, many=True).data)
+
+        def values_page(size: int) -> bytes:
+            rows = queryset.values(*CashFlowRecordReadSerializer.values_fields())[:size]
+            return renderer.render(CashFlowRecordReadSerializer(rows, many=True).data)
+
+        for size in options['page_sizes'] or PAGE_SIZES:
+            baseline = self.measure(model_page, size, options['repeat'])
+            fast = self.measure(values_page, size, options['repeat'])
+            self.stdout.write(
+                f'page_size={size}: ModelSerializer {baseline:.2f} мс, '
+                f'values() {fast:.2f} мс, ускорение x{baseline / fast:.1f}',
+            )
+
+    @staticmethod
+    def measure(page: Callable[[int], bytes], size: int, repeat: int) -> float:
+        """Медиана времени построения страницы в миллисекундах"""
+        page(size)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            page(size)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,184 @@
+import io
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.core.wsgi import WSGIHandler
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from transfers.models import CashFlowRecord, Subcategory
+from transfers.routers import replica_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пропускную способность чтения записей ДДС при 0..N репликах под '
+        'постоянной записью в основную базу; работает на копиях базы'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--replicas', type=int, default=2, help='Наибольшее число реплик')
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=10, help='Длительность замера')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--child', action='store_true', help='Один замер (JSON)')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options['child']:
+            if replica_aliases():
+                call_command('sync_replicas', stdout=io.StringIO())
+            self.stdout.write(json.dumps(self.run(options)))
+            return
+
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            primary = Path(directory) / 'primary.sqlite3'
+            connection.ensure_connection()
+            copy = sqlite3.connect(primary)
+            try:
+                connection.connection.backup(copy)
+            finally:
+                copy.close()
+            for count in range(options['replicas'] + 1):
+                replicas = [str(Path(directory) / f'replica{n}.sqlite3') for n in range(count)]
+                command = [
+                    sys.executable,
+                    str(settings.BASE_DIR / 'benchmarks'),
+                    'replicas',
+                    '--child',
+                    *(
+                        f'--{name}={options[name]}'
+                        for name in ('readers', 'writers', 'seconds', 'seed')
+                    ),
+                ]
+                env = {
+                    **os.environ,
+                    'DATABASE_NAME': str(primary),
+                    'DATABASE_REPLICAS': ','.join(replicas),
+                    'DEBUG': 'False',
+                }
+                completed = subprocess.run(  # noqa: S603
+                    command,
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=False,
+                )
+                if completed.returncode:
+                    msg = f'Замер с {count} репликами завершился с ошибкой:\n{completed.stderr}'
+                    raise CommandError(msg)
+                results[count] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(
+            f'{options["readers"]} читателей, {options["writers"]} писателей, '
+            f'{options["seconds"]:g} с, профиль {settings.DATABASE_PROFILE}, '
+            f'ядер {os.cpu_count()}',
+        )
+        for count, result in results.items():
+            self.stdout.write(
+                f'реплик {count}: чтение {result["read_rps"]:.1f} запр/с '
+                f'(p50 {result["read_p50"]:.0f} мс, p95 {result["read_p95"]:.0f} мс), '
+                f'запись {result["write_rps"]:.1f} запр/с, ошибок {result["errors"]}',
+            )
+        speedup = results[options['replicas']]['read_rps'] / results[0]['read_rps']
+        self.stdout.write(
+            self.style.SUCCESS(f'Чтение с {options["replicas"]} репликами: x{speedup:.1f}'),
+        )
+
+    def run(self, options: dict[str, Any]) -> dict[str, Any]:
+        records = CashFlowRecord.objects.using(DEFAULT_DB_ALIAS).filter(is_active=True)
+        self.ids = list(records.order_by('?').values_list('id', flat=True)[:1000])
+        self.subcategories = list(
+            Subcategory.objects.using(DEFAULT_DB_ALIAS).values_list('id', flat=True),
+        )
+        if not self.ids:
+            msg = 'Нет записей ДДС для замера'
+            raise CommandError(msg)
+        connections.close_all()
+        self.handler = WSGIHandler()
+        deadline = time.perf_counter() + options['seconds']
+
+        def client(number: int, results: multiprocessing.Queue) -> None:
+            rng = random.Random(options['seed'] * 1000 + number)
+            kind = 'write' if number < options['writers'] else 'read'
+            make = self.write_request if kind == 'write' else self.read_request
+            timings, errors = [], 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                ok = self.request(make(rng))
+                timings.append((time.perf_counter() - started) * 1000)
+                errors += not ok
+            results.put((kind, timings, errors))
+
+        # Клиенты - отдельные процессы, как воркеры сервера приложений: иначе потоки
+        # упираются в GIL раньше, чем в базу
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        clients = [
+            context.Process(target=client, args=(number, results))
+            for number in range(options['writers'] + options['readers'])
+        ]
+        started = time.perf_counter()
+        for process in clients:
+            process.start()
+        timings: dict[str, list[float]] = defaultdict(list)
+        errors = 0
+        for _ in clients:
+            kind, values, failed = results.get()
+            timings[kind].extend(values)
+            errors += failed
+        for process in clients:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        reads = timings['read']
+        return {
+            'read_rps': len(reads) / elapsed,
+            'read_p50': statistics.median(reads),
+            'read_p95': statistics.quantiles(reads, n=100)[94],
+            'write_rps': len(timings['write']) / elapsed,
+            'errors': errors,
+        }
+
+    def request(self, environ: dict[str, Any]) -> bool:
+        setup_testing_defaults(environ)
+        statuses = []
+        response = self.handler(environ, lambda status, _: statuses.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return statuses[0].startswith('200')
+
+    def read_request(self, rng: random.Random) -> dict[str, Any]:
+        """Отчетные запросы: списки по подкатегории и карточки записей"""
+        if rng.random() < 0.5:  # noqa: PLR2004
+            query = f'subcategory={rng.choice(self.subcategories)}&cursor='
+            return {'PATH_INFO': '/api/cash-flow-records/', 'QUERY_STRING': query}
+        return {'PATH_INFO': f'/api/cash-flow-records/{rng.choice(self.ids)}/'}
+
+    def write_request(self, rng: random.Random) -> dict[str, Any]:
+        body = json.dumps({'amount': f'{rng.randint(100, 99999) / 100:.2f}'}).encode()
+        return {
+            'PATH_INFO': f'/api/cash-flow-records/{rng.choice(self.ids)}/',
+            'REQUEST_METHOD': 'PATCH',
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+        }
@@ -0,0 +1,181 @@
+import io
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.core.wsgi import WSGIHandler
+from django.db import connection, connections
+
+from transfers.models import CashFlowRecord
+
+KINDS = ('read', 'write')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает профили базы default и production (DATABASE_PROFILE) под смешанной '
+        'нагрузкой чтения и изменения записей ДДС; работает на копиях базы'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10, help='Длительность замера')
+        parser.add_argument(
+            '--write-ratio',
+            type=float,
+            default=0.2,
+            help='Доля запросов PATCH среди всех запросов',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--profile',
+            choices=settings.DATABASE_PROFILES,
+            help='Замер одного профиля на текущей базе (JSON)',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options['profile']:
+            self.stdout.write(json.dumps(self.run(options)))
+            return
+
+        source = Path(settings.DATABASES['default']['NAME'])
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in settings.DATABASE_PROFILES:
+                copy = Path(directory) / f'{profile}.sqlite3'
+                self.copy_database(source, copy)
+                command = [
+                    sys.executable,
+                    str(settings.BASE_DIR / 'benchmarks'),
+                    'sqlite_profiles',
+                    f'--profile={profile}',
+                    *(
+                        f'--{name.replace("_", "-")}={options[name]}'
+                        for name in ('threads', 'seconds', 'write_ratio', 'seed')
+                    ),
+                ]
+                env = {
+                    **os.environ,
+                    'DATABASE_PROFILE': profile,
+                    'DATABASE_NAME': str(copy),
+                    # Без DEBUG соединения не копят историю запросов
+                    'DEBUG': 'False',
+                }
+                completed = subprocess.run(  # noqa: S603
+                    command,
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=False,
+                )
+                if completed.returncode:
+                    msg = f'Замер профиля {profile} завершился с ошибкой:\n{completed.stderr}'
+                    raise CommandError(msg)
+                results[profile] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(
+            f'{options["threads"]} потоков, {options["seconds"]:g} с, '
+            f'доля записи {options["write_ratio"]:g}',
+        )
+        for profile, result in results.items():
+            kinds = ', '.join(
+                f'{kind}: p50 {result[kind]["p50"]:.1f} мс, p95 {result[kind]["p95"]:.1f} мс'
+                for kind in KINDS
+                if result[kind]['count']
+            )
+            self.stdout.write(
+                f'{profile}: {result["rps"]:.1f} запр/с, ошибок {result["errors"]} ({kinds})',
+            )
+        speedup = results['production']['rps'] / results['default']['rps']
+        self.stdout.write(self.style.SUCCESS(f'production/default: x{speedup:.1f}'))
+
+    @staticmethod
+    def copy_database(source: Path, target: Path) -> None:
+        """Копия базы в режиме журнала по умолчанию; WAL включит сам профиль"""
+        with sqlite3.connect(source) as original, sqlite3.connect(target) as copy:
+            original.backup(copy)
+            copy.execute('PRAGMA journal_mode = DELETE')
+        original.close()
+        copy.close()
+
+    def run(self, options: dict[str, Any]) -> dict[str, Any]:
+        ids = list(
+            CashFlowRecord.objects.filter(is_active=True)
+            .order_by('?')
+            .values_list('id', flat=True)[:1000],
+        )
+        if not ids:
+            msg = 'Нет записей ДДС для замера'
+            raise CommandError(msg)
+        connections.close_all()
+
+        handler = WSGIHandler()
+        deadline = time.perf_counter() + options['seconds']
+        timings: dict[str, list[float]] = defaultdict(list)
+        errors = 0
+        lock = threading.Lock()
+
+        def client(number: int) -> None:
+            nonlocal errors
+            rng = random.Random(options['seed'] * 1000 + number)
+            while time.perf_counter() < deadline:
+                pk = rng.choice(ids)
+                environ = {'PATH_INFO': f'/api/cash-flow-records/{pk}/'}
+                kind = 'write' if rng.random() < options['write_ratio'] else 'read'
+                if kind == 'write':
+                    body = json.dumps({'amount': f'{rng.randint(100, 99999) / 100:.2f}'}).encode()
+                    environ |= {
+                        'REQUEST_METHOD': 'PATCH',
+                        'CONTENT_TYPE': 'application/json',
+                        'CONTENT_LENGTH': str(len(body)),
+                        'wsgi.input': io.BytesIO(body),
+                    }
+                setup_testing_defaults(environ)
+                statuses = []
+                started = time.perf_counter()
+                response = handler(
+                    environ,
+                    lambda status, _, statuses=statuses: statuses.append(status),
+                )
+                try:
+                    for _ in response:
+                        pass
+                finally:
+                    response.close()
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    timings[kind].append(elapsed)
+                    errors += not statuses[0].startswith('200')
+            connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['threads']) as pool:
+            list(pool.map(client, range(options['threads'])))
+        elapsed = time.perf_counter() - started
+
+        result: dict[str, Any] = {
+            'rps': sum(map(len, timings.values())) / elapsed,
+            'errors': errors,
+        }
+        for kind in KINDS:
+            values = timings[kind]
+            result[kind] = {
+                'count': len(values),
+                'p50': statistics.median(values) if values else 0,
+                'p95': statistics.quantiles(values, n=100)[94] if len(values) > 1 else 0,
+            }
+        return result
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Under ASGI reads go through the async views of transfers.async_views
+os.environ.setdefault('ASYNC_READS', 'True')
 
 application = get_asgi_application()
@@ -10,9 +10,14 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import logging
 import os
 from pathlib import Path
 
+import structlog
+from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -54,6 +59,10 @@ INSTALLED_APPS += THIRD_PARTY_APPS + LOCAL_APPS
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'transfers.middleware.AsyncWhiteNoiseMiddleware',
+    'transfers.middleware.InstrumentationMiddleware',
+    'transfers.middleware.ReplicaMiddleware',
+    'transfers.middleware.ReferenceCheckMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -81,6 +90,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# List, retrieve and export served by async views; config.asgi turns this on
+ASYNC_READS = os.environ.get('ASYNC_READS', 'False').lower() == 'true'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -88,10 +100,97 @@ WSGI_APPLICATION = 'config.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
     },
 }
 
+# 'default' keeps Django's stock SQLite connection; 'production' switches the file to
+# WAL, applies SQLITE_PRAGMAS to every new connection, keeps connections open between
+# requests and starts write transactions with BEGIN IMMEDIATE, so concurrent writers
+# wait for the lock instead of failing with "database is locked"
+DATABASE_PROFILES = ('default', 'production')
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'default')
+if DATABASE_PROFILE not in DATABASE_PROFILES:
+    msg = f'DATABASE_PROFILE must be one of {", ".join(DATABASE_PROFILES)}'
+    raise ImproperlyConfigured(msg)
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # KiB
+    'temp_store': 'MEMORY',
+}
+
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update(
+        {
+            # Django recommends closing connections after each request under ASGI
+            'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', '0' if ASYNC_READS else '600')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': ';'.join(
+                    f'PRAGMA {name} = {value}' for name, value in SQLITE_PRAGMAS.items()
+                ),
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000,
+            },
+        },
+    )
+
+
+# Read replicas: comma separated SQLite files, copies of the primary (sync_replicas
+# makes them locally). GET requests of the transfers app read from one of them, and
+# a client that has just written reads from the primary for REPLICA_PIN_SECONDS (by a
+# cookie), as does any request with the X-Read-After-Write header
+DATABASE_REPLICAS = [path for path in os.environ.get('DATABASE_REPLICAS', '').split(',') if path]
+for number, path in enumerate(DATABASE_REPLICAS, start=1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['transfers.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '15'))
+
+# Archival policy: archive_records (run from cron) moves records created before the start
+# of the month ARCHIVE_AFTER_MONTHS ago into the archive table. Soft-deleted records stay
+# restorable for ARCHIVE_DELETED_AFTER_DAYS days after deletion before they are moved too
+ARCHIVE_AFTER_MONTHS = int(os.environ.get('ARCHIVE_AFTER_MONTHS', '24'))
+ARCHIVE_DELETED_AFTER_DAYS = int(os.environ.get('ARCHIVE_DELETED_AFTER_DAYS', '30'))
+
+# Request instrumentation: every request is logged with its SQL count and time, the
+# SQL_SLOWEST_QUERIES slowest statements and the render time, and SERVER_TIMING adds
+# the same timings to the response; a statement repeated more than
+# SQL_REPEATED_QUERY_BUDGET times in one request is logged as a likely N+1 pattern
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'True').lower() == 'true'
+SQL_SLOWEST_QUERIES = int(os.environ.get('SQL_SLOWEST_QUERIES', '3'))
+SQL_REPEATED_QUERY_BUDGET = int(os.environ.get('SQL_REPEATED_QUERY_BUDGET', '5'))
+
+# Per-route request metrics at /metrics (Prometheus). Under a pre-fork server set
+# METRICS_DIR to a directory shared by the workers and emptied on every restart: each
+# worker writes its counters there at most every METRICS_FLUSH_SECONDS and on exit,
+# and /metrics sums the files of all workers
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '1'))
+
+# structlog events at LOG_LEVEL and above: readable lines with DEBUG, JSON lines otherwise
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+if LOG_LEVEL not in logging.getLevelNamesMapping():
+    msg = f'Unknown LOG_LEVEL {LOG_LEVEL}'
+    raise ImproperlyConfigured(msg)
+structlog.configure(
+    processors=[
+        structlog.contextvars.merge_contextvars,
+        structlog.processors.add_log_level,
+        structlog.processors.TimeStamper(fmt='iso'),
+        structlog.dev.ConsoleRenderer() if DEBUG else structlog.processors.JSONRenderer(),
+    ],
+    wrapper_class=structlog.make_filtering_bound_logger(logging.getLevelNamesMapping()[LOG_LEVEL]),
+    cache_logger_on_first_use=True,
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -136,15 +235,21 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Django REST Framework
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'transfers.pagination.AsyncPageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # orjson when installed (uv sync --extra fast-json), stdlib json otherwise
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'transfers.renderers.FastJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'transfers.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
@@ -157,8 +262,21 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'x-read-after-write')
 
 # Static files
 STATICFILES_DIRS = [
     BASE_DIR.parent / 'frontend' / 'static',
 ]
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic writes content-hashed copies with gzip and brotli variants;
+# WhiteNoise serves them by Accept-Encoding with immutable cache headers
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
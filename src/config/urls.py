@@ -19,9 +19,12 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
 
+from transfers.views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('transfers.urls')),
+    path('metrics', metrics, name='metrics'),
     path('', TemplateView.as_view(template_name='index.html'), name='index'),
     path('references/', TemplateView.as_view(template_name='references.html'), name='references'),
 ]
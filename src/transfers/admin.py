@@ -1,5 +1,16 @@
+import datetime as dt
+from functools import cached_property
+from typing import Any
+
+from django import forms
 from django.contrib import admin
 from django.contrib.admin import display
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import DateTimeField, Field, ForeignKey, Model, QuerySet
+from django.db.models.expressions import RawSQL
+from django.http import HttpRequest
 from django.utils.html import format_html
 from django.utils.safestring import SafeString
 
@@ -11,6 +22,129 @@ from .models import (
     TransactionType,
 )
 
+# Больше строк список записей не считает: на больших таблицах показывается оценка
+EXACT_COUNT_LIMIT = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который считает не больше EXACT_COUNT_LIMIT строк.
+
+    Если строк больше, число записей оценивается: без фильтров - по диапазону id,
+    с фильтрами - считается равным пределу, дальше которого листать по номерам не
+    нужно: выборку сужают фильтрами и date_hierarchy.
+    """
+
+    estimated = False
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list.order_by()
+        counted = queryset[: EXACT_COUNT_LIMIT + 1].count()
+        if counted <= EXACT_COUNT_LIMIT:
+            return counted
+        self.estimated = True
+        if queryset.query.has_filters():
+            return EXACT_COUNT_LIMIT
+        ids = queryset.order_by('pk').values_list('pk', flat=True)
+        return max(ids.last() - ids.first() + 1, counted)
+
+
+# Модификаторы date() SQLite для периода date_hierarchy: начало периода и следующий
+PERIOD_MODIFIERS = {
+    'year': ('start of year', '+1 year'),
+    'month': ('start of month', '+1 month'),
+    'day': ('+0 days', '+1 day'),
+}
+
+PERIODS_SQL = """
+WITH RECURSIVE periods(start) AS (
+    SELECT date(({first}), %s)
+    UNION ALL
+    SELECT date(({following}), %s) FROM periods WHERE start IS NOT NULL
+)
+SELECT start FROM periods WHERE start IS NOT NULL
+"""
+
+
+class DateHierarchyQuerySet(QuerySet):
+    """QuerySet, который для date_hierarchy ищет годы, месяцы и дни по индексу.
+
+    Обычный dates() обрезает дату каждой строки функцией SQLite на Python. Здесь один
+    рекурсивный запрос находит начало каждого следующего периода поиском первой даты
+    не раньше него, так что по индексу поля читается по строке на период.
+    """
+
+    def dates(self, field_name: str, kind: str, order: str = 'ASC') -> list[dt.date]:
+        field = self.model._meta.get_field(field_name)  # noqa: SLF001
+        if isinstance(field, DateTimeField) or kind not in PERIOD_MODIFIERS:
+            return super().dates(field_name, kind, order)
+        start, step = PERIOD_MODIFIERS[kind]
+        first_sql, first_params = self.earliest_sql(field_name)
+        following_sql, following_params = self.earliest_sql(
+            field_name,
+            RawSQL('date(periods.start, %s)', (step,)),
+        )
+        sql = PERIODS_SQL.format(first=first_sql, following=following_sql)
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, (*first_params, start, *following_params, start))
+            periods = [dt.date.fromisoformat(value) for (value,) in cursor.fetchall()]
+        return periods if order == 'ASC' else periods[::-1]
+
+    def earliest_sql(self, field_name: str, since: RawSQL | None = None) -> tuple[str, tuple]:
+        """Запрос самой ранней даты выборки, при since - не раньше since"""
+        queryset = self.filter(**{f'{field_name}__isnull': False})
+        if since is not None:
+            queryset = queryset.filter(**{f'{field_name}__gte': since})
+        return queryset.order_by(field_name).values_list(field_name)[:1].query.sql_with_params()
+
+
+class AutocompleteFilter(admin.RelatedFieldListFilter):
+    """Фильтр по справочнику с поиском по названию вместо списка всех значений.
+
+    Значения подгружает виджет автодополнения админки (поле должно быть в
+    autocomplete_fields), выбор значения перезагружает список с фильтром.
+    """
+
+    template = 'admin/transfers/autocomplete_filter.html'
+
+    def __init__(  # noqa: PLR0913, PLR0917 - сигнатура FieldListFilter
+        self,
+        field: Field,
+        request: HttpRequest,
+        params: dict[str, list[str]],
+        model: type[Model],
+        model_admin: admin.ModelAdmin,
+        field_path: str,
+    ) -> None:
+        super().__init__(field, request, params, model, model_admin, field_path)
+        # Выбранное значение отображается через админку справочника, как в подсказках
+        remote_admin = model_admin.admin_site.get_model_admin(field.remote_field.model)
+        self.form_field = forms.ModelChoiceField(
+            queryset=remote_admin.get_queryset(request),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        )
+
+    def field_choices(
+        self,
+        field: Field,
+        request: HttpRequest,
+        model_admin: admin.ModelAdmin,
+    ) -> list[tuple[Any, str]]:
+        # Значения не перечисляются: их ищет виджет
+        return []
+
+    def has_output(self) -> bool:
+        return True
+
+    def rendered_widget(self) -> SafeString:
+        value = self.lookup_val[0] if self.lookup_val else None
+        return self.form_field.widget.render(
+            self.lookup_kwarg,
+            value,
+            attrs={'id': f'autocomplete_filter_{self.field_path}'},
+        )
+
 
 @admin.register(Status)
 class StatusAdmin(admin.ModelAdmin):
@@ -22,11 +156,23 @@ class StatusAdmin(admin.ModelAdmin):
 
 @admin.register(TransactionType)
 class TransactionTypeAdmin(admin.ModelAdmin):
-    list_display = ['name', 'is_active', 'created_at']
-    list_filter = ['is_active', 'created_at']
+    list_display = ['name', 'direction', 'is_active', 'created_at']
+    list_filter = ['direction', 'is_active', 'created_at']
     search_fields = ['name']
     list_editable = ['is_active']
 
+    def formfield_for_choice_field(
+        self,
+        db_field: Field,
+        request: HttpRequest,
+        **kwargs: Any,
+    ) -> forms.TypedChoiceField:
+        if db_field.name == 'direction':
+            # Без значения по умолчанию: направление нового типа выбирается явно
+            kwargs['choices'] = db_field.get_choices(include_blank=True)
+            kwargs['initial'] = None
+        return super().formfield_for_choice_field(db_field, request, **kwargs)
+
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -44,6 +190,10 @@ class SubcategoryAdmin(admin.ModelAdmin):
     list_editable = ['is_active']
     autocomplete_fields = ['category']
 
+    def get_queryset(self, request: HttpRequest) -> QuerySet:
+        # Название подкатегории включает категорию, в том числе в автодополнении
+        return super().get_queryset(request).select_related('category')
+
 
 @admin.register(CashFlowRecord)
 class CashFlowRecordAdmin(admin.ModelAdmin):
@@ -54,26 +204,59 @@ class CashFlowRecordAdmin(admin.ModelAdmin):
         'subcategory',
         'amount_display',
         'comment_preview',
+        'operation_date',
         'created_at',
     ]
+    # Справочники подтягиваются тем же запросом, что и страница, включая категорию
+    # подкатегории для ее названия
+    list_select_related = ['status', 'transaction_type', 'category', 'subcategory__category']
     list_filter = [
         'status',
         'transaction_type',
-        'category',
-        'subcategory',
-        'created_at',
+        ('category', AutocompleteFilter),
+        ('subcategory', AutocompleteFilter),
     ]
+    date_hierarchy = 'operation_date'
     search_fields = ['comment', 'category__name', 'subcategory__name']
     autocomplete_fields = ['status', 'transaction_type', 'category', 'subcategory']
-    ordering = ['-created_at']
+    ordering = ['-operation_date', '-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         ('Основная информация', {'fields': ('status', 'transaction_type')}),
         ('Категоризация', {'fields': ('category', 'subcategory')}),
-        ('Финансовая информация', {'fields': ('amount',)}),
+        ('Финансовая информация', {'fields': ('amount', 'operation_date')}),
         ('Дополнительно', {'fields': ('comment', 'is_active'), 'classes': ('collapse',)}),
     )
 
+    def get_queryset(self, request: HttpRequest) -> QuerySet:
+        queryset = super().get_queryset(request)
+        return DateHierarchyQuerySet(
+            model=self.model,
+            query=queryset.query.chain(),
+            using=queryset.db,
+        )
+
+    @property
+    def media(self) -> forms.Media:
+        field = CashFlowRecord._meta.get_field('category')  # noqa: SLF001
+        return (
+            super().media
+            + AutocompleteSelect(field, self.admin_site).media
+            + forms.Media(js=['admin/js/jquery.init.js', 'transfers/admin/autocomplete_filter.js'])
+        )
+
+    def formfield_for_foreignkey(
+        self,
+        db_field: ForeignKey,
+        request: HttpRequest,
+        **kwargs: Any,
+    ) -> forms.ModelChoiceField | None:
+        if db_field.name == 'subcategory':
+            kwargs['queryset'] = Subcategory.objects.select_related('category')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
     @display(description='Сумма')
     def amount_display(self, obj: CashFlowRecord) -> SafeString:
         """Отображение суммы с форматированием"""
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TransfersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'transfers'
+
+    def ready(self) -> None:
+        from . import checks, signals  # noqa: F401, PLC0415
+        from .instrumentation import install_serialization_timing  # noqa: PLC0415
+
+        install_serialization_timing()
@@ -0,0 +1,116 @@
+import datetime as dt
+from functools import cached_property
+
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.models import Q, QuerySet, Value
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend, FilterSet
+from rest_framework.views import APIView
+
+from .models import CashFlowRecord, CashFlowRecordArchive
+from .rollups import RECORD_FIELDS, apply_contributions, contribution_from_values
+from .serializers import CashFlowArchiveQuerySerializer
+
+# Поля записи, которые переносятся в архив как есть
+ARCHIVE_FIELDS = tuple(
+    field.attname
+    for field in CashFlowRecordArchive._meta.concrete_fields  # noqa: SLF001
+    if field.name != 'archived_at'
+)
+
+
+def archive_cutoff(months: int) -> dt.datetime:
+    """Начало месяца, отстоящего на months месяцев от текущего; более ранние записи - в архив"""
+    today = timezone.localdate()
+    index = today.year * 12 + today.month - 1 - months
+    start = dt.date(index // 12, index % 12 + 1, 1)
+    return timezone.make_aware(dt.datetime.combine(start, dt.time.min))
+
+
+def archivable_records(cutoff: dt.datetime, deleted_cutoff: dt.datetime) -> QuerySet:
+    """Записи, созданные раньше cutoff, и записи, мягко удаленные раньше deleted_cutoff.
+
+    Недавно удаленные записи остаются в основной таблице, чтобы их можно было
+    восстановить; время удаления - updated_at, удаленная запись больше не меняется.
+    """
+    return CashFlowRecord.objects.filter(
+        Q(created_at__lt=cutoff) | Q(is_active=False, updated_at__lt=deleted_cutoff),
+    )
+
+
+def archive_records(
+    cutoff: dt.datetime,
+    deleted_cutoff: dt.datetime,
+    batch_size: int = 1000,
+) -> int:
+    """Переносит записи в архив пачками и возвращает их количество.
+
+    Каждая пачка переносится в своей транзакции одним INSERT ... SELECT и одним DELETE
+    (поисковый индекс чистит триггер), а из сводов вычитается одним проходом, без
+    сигналов на каждую запись.
+    """
+    queryset = archivable_records(cutoff, deleted_cutoff).order_by('id')
+    table = CashFlowRecordArchive._meta.db_table  # noqa: SLF001
+    columns = ', '.join(
+        connection.ops.quote_name(name) for name in (*ARCHIVE_FIELDS, 'archived_at')
+    )
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.values('id', *RECORD_FIELDS)[:batch_size])
+            if not rows:
+                return archived
+            batch = CashFlowRecord.objects.filter(pk__in=[row['id'] for row in rows])
+            select = batch.annotate(archived_at=Value(timezone.now())).values(
+                *ARCHIVE_FIELDS,
+                'archived_at',
+            )
+            sql, params = select.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'INSERT INTO {table} ({columns}) {sql}', params)
+            batch._raw_delete(DEFAULT_DB_ALIAS)  # noqa: SLF001
+            # Архивные записи остаются в остатках, поэтому снимки остатков не меняются
+            apply_contributions(
+                removed=[contribution_from_values(row) for row in rows],
+                balances=False,
+            )
+        archived += len(rows)
+
+
+class ArchiveFilterBackend(DjangoFilterBackend):
+    """DjangoFilterBackend that filters reads with archived records by archive_filterset_class"""
+
+    def get_filterset_class(
+        self,
+        view: APIView,
+        queryset: QuerySet | None = None,
+    ) -> type[FilterSet] | None:
+        if getattr(view, 'include_archived', False):
+            return view.archive_filterset_class
+        return super().get_filterset_class(view, queryset)
+
+
+class IncludeArchivedMixin:
+    """List, export and summary with ?include_archived=1 also return archived records.
+
+    The records are read through a UNION ALL view of the hot table and the archive,
+    so filtering, ordering and pagination stay the same; without the parameter only
+    the hot table is queried.
+    """
+
+    archive_actions = ('list', 'export', 'summary')
+    archive_queryset: QuerySet
+    archive_filterset_class: type[FilterSet]
+
+    @cached_property
+    def include_archived(self) -> bool:
+        if self.action not in self.archive_actions:
+            return False
+        query = CashFlowArchiveQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        return query.validated_data['include_archived']
+
+    def get_queryset(self) -> QuerySet:
+        if self.include_archived:
+            return self.archive_queryset.all()
+        return super().get_queryset()
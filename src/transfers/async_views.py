@@ -0,0 +1,260 @@
+from collections.abc import Callable, Sequence
+from http import HTTPStatus
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import QuerySet
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseBase
+from django.urls import URLPattern
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import BaseRenderer
+from rest_framework.views import APIView
+from rest_framework.viewsets import GenericViewSet
+
+from .conditional import (
+    adetail_validators,
+    alist_etag,
+    not_modified,
+    set_validators,
+    with_validator_columns,
+)
+from .export import requested_format, streaming_export
+from .references import reference_cache, version_etag
+from .renderers import FastJSONRenderer
+from .views import CashFlowRecordViewSet
+
+ASYNC_ACTIONS = ('list', 'retrieve', 'export')
+
+
+class AsyncFallbackView(View):
+    """Async view for GET and HEAD, the synchronous ``fallback`` view for other methods.
+
+    A GET runs the checks of the fallback's DRF view first, like its ``initial`` does
+    in a synchronous request: content negotiation, versioning, authentication,
+    permissions and throttles. Their errors are rendered the way DRF renders them.
+    Subclasses answer in ``respond``.
+    """
+
+    fallback: Callable[..., HttpResponseBase] | None = None
+    http_method_names = View.http_method_names
+
+    async def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        if request.method not in ('GET', 'HEAD'):
+            return await sync_to_async(self.fallback)(request, *args, **kwargs)
+        return await self.get(request, *args, **kwargs)
+
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        view = self.get_view()
+        view.setup(request, *args, **kwargs)
+        view.request = view.initialize_request(request, *args, **kwargs)
+        renderer: BaseRenderer = FastJSONRenderer()
+        try:
+            # Authentication and throttles may read the session, the user and the cache
+            await sync_to_async(view.initial)(view.request, *args, **kwargs)
+            renderer = view.request.accepted_renderer
+            response = await self.respond(view, renderer)
+        except Http404:
+            response = self.error_response(view, exceptions.NotFound(), renderer)
+        except exceptions.APIException as exc:
+            response = self.error_response(view, exc, renderer)
+        response['Allow'] = ', '.join(self.allowed_methods(view))
+        return response
+
+    def get_view(self) -> APIView:
+        """Instance of the fallback's DRF view for this request"""
+        return self.fallback.cls(**self.fallback.initkwargs)
+
+    async def respond(self, view: APIView, renderer: BaseRenderer) -> HttpResponseBase:
+        return self.http_method_not_allowed(view.request, *view.args, **view.kwargs)
+
+    def allowed_methods(self, view: APIView) -> list[str]:
+        return view.allowed_methods
+
+    @staticmethod
+    def render(data: Any, renderer: BaseRenderer, status: int = 200) -> HttpResponse:
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        return HttpResponse(renderer.render(data), content_type=content_type, status=status)
+
+    def error_response(
+        self,
+        view: APIView,
+        exc: exceptions.APIException,
+        renderer: BaseRenderer,
+    ) -> HttpResponse:
+        """Same body, status and headers as DRF's exception handling"""
+        if isinstance(exc, exceptions.NotAuthenticated | exceptions.AuthenticationFailed):
+            # 401 with WWW-Authenticate when an authenticator defines it, 403 otherwise
+            auth_header = view.get_authenticate_header(view.request)
+            if auth_header:
+                exc.auth_header = auth_header
+            else:
+                exc.status_code = HTTPStatus.FORBIDDEN
+        data = exc.detail if isinstance(exc.detail, list | dict) else {'detail': exc.detail}
+        response = self.render(data, renderer, exc.status_code)
+        if getattr(exc, 'auth_header', None):
+            response['WWW-Authenticate'] = exc.auth_header
+        if getattr(exc, 'wait', None):
+            response['Retry-After'] = str(int(exc.wait))
+        return response
+
+
+class AsyncReadView(AsyncFallbackView):
+    """List, retrieve and export of a DRF ViewSet served natively under ASGI.
+
+    The ViewSet still builds the query (filters, search, ordering, ?fields=) and
+    renders the rows; the rows are fetched with the async ORM, so a request waits for
+    the database and for the client without holding a worker thread. Only the checks
+    of the ViewSet and the filter validation, which may look up references, run in a
+    thread.
+    """
+
+    viewset_class: type[GenericViewSet] | None = None
+    action = ''
+
+    def get_view(self) -> GenericViewSet:
+        return self.viewset_class(
+            **self.fallback.initkwargs,
+            action_map={'get': self.action, 'head': self.action},
+        )
+
+    async def respond(self, view: GenericViewSet, renderer: BaseRenderer) -> HttpResponseBase:
+        return await getattr(self, self.action)(view, renderer)
+
+    def allowed_methods(self, view: GenericViewSet) -> list[str]:
+        """Same Allow header as the ViewSet's own view"""
+        actions = {*self.fallback.actions, 'head', 'options'}
+        return [method.upper() for method in self.http_method_names if method in actions]
+
+    @staticmethod
+    async def filtered_queryset(view: GenericViewSet) -> QuerySet:
+        return await sync_to_async(lambda: view.filter_queryset(view.get_queryset()))()
+
+    async def list(self, view: GenericViewSet, renderer: BaseRenderer) -> HttpResponse:
+        return await self.paginated(view, await self.filtered_queryset(view), renderer)
+
+    async def paginated(
+        self,
+        view: GenericViewSet,
+        queryset: QuerySet,
+        renderer: BaseRenderer,
+    ) -> HttpResponse:
+        paginator = view.paginator
+        if paginator is None:
+            rows = [row async for row in queryset]
+            return self.render(view.get_serializer(rows, many=True).data, renderer)
+        page = await paginator.apaginate_queryset(queryset, view.request, view)
+        return self.render_page(view, page, renderer)
+
+    def render_page(
+        self,
+        view: GenericViewSet,
+        page: Sequence[Any],
+        renderer: BaseRenderer,
+    ) -> HttpResponse:
+        data = view.get_serializer(page, many=True).data
+        return self.render(view.paginator.get_paginated_response(data).data, renderer)
+
+    async def retrieve(self, view: GenericViewSet, renderer: BaseRenderer) -> HttpResponse:
+        row = await self.lookup(view, await self.filtered_queryset(view)).afirst()
+        if row is None:
+            raise exceptions.NotFound
+        return self.render(view.get_serializer(row).data, renderer)
+
+    @staticmethod
+    def lookup(view: GenericViewSet, queryset: QuerySet) -> QuerySet:
+        value = view.kwargs[view.lookup_url_kwarg or view.lookup_field]
+        try:
+            return queryset.filter(**{view.lookup_field: value})
+        except (TypeError, ValueError, DjangoValidationError):
+            raise exceptions.NotFound from None
+
+    async def export(self, view: GenericViewSet, renderer: BaseRenderer) -> HttpResponseBase:
+        queryset = await self.filtered_queryset(view)
+        return streaming_export(queryset, requested_format(renderer.format), asynchronous=True)
+
+
+class CashFlowRecordAsyncView(AsyncReadView):
+    """Async reads of CashFlowRecordViewSet with the same conditional GET handling"""
+
+    async def list(self, view: GenericViewSet, renderer: BaseRenderer) -> HttpResponseBase:
+        rows = await sync_to_async(lambda: view.filter_rows(view.get_queryset()))()
+        page = await view.paginator.apaginate_queryset(
+            with_validator_columns(view.project(rows)),
+            view.request,
+            view,
+            count_queryset=rows,
+        )
+        etag = await alist_etag(view.request, page, view.paginator.get_page_state())
+        response = not_modified(view.request, etag)
+        if response is not None:
+            return response
+        response = self.render_page(view, page, renderer)
+        set_validators(response, etag)
+        return response
+
+    async def retrieve(self, view: GenericViewSet, renderer: BaseRenderer) -> HttpResponseBase:
+        updated_at = (
+            await self.lookup(view, view.get_queryset())
+            .values_list('updated_at', flat=True)
+            .afirst()
+        )
+        if updated_at is None:
+            raise exceptions.NotFound
+        pk = view.kwargs[view.lookup_url_kwarg or view.lookup_field]
+        etag, last_modified = await adetail_validators(
+            pk,
+            updated_at,
+            view.request.GET.urlencode(),
+        )
+        response = not_modified(view.request, etag, last_modified)
+        if response is not None:
+            return response
+        response = await super().retrieve(view, renderer)
+        set_validators(response, etag, last_modified)
+        return response
+
+
+class ReferenceBootstrapAsyncView(AsyncFallbackView):
+    """Async variant of ReferenceBootstrapView"""
+
+    async def respond(self, view: APIView, renderer: BaseRenderer) -> HttpResponseBase:
+        snapshot = await reference_cache.aget()
+        response = not_modified(view.request, version_etag(snapshot.version))
+        if response is not None:
+            return response
+        response = self.render(snapshot.bootstrap, renderer)
+        set_validators(response, version_etag(snapshot.version))
+        return response
+
+
+ASYNC_VIEWS: dict[type[GenericViewSet], type[AsyncReadView]] = {
+    CashFlowRecordViewSet: CashFlowRecordAsyncView,
+}
+
+
+def async_read_urls(patterns: list[URLPattern]) -> list[URLPattern]:
+    """Router URLs with GET list, retrieve and export served by async views"""
+    result = []
+    for pattern in patterns:
+        actions = getattr(pattern.callback, 'actions', None) or {}
+        action = actions.get('get')
+        if action in ASYNC_ACTIONS:
+            viewset_class = pattern.callback.cls
+            view = ASYNC_VIEWS.get(viewset_class, AsyncReadView).as_view(
+                viewset_class=viewset_class,
+                action=action,
+                fallback=pattern.callback,
+            )
+            pattern = URLPattern(  # noqa: PLW2901
+                pattern.pattern,
+                csrf_exempt(view),
+                pattern.default_args,
+                pattern.name,
+            )
+        result.append(pattern)
+    return result
@@ -0,0 +1,240 @@
+import datetime as dt
+from collections import defaultdict
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Any
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+
+from .models import (
+    CashFlowBalanceSnapshot,
+    CashFlowRecordWithArchive,
+    RollupPeriod,
+    Status,
+    TransactionDirection,
+    TransactionType,
+)
+from .references import reference_cache
+
+BALANCE_FIELDS = ('status_id', 'transaction_type_id')
+CENT = Decimal('0.01')
+
+# Изменения по месяцам, статусам и типам операций прибавляются ко всем снимкам не
+# раньше месяца изменения; строки, которых в снимке еще нет, создаются
+SHIFT_SQL = """
+WITH
+    changes(since, status_id, transaction_type_id, record_count, total_amount) AS (
+        VALUES {values}
+    ),
+    snapshots(period_start) AS (
+        SELECT DISTINCT period_start FROM transfers_cashflowbalancesnapshot
+    )
+INSERT INTO transfers_cashflowbalancesnapshot
+    (period_start, status_id, transaction_type_id, record_count, total_amount)
+SELECT
+    snapshots.period_start,
+    changes.status_id,
+    changes.transaction_type_id,
+    SUM(changes.record_count),
+    SUM(changes.total_amount)
+FROM snapshots, changes
+WHERE snapshots.period_start >= changes.since
+GROUP BY snapshots.period_start, changes.status_id, changes.transaction_type_id
+ON CONFLICT (period_start, status_id, transaction_type_id) DO UPDATE SET
+    record_count = record_count + excluded.record_count,
+    total_amount = total_amount + excluded.total_amount
+"""
+
+type BalanceKey = tuple[int, int]
+type Totals = dict[BalanceKey, list[Any]]
+
+
+def month_start(day: dt.date) -> dt.date:
+    return day.replace(day=1)
+
+
+def next_month(day: dt.date) -> dt.date:
+    # Номер месяца после day, считая месяцы с нуля
+    index = day.year * 12 + day.month
+    return dt.date(index // 12, index % 12 + 1, 1)
+
+
+def day_start(day: dt.date) -> dt.datetime:
+    """Начало дня в текущем часовом поясе: граница снимков и периодов остатка"""
+    return timezone.make_aware(dt.datetime.combine(day, dt.time.min))
+
+
+def empty_totals() -> Totals:
+    return defaultdict(lambda: [0, Decimal(0)])
+
+
+def record_totals(start: dt.date | None, end: dt.date, totals: Totals | None = None) -> Totals:
+    """Количество и сумма активных записей, включая архивные, созданных в [start, end).
+
+    Добавляет их к totals по статусу и типу операции. Диапазон по created_at читается по
+    индексам дат создания основной таблицы и архива.
+    """
+    if totals is None:
+        totals = empty_totals()
+    queryset = CashFlowRecordWithArchive.objects.filter(
+        is_active=True,
+        created_at__lt=day_start(end),
+    )
+    if start is not None:
+        queryset = queryset.filter(created_at__gte=day_start(start))
+    rows = (
+        queryset.order_by()
+        .values(*BALANCE_FIELDS)
+        .annotate(record_count=Count('id'), total_amount=Sum('amount'))
+    )
+    for row in rows:
+        total = totals[(row['status_id'], row['transaction_type_id'])]
+        total[0] += row['record_count']
+        # SQLite складывает суммы как float, поэтому итог округляется до копеек
+        total[1] += row['total_amount'].quantize(CENT)
+    return totals
+
+
+def snapshot_totals(period_start: dt.date, totals: Totals | None = None) -> Totals:
+    """Добавляет к totals итоги снимка на начало месяца period_start"""
+    if totals is None:
+        totals = empty_totals()
+    rows = CashFlowBalanceSnapshot.objects.filter(period_start=period_start).values_list(
+        *BALANCE_FIELDS,
+        'record_count',
+        'total_amount',
+    )
+    for status_id, transaction_type_id, count, amount in rows:
+        total = totals[(status_id, transaction_type_id)]
+        total[0] += count
+        total[1] += amount
+    return totals
+
+
+def refresh_balance_snapshots() -> int:
+    """Создает недостающие снимки на начало каждого месяца по текущий включительно.
+
+    Каждый новый снимок - предыдущий плюс записи одного месяца, поэтому обновление
+    читает только записи, созданные после последнего снимка. Возвращает число
+    созданных снимков.
+    """
+    until = month_start(timezone.localdate())
+    created = 0
+    with transaction.atomic():
+        last = CashFlowBalanceSnapshot.objects.aggregate(last=Max('period_start'))['last']
+        if last is None:
+            first = CashFlowRecordWithArchive.objects.aggregate(first=Min('created_at'))['first']
+            if first is None:
+                return 0
+            previous, totals = None, empty_totals()
+            period_start = next_month(timezone.localdate(first))
+        else:
+            previous, totals = last, snapshot_totals(last)
+            period_start = next_month(last)
+        while period_start <= until:
+            record_totals(previous, period_start, totals)
+            CashFlowBalanceSnapshot.objects.bulk_create(
+                CashFlowBalanceSnapshot(
+                    period_start=period_start,
+                    status_id=status_id,
+                    transaction_type_id=transaction_type_id,
+                    record_count=count,
+                    total_amount=amount,
+                )
+                for (status_id, transaction_type_id), (count, amount) in totals.items()
+            )
+            previous, period_start = period_start, next_month(period_start)
+            created += 1
+    return created
+
+
+def rebuild_balance_snapshots() -> int:
+    """Пересчитывает все снимки заново по записям и архиву"""
+    with transaction.atomic():
+        CashFlowBalanceSnapshot.objects.all().delete()
+        return refresh_balance_snapshots()
+
+
+def shift_balance_snapshots(changes: Mapping[tuple[dt.date, int, int], list[Any]]) -> None:
+    """Переносит изменения записей в снимки, начатые после дня изменения.
+
+    changes - изменения количества и суммы по дню создания записей, статусу и типу
+    операции. Все изменения применяются одним запросом; строки для статуса и типа,
+    которых в снимке еще не было, этот же запрос создает. Снимков новее начала
+    текущего месяца нет, поэтому изменения записей текущего месяца снимков не касаются
+    и запросов не делают.
+    """
+    shifts = empty_totals()
+    for (day, *key), (count, amount) in changes.items():
+        shift = shifts[(next_month(day), *key)]
+        shift[0] += count
+        shift[1] += amount
+    today = timezone.localdate()
+    params = [
+        value
+        for key, shift in shifts.items()
+        if any(shift) and key[0] <= today
+        for value in (*key, *shift)
+    ]
+    if not params:
+        return
+    values = ', '.join(['(%s, %s, %s, %s, CAST(%s AS NUMERIC))'] * (len(params) // 5))
+    with connection.cursor() as cursor:
+        cursor.execute(SHIFT_SQL.format(values=values), params)
+
+
+def balance_totals(end: dt.date) -> tuple[dt.date | None, Totals]:
+    """Итоги активных записей, созданных до дня end, и снимок, с которого они посчитаны.
+
+    Берется последний снимок не позже end, к нему добавляются только записи, созданные
+    после него, поэтому объем чтения не зависит от длины истории.
+    """
+    snapshot = CashFlowBalanceSnapshot.objects.filter(period_start__lte=end).aggregate(
+        last=Max('period_start'),
+    )['last']
+    totals = snapshot_totals(snapshot) if snapshot is not None else empty_totals()
+    return snapshot, record_totals(snapshot, end, totals)
+
+
+def running_balance(at: dt.date, granularity: str = RollupPeriod.DAY) -> dict[str, Any]:
+    """Остаток на конец дня at или, для granularity=month, на конец его месяца.
+
+    Поступления и выбытия определяются направлением типа операции, остаток - их разница
+    по каждому статусу и в целом. Названия и направления берутся из кэша справочников.
+    """
+    end = at + dt.timedelta(days=1) if granularity == RollupPeriod.DAY else next_month(at)
+    snapshot, totals = balance_totals(end)
+    references = reference_cache.get()
+    statuses: dict[int, dict[str, Any]] = {}
+    for (status_id, transaction_type_id), (count, amount) in totals.items():
+        if not count:
+            continue
+        row = statuses.get(status_id)
+        if row is None:
+            row = statuses[status_id] = {
+                'status_id': status_id,
+                'status_name': references.get(Status, status_id).name,
+                'inflow': Decimal(0),
+                'outflow': Decimal(0),
+                'count': 0,
+            }
+        direction = references.get(TransactionType, transaction_type_id).direction
+        row['inflow' if direction == TransactionDirection.INFLOW else 'outflow'] += amount
+        row['count'] += count
+    rows = sorted(statuses.values(), key=lambda row: (row['status_name'], row['status_id']))
+    for row in rows:
+        row['balance'] = row['inflow'] - row['outflow']
+    return {
+        'at': at,
+        'granularity': granularity,
+        'as_of': end - dt.timedelta(days=1),
+        'snapshot': snapshot,
+        **{
+            name: sum((row[name] for row in rows), Decimal(0))
+            for name in ('inflow', 'outflow', 'balance')
+        },
+        'count': sum(row['count'] for row in rows),
+        'statuses': rows,
+    }
@@ -0,0 +1,95 @@
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from django.db import models, transaction
+from rest_framework import serializers
+
+from .models import CashFlowRecord, Category, Status, Subcategory, TransactionType
+from .references import ReferenceSnapshot, reference_cache
+from .rollups import apply_contributions, contribution_from_record
+from .serializers import CashFlowRecordBatchItemSerializer
+
+MAX_BATCH_SIZE = 10000
+BULK_CREATE_BATCH_SIZE = 500
+
+REFERENCE_FIELDS: dict[str, type[models.Model]] = {
+    'status': Status,
+    'transaction_type': TransactionType,
+    'category': Category,
+    'subcategory': Subcategory,
+}
+
+type ValidRow = tuple[int, dict[str, Any]]
+
+
+def validate_batch(
+    items: Sequence[Any],
+    *,
+    stop_on_error: bool,
+) -> tuple[list[ValidRow], dict[int, Any]]:
+    """Validate a batch of records against one snapshot of the reference cache.
+
+    Returns valid rows with their positions in the batch and errors by position. With
+    ``stop_on_error`` only the first error is returned and no rows are valid.
+    """
+    child = CashFlowRecordBatchItemSerializer()
+    rows: list[ValidRow] = []
+    errors: dict[int, Any] = {}
+    for index, item in enumerate(items):
+        try:
+            rows.append((index, child.run_validation(item)))
+        except serializers.ValidationError as exc:
+            errors[index] = exc.detail
+            if stop_on_error:
+                break
+
+    snapshot = reference_cache.get()
+    for index, attrs in rows:
+        error = check_references(attrs, snapshot)
+        if error:
+            errors[index] = error
+
+    if stop_on_error and errors:
+        first = min(errors)
+        return [], {first: errors[first]}
+    return [(index, attrs) for index, attrs in rows if index not in errors], errors
+
+
+def check_references(attrs: dict[str, Any], snapshot: ReferenceSnapshot) -> dict[str, Any] | None:
+    """Same rules as CashFlowRecordCreateSerializer, checked against cached references"""
+    missing = {
+        field: [f'Invalid pk "{attrs[field]}" - object does not exist.']
+        for field, model in REFERENCE_FIELDS.items()
+        if snapshot.get(model, attrs[field]) is None
+    }
+    if missing:
+        return missing
+
+    for field, model in REFERENCE_FIELDS.items():
+        if not snapshot.is_active(model, attrs[field]):
+            label = field.replace('_', ' ')
+            return {'non_field_errors': [f'Selected {label} is not active']}
+
+    if snapshot.get(Subcategory, attrs['subcategory']).category_id != attrs['category']:
+        return {'non_field_errors': ['Subcategory must belong to the selected category']}
+    return None
+
+
+def create_batch(rows: Iterable[dict[str, Any]]) -> list[CashFlowRecord]:
+    """Insert validated rows and their rollup contributions in one transaction"""
+    records = [
+        CashFlowRecord(
+            status_id=attrs['status'],
+            transaction_type_id=attrs['transaction_type'],
+            category_id=attrs['category'],
+            subcategory_id=attrs['subcategory'],
+            amount=attrs['amount'],
+            comment=attrs['comment'],
+            operation_date=attrs['operation_date'],
+        )
+        for attrs in rows
+    ]
+    with transaction.atomic():
+        CashFlowRecord.objects.bulk_create(records, batch_size=BULK_CREATE_BATCH_SIZE)
+        apply_contributions(added=[contribution_from_record(record) for record in records])
+    return records
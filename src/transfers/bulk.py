@@ -0,0 +1,76 @@
+from typing import Any, NamedTuple
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, QuerySet, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Subcategory
+from .rollups import DIMENSIONS, Contribution, RollupDeltas
+
+DIMENSION_FIELDS = tuple(f'{name}_id' for name in DIMENSIONS)
+
+
+class BulkResult(NamedTuple):
+    """Records selected by a bulk action and the ones it changes"""
+
+    matched: int
+    affected: int
+
+
+def inconsistent_records(queryset: QuerySet, values: dict[str, Any]) -> int:
+    """Count records whose subcategory would not belong to their category after the change.
+
+    The new category and subcategory replace the stored ones, and the pair is checked
+    with one EXISTS subquery per record instead of loading the records.
+    """
+    if 'category_id' not in values and 'subcategory_id' not in values:
+        return 0
+    owner = Subcategory.objects.filter(
+        pk=values.get('subcategory_id', OuterRef('subcategory_id')),
+        category_id=values.get('category_id', OuterRef('category_id')),
+    )
+    return queryset.order_by().exclude(Exists(owner)).count()
+
+
+def bulk_update_records(
+    queryset: QuerySet,
+    values: dict[str, Any],
+    *,
+    dry_run: bool = False,
+) -> BulkResult:
+    """Set ``values`` (by column name) on the records of ``queryset`` with one UPDATE.
+
+    Records that already have the values are not touched. Only the given columns and
+    ``updated_at`` are written, and the rollups are moved by the totals of the changed
+    records grouped by day and references, so the cost does not grow with one query
+    per record. With ``dry_run`` nothing is written and the counts are the same.
+    """
+    queryset = queryset.order_by()
+    with transaction.atomic():
+        matched = queryset.count()
+        changed = queryset.exclude(**values)
+        if dry_run:
+            return BulkResult(matched, changed.count())
+
+        totals = list(
+            changed.annotate(day=TruncDate('created_at'))
+            .values('day', 'is_active', *DIMENSION_FIELDS)
+            .annotate(count=Count('id'), amount=Sum('amount')),
+        )
+        affected = changed.update(**values, updated_at=timezone.now())
+
+        deltas = RollupDeltas()
+        replaced = {name: value for name, value in values.items() if name in DIMENSION_FIELDS}
+        for row in totals:
+            previous = Contribution(
+                row['day'],
+                *(row[name] for name in DIMENSION_FIELDS),
+                row['amount'],
+            )
+            if row['is_active']:
+                deltas.add(previous, -1, row['count'])
+            if values.get('is_active', row['is_active']):
+                deltas.add(previous._replace(**replaced), 1, row['count'])
+        deltas.apply_in_bulk()
+    return BulkResult(matched, affected)
@@ -0,0 +1,36 @@
+from typing import Any
+
+from django.apps import AppConfig
+from django.core.checks import CheckMessage, Error, Tags, register
+from django.db import DEFAULT_DB_ALIAS
+
+from .search import is_available, missing_triggers
+
+
+@register(Tags.database)
+def check_search_triggers(
+    app_configs: list[AppConfig] | None,
+    databases: list[str] | None = None,
+    **kwargs: Any,
+) -> list[CheckMessage]:
+    """Fail when a table rebuild has dropped the triggers of the full-text index.
+
+    Without them search silently stops seeing new and changed records. Runs with
+    ``check --database default`` and before ``migrate``.
+    """
+    if not databases or DEFAULT_DB_ALIAS not in databases or not is_available():
+        return []
+    missing = missing_triggers()
+    if not missing:
+        return []
+    return [
+        Error(
+            f'Нет триггеров полнотекстового индекса: {", ".join(missing)}',
+            hint=(
+                'Скорее всего, миграция пересоздала таблицу записей ДДС или справочника. '
+                'Создайте триггеры заново SQL из миграции 0006 (migrate --skip-checks для '
+                'такой миграции) и выполните rebuild_search_index.'
+            ),
+            id='transfers.E001',
+        ),
+    ]
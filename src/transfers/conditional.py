@@ -0,0 +1,112 @@
+import datetime as dt
+import hashlib
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from django.db.models import QuerySet
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.request import Request
+
+from .references import acurrent_version_state, current_version_state
+
+# Columns of a list row that, with the reference version, determine its representation
+VALIDATOR_COLUMNS = ('id', 'updated_at')
+
+
+def with_validator_columns(queryset: QuerySet) -> QuerySet:
+    """Extend a .values() projection by the columns the list ETag is computed from"""
+    selected = queryset.query.values_select
+    missing = [name for name in VALIDATOR_COLUMNS if name not in selected]
+    if selected and missing:
+        return queryset.values(*selected, *missing)
+    return queryset
+
+
+def list_etag(request: Request, rows: Iterable[Any], page_state: str) -> str:
+    """Strong ETag of a list page computed from the page itself, without extra queries.
+
+    A page response is fully determined by its rows, their nested references and what
+    the paginator adds around them (the total or the cursor links), so the ETag covers
+    the ids and update times of the rows, the reference version and ``page_state``.
+    """
+    version, _ = current_version_state()
+    return _list_etag(request, rows, page_state, version)
+
+
+async def alist_etag(request: Request, rows: Iterable[Any], page_state: str) -> str:
+    version, _ = await acurrent_version_state()
+    return _list_etag(request, rows, page_state, version)
+
+
+def _list_etag(request: Request, rows: Iterable[Any], page_state: str, version: int) -> str:
+    digest = hashlib.sha256(f'{request.get_full_path()}|{page_state}|{version}'.encode())
+    for row in rows:
+        if isinstance(row, Mapping):
+            pk, updated_at = row['id'], row['updated_at']
+        else:
+            pk, updated_at = row.pk, row.updated_at
+        digest.update(f'|{pk}:{updated_at.isoformat()}'.encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def detail_validators(
+    pk: str,
+    updated_at: dt.datetime,
+    query: str = '',
+) -> tuple[str, dt.datetime]:
+    """ETag and Last-Modified of a single record including its nested references.
+
+    The query string selects the representation (?fields=, ?expand=), so it is part of
+    the ETag.
+    """
+    return _detail_validators(pk, updated_at, query, current_version_state())
+
+
+async def adetail_validators(
+    pk: str,
+    updated_at: dt.datetime,
+    query: str = '',
+) -> tuple[str, dt.datetime]:
+    return _detail_validators(pk, updated_at, query, await acurrent_version_state())
+
+
+def _detail_validators(
+    pk: str,
+    updated_at: dt.datetime,
+    query: str,
+    references: tuple[int, dt.datetime | None],
+) -> tuple[str, dt.datetime]:
+    version, references_updated_at = references
+    last_modified = max(filter(None, [updated_at, references_updated_at]))
+    variant = f'-{hashlib.sha256(query.encode()).hexdigest()[:16]}' if query else ''
+    return f'"{pk}-{updated_at.timestamp()}-{version}{variant}"', last_modified
+
+
+def not_modified(
+    request: Request,
+    etag: str,
+    last_modified: dt.datetime | None = None,
+) -> HttpResponseBase | None:
+    """304 response when the client copy is still valid, otherwise None"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(
+    response: HttpResponseBase,
+    etag: str,
+    last_modified: dt.datetime | None = None,
+) -> None:
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Clients may store the response but must revalidate it on every poll
+    patch_cache_control(response, private=True, no_cache=True)
@@ -0,0 +1,136 @@
+from functools import cached_property
+from typing import Any
+
+from django.db.models import QuerySet
+from rest_framework import serializers
+
+from .serializers import FieldPlan, ValuesSerializer, field_plan, plan_values
+
+type PathTree = dict[str, 'PathTree']
+
+
+def parse_paths(value: str | None) -> PathTree | None:
+    """Tree of comma separated dotted paths, None when the parameter is absent or empty"""
+    if not value:
+        return None
+    tree: PathTree = {}
+    for part in value.split(','):
+        node = tree
+        for name in filter(None, (name.strip() for name in part.split('.'))):
+            node = node.setdefault(name, {})
+    return tree or None
+
+
+def unknown_paths(plan: tuple[FieldPlan, ...], tree: PathTree, prefix: str = '') -> list[str]:
+    items = {item.key: item for item in plan}
+    unknown = []
+    for name, subtree in tree.items():
+        item = items.get(name)
+        if item is None:
+            unknown.append(f'{prefix}{name}')
+        elif subtree and item.nested is None:
+            unknown.extend(f'{prefix}{name}.{subname}' for subname in subtree)
+        elif subtree:
+            unknown.extend(unknown_paths(item.nested, subtree, f'{prefix}{name}.'))
+    return unknown
+
+
+def relation_paths(plan: tuple[FieldPlan, ...], prefix: str = '') -> set[str]:
+    paths = set()
+    for item in plan:
+        if item.nested is not None:
+            paths.add(f'{prefix}{item.key}')
+            paths |= relation_paths(item.nested, f'{prefix}{item.key}.')
+    return paths
+
+
+def select_field_plan(
+    plan: tuple[FieldPlan, ...],
+    fields: PathTree | None,
+    expand: set[str] | None,
+    prefix: str = '',
+) -> tuple[FieldPlan, ...]:
+    """Part of a field plan requested with ?fields= and ?expand=.
+
+    Without ``expand`` every relation is nested as before; with it the relations that
+    are not listed (and not reached through ``fields``) are rendered as primary keys.
+    """
+    selected = []
+    for item in plan:
+        if fields is not None and item.key not in fields:
+            continue
+        if item.nested is None:
+            selected.append(item)
+            continue
+        subtree = fields.get(item.key) if fields is not None else None
+        path = f'{prefix}{item.key}'
+        if not subtree and expand is not None and path not in expand:
+            selected.append(FieldPlan(item.key, item.source))
+            continue
+        nested = select_field_plan(item.nested, subtree or None, expand, f'{path}.')
+        selected.append(
+            FieldPlan(item.key, item.source, nested=nested, sources=plan_values(nested)),
+        )
+    return tuple(selected)
+
+
+def iter_paths(tree: PathTree, prefix: tuple[str, ...] = ()) -> list[tuple[str, ...]]:
+    """All paths of a tree including the intermediate ones"""
+    paths = []
+    for name, subtree in tree.items():
+        path = (*prefix, name)
+        paths.append(path)
+        paths.extend(iter_paths(subtree, path))
+    return paths
+
+
+class SparseFieldsMixin:
+    """List and retrieve with ?fields= and ?expand=, rendered from a .values() projection.
+
+    The selection is pushed down into the query: only the columns of the requested
+    fields are read and only the expanded relations are joined.
+    """
+
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    read_actions = ('list', 'retrieve')
+
+    @cached_property
+    def read_plan(self) -> tuple[FieldPlan, ...]:
+        plan = field_plan(self.serializer_class)
+        params = self.request.query_params
+        fields = parse_paths(params.get(self.fields_query_param))
+        expand = parse_paths(params.get(self.expand_query_param))
+        errors = {}
+        if fields is not None and (unknown := unknown_paths(plan, fields)):
+            errors[self.fields_query_param] = [f'Unknown fields: {", ".join(unknown)}']
+        expand_paths = None
+        if expand is not None:
+            expand_paths = {'.'.join(path) for path in iter_paths(expand)}
+            if unknown := sorted(expand_paths - relation_paths(plan)):
+                errors[self.expand_query_param] = [f'Unknown relations: {", ".join(unknown)}']
+        if errors:
+            raise serializers.ValidationError(errors)
+        return select_field_plan(plan, fields, expand_paths)
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        return self.project(self.filter_rows(queryset))
+
+    def filter_rows(self, queryset: QuerySet) -> QuerySet:
+        """Filtered and ordered rows before the projection, counted without its joins"""
+        return super().filter_queryset(queryset)
+
+    def project(self, queryset: QuerySet) -> QuerySet:
+        if self.action in self.read_actions:
+            return queryset.values(*plan_values(self.read_plan))
+        return queryset
+
+    def get_serializer_class(self) -> type[serializers.BaseSerializer]:
+        if self.action in self.read_actions:
+            return ValuesSerializer
+        return super().get_serializer_class()
+
+    def get_serializer(self, *args: Any, **kwargs: Any) -> serializers.BaseSerializer:
+        if self.action in self.read_actions:
+            kwargs['plan'] = self.read_plan
+        return super().get_serializer(*args, **kwargs)
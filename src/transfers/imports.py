@@ -0,0 +1,335 @@
+import csv
+import datetime as dt
+import json
+from collections.abc import Callable, Iterable, Iterator
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, TextIO
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+
+from .batch import BULK_CREATE_BATCH_SIZE
+from .models import (
+    CashFlowRecord,
+    Category,
+    Status,
+    Subcategory,
+    TransactionDirection,
+    TransactionType,
+)
+from .references import reference_cache
+from .rollups import RollupDeltas, contribution_from_record
+
+IMPORT_CHUNK_SIZE = 5000
+
+# Даты создания из файла записываются после вставки одним запросом на пачку
+CREATED_AT_SQL = """
+WITH created(id, created_at) AS (
+    VALUES {values}
+)
+UPDATE transfers_cashflowrecord
+SET created_at = created.created_at
+FROM created
+WHERE transfers_cashflowrecord.id = created.id
+"""
+
+FORMATS = ('csv', 'jsonl')
+
+# Столбцы файла совпадают со столбцами выгрузки, поэтому выгрузку можно загрузить обратно
+REQUIRED_COLUMNS = ('status', 'transaction_type', 'category', 'subcategory', 'amount')
+
+type Errors = dict[str, list[str]]
+type SourceRow = tuple[int, dict[str, Any]]
+
+
+class RowError(Exception):
+    def __init__(self, errors: Errors) -> None:
+        super().__init__(errors)
+        self.errors = errors
+
+
+class ImportStats:
+    """Счетчики загрузки"""
+
+    def __init__(self) -> None:
+        self.read = 0
+        self.created = 0
+        self.rejected = 0
+
+
+class ReferenceResolver:
+    """Сопоставление названий справочников их id по картам в памяти.
+
+    Карты строятся один раз из кэша справочников. С ``create_missing`` отсутствующие
+    справочники создаются при первом упоминании и сразу попадают в карты. Направление
+    типа операции по названию не определить, поэтому типы создаются только с
+    ``default_direction``, а без него строки с неизвестным типом отклоняются. Названия
+    созданных типов собираются в ``created_transaction_types`` для проверки.
+    """
+
+    def __init__(
+        self,
+        *,
+        create_missing: bool = False,
+        default_direction: TransactionDirection | None = None,
+    ) -> None:
+        self.create_missing = create_missing
+        self.default_direction = default_direction
+        snapshot = reference_cache.get()
+        self.active: dict[type[models.Model], set[int]] = {}
+        self.names: dict[type[models.Model], dict[Any, int]] = {}
+        for model in (Status, TransactionType, Category, Subcategory):
+            objects = snapshot.all(model)
+            self.active[model] = {obj.pk for obj in objects if obj.is_active}
+            self.names[model] = {self._key(obj): obj.pk for obj in objects}
+        self.subcategory_names = {name for _, name in self.names[Subcategory]}
+        self.created: dict[type[models.Model], int] = dict.fromkeys(self.names, 0)
+        self.created_transaction_types: list[str] = []
+
+    @staticmethod
+    def _key(obj: Any) -> Any:
+        if isinstance(obj, Subcategory):
+            return (obj.category_id, obj.name)
+        return obj.name
+
+    def resolve(self, row: dict[str, Any]) -> dict[str, int]:
+        ids: dict[str, int] = {}
+        errors: Errors = {}
+        for field, model in (
+            ('status', Status),
+            ('transaction_type', TransactionType),
+            ('category', Category),
+        ):
+            pk = self._lookup(model, row[field], {'name': row[field]})
+            if pk is None:
+                errors[field] = [f'Object with name "{row[field]}" does not exist.']
+                if model is TransactionType and self.create_missing:
+                    errors[field].append('Set a default direction to create transaction types.')
+            else:
+                ids[field] = pk
+        if 'category' in ids:
+            key = (ids['category'], row['subcategory'])
+            pk = self._lookup(
+                Subcategory,
+                key,
+                {'category_id': ids['category'], 'name': row['subcategory']},
+            )
+            if pk is not None:
+                ids['subcategory'] = pk
+            elif row['subcategory'] in self.subcategory_names:
+                errors['non_field_errors'] = ['Subcategory must belong to the selected category']
+            else:
+                errors['subcategory'] = [
+                    f'Object with name "{row["subcategory"]}" does not exist.',
+                ]
+        if errors:
+            raise RowError(errors)
+
+        for field, model in (
+            ('status', Status),
+            ('transaction_type', TransactionType),
+            ('category', Category),
+            ('subcategory', Subcategory),
+        ):
+            if ids[field] not in self.active[model]:
+                label = field.replace('_', ' ')
+                raise RowError({'non_field_errors': [f'Selected {label} is not active']})
+        return ids
+
+    def _lookup(self, model: type[models.Model], key: Any, lookup: dict[str, Any]) -> int | None:
+        pk = self.names[model].get(key)
+        if pk is None and self.create_missing:
+            defaults = {}
+            if model is TransactionType:
+                if self.default_direction is None:
+                    return None
+                defaults['direction'] = self.default_direction
+            obj, created = model.objects.get_or_create(**lookup, defaults=defaults)
+            pk = self.names[model][key] = obj.pk
+            if model is Subcategory:
+                self.subcategory_names.add(obj.name)
+            if model is TransactionType and created:
+                self.created_transaction_types.append(obj.name)
+            if obj.is_active:
+                self.active[model].add(pk)
+            self.created[model] += created
+        return pk
+
+
+class RowValidator:
+    """Проверка значений строки по правилам API без обращений к базе"""
+
+    def __init__(self) -> None:
+        self.amount = serializers.DecimalField(
+            max_digits=12,
+            decimal_places=2,
+            min_value=Decimal('0.01'),
+        )
+        self.comment = serializers.CharField(allow_blank=True, required=False, default='')
+
+    def validate(self, row: dict[str, Any]) -> dict[str, Any]:
+        if '_raw' in row:
+            # Строка JSONL, которую не удалось разобрать в объект
+            raise RowError({'non_field_errors': [row.get('_error', 'Expected an object.')]})
+        errors: Errors = {}
+        missing = [column for column in REQUIRED_COLUMNS if not _text(row.get(column))]
+        for column in missing:
+            errors[column] = ['This field is required.']
+
+        attrs: dict[str, Any] = {}
+        if 'amount' not in errors:
+            try:
+                attrs['amount'] = self.amount.run_validation(_text(row['amount']))
+            except serializers.ValidationError as exc:
+                errors['amount'] = exc.detail
+        try:
+            attrs['comment'] = self.comment.run_validation(row.get('comment') or '')
+        except serializers.ValidationError as exc:
+            errors['comment'] = exc.detail
+        try:
+            attrs['created_at'] = parse_created_at(_text(row.get('created_at')))
+        except ValueError:
+            errors['created_at'] = ['Datetime has wrong format. Use ISO 8601 date or datetime.']
+        try:
+            attrs['operation_date'] = parse_operation_date(_text(row.get('operation_date')))
+        except ValueError:
+            errors['operation_date'] = ['Date has wrong format. Use YYYY-MM-DD.']
+
+        if errors:
+            raise RowError(errors)
+        for column in REQUIRED_COLUMNS[:-1]:
+            attrs[column] = _text(row[column])
+        return attrs
+
+
+def _text(value: Any) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def parse_created_at(value: str) -> dt.datetime | None:
+    """Дата или дата-время ISO 8601; без часового пояса - в часовом поясе проекта"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(value)
+        parsed = dt.datetime.combine(date, dt.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_operation_date(value: str) -> dt.date | None:
+    """Дата операции ISO 8601 (ГГГГ-ММ-ДД)"""
+    if not value:
+        return None
+    date = parse_date(value)
+    if date is None:
+        raise ValueError(value)
+    return date
+
+
+def detect_format(path: Path) -> str:
+    return 'jsonl' if path.suffix.lower() in {'.jsonl', '.ndjson', '.json'} else 'csv'
+
+
+def read_rows(stream: TextIO, file_format: str, delimiter: str = ',') -> Iterator[SourceRow]:
+    """Строки файла с номерами строк исходного файла; файл читается потоком"""
+    if file_format == 'csv':
+        reader = csv.DictReader(stream, delimiter=delimiter)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            row = {'_raw': line.rstrip('\n'), '_error': str(exc)}
+        yield line_number, row if isinstance(row, dict) else {'_raw': line.rstrip('\n')}
+
+
+def create_records(records: list[CashFlowRecord]) -> None:
+    """Создает записи одной транзакцией, сохраняя их created_at вместо текущего времени.
+
+    auto_now_add подставляет при вставке текущее время, поэтому заданные даты
+    создания записываются следующим запросом в той же транзакции: по одному UPDATE
+    на пачку со списком (id, created_at).
+    """
+    created_at = [record.created_at for record in records]
+    field = CashFlowRecord._meta.get_field('created_at')  # noqa: SLF001
+    with transaction.atomic(), connection.cursor() as cursor:
+        CashFlowRecord.objects.bulk_create(records, batch_size=BULK_CREATE_BATCH_SIZE)
+        for start in range(0, len(records), BULK_CREATE_BATCH_SIZE):
+            params = []
+            for record, value in zip(
+                records[start : start + BULK_CREATE_BATCH_SIZE],
+                created_at[start : start + BULK_CREATE_BATCH_SIZE],
+                strict=True,
+            ):
+                record.created_at = value
+                params += [record.pk, field.get_db_prep_value(value, connection)]
+            values = ', '.join(['(%s, %s)'] * (len(params) // 2))
+            cursor.execute(CREATED_AT_SQL.format(values=values), params)
+
+
+def import_records(
+    rows: Iterable[SourceRow],
+    resolver: ReferenceResolver,
+    *,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_reject: Callable[[int, dict[str, Any], Errors], None],
+    on_chunk: Callable[[ImportStats], None] | None = None,
+) -> ImportStats:
+    """Загружает строки пачками: каждая пачка - одна транзакция с записями и сводами"""
+    stats = ImportStats()
+    validator = RowValidator()
+    chunk: list[CashFlowRecord] = []
+    for line_number, row in rows:
+        stats.read += 1
+        try:
+            attrs = validator.validate(row)
+            ids = resolver.resolve(attrs)
+        except RowError as exc:
+            stats.rejected += 1
+            on_reject(line_number, row, exc.errors)
+            continue
+        created_at = attrs['created_at'] or timezone.now()
+        chunk.append(
+            CashFlowRecord(
+                status_id=ids['status'],
+                transaction_type_id=ids['transaction_type'],
+                category_id=ids['category'],
+                subcategory_id=ids['subcategory'],
+                amount=attrs['amount'],
+                comment=attrs['comment'],
+                operation_date=attrs['operation_date'] or timezone.localdate(created_at),
+                created_at=created_at,
+            ),
+        )
+        if len(chunk) >= chunk_size:
+            stats.created += _write_chunk(chunk)
+            chunk = []
+            if on_chunk is not None:
+                on_chunk(stats)
+    if chunk:
+        stats.created += _write_chunk(chunk)
+        if on_chunk is not None:
+            on_chunk(stats)
+    return stats
+
+
+def _write_chunk(records: list[CashFlowRecord]) -> int:
+    deltas = RollupDeltas()
+    for record in records:
+        deltas.add(contribution_from_record(record))
+    with transaction.atomic():
+        create_records(records)
+        deltas.apply_in_bulk()
+    return len(records)
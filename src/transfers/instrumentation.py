@@ -0,0 +1,154 @@
+import heapq
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from rest_framework.serializers import BaseSerializer
+
+# Замер текущего HTTP-запроса; None - запрос не замеряется (команды, миграции)
+request_profile: ContextVar['RequestProfile | None'] = ContextVar('request_profile', default=None)
+
+SQL_PREVIEW_LENGTH = 300
+
+
+class RequestProfile:
+    """SQL-запросы, время сериализации и отрисовки одного HTTP-запроса"""
+
+    def __init__(self, slowest: int = 3) -> None:
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.sql_time = 0.0
+        self.serialize_time = 0.0
+        self.serializing = False
+        self.render_time = 0.0
+        # Число выполнений каждого текста запроса: параметры в нем не подставлены,
+        # поэтому N+1 по разным id дает один и тот же текст
+        self.statements: Counter[str] = Counter()
+        self.slowest_count = slowest
+        self.slowest: list[tuple[float, str]] = []
+
+    def add_query(self, sql: str, duration: float) -> None:
+        self.sql_time += duration
+        self.statements[sql] += 1
+        if len(self.slowest) < self.slowest_count:
+            heapq.heappush(self.slowest, (duration, sql))
+        elif self.slowest and duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (duration, sql))
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+
+    @property
+    def query_count(self) -> int:
+        return self.statements.total()
+
+    def timings(self) -> dict[str, float]:
+        """Длительности частей запроса в миллисекундах.
+
+        ser - serializer.data без SQL-запросов, которые он выполнил (они в db);
+        app - все остальное: код представления, промежуточные слои, фильтры.
+        """
+        app = max(self.duration - self.sql_time - self.serialize_time - self.render_time, 0.0)
+        return {
+            'db': self.sql_time * 1000,
+            'app': app * 1000,
+            'ser': self.serialize_time * 1000,
+            'render': self.render_time * 1000,
+            'total': self.duration * 1000,
+        }
+
+    def slowest_queries(self) -> list[dict[str, Any]]:
+        return [
+            {'sql': sql[:SQL_PREVIEW_LENGTH], 'ms': round(duration * 1000, 2)}
+            for duration, sql in sorted(self.slowest, reverse=True)
+        ]
+
+    def repeated_queries(self, budget: int) -> list[dict[str, Any]]:
+        """Запросы, выполненные больше budget раз: признак N+1"""
+        return [
+            {'sql': sql[:SQL_PREVIEW_LENGTH], 'count': count}
+            for sql, count in self.statements.most_common()
+            if count > budget
+        ]
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing"""
+        descriptions = {
+            'db': f'{self.query_count} queries',
+            'app': 'view',
+            'ser': 'serializer.data',
+        }
+        return ', '.join(
+            f'{name};dur={duration:.2f}'
+            + (f';desc="{descriptions[name]}"' if name in descriptions else '')
+            for name, duration in self.timings().items()
+        )
+
+
+def record_query(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,  # noqa: FBT001
+    context: dict[str, Any],
+) -> Any:
+    """Обертка выполнения запросов соединения: время и текст запроса в замер запроса"""
+    profile = request_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(sql, time.perf_counter() - started)
+
+
+@contextmanager
+def measure_serialization() -> Iterator[None]:
+    """Добавляет время блока без его SQL-запросов к времени сериализации текущего запроса.
+
+    Вложенные блоки (сериализатор внутри сериализатора) учитываются один раз.
+    """
+    profile = request_profile.get()
+    if profile is None or profile.serializing:
+        yield
+        return
+    profile.serializing = True
+    started = time.perf_counter()
+    sql_time = profile.sql_time
+    try:
+        yield
+    finally:
+        profile.serializing = False
+        elapsed = time.perf_counter() - started - (profile.sql_time - sql_time)
+        profile.serialize_time += max(elapsed, 0.0)
+
+
+def install_serialization_timing() -> None:
+    """Замеряет serializer.data всех сериализаторов DRF.
+
+    У DRF нет точки расширения для этого, а свойство data сериализаторов и
+    ListSerializer доходит до BaseSerializer.data через super(), поэтому обертка одна.
+    """
+    data = BaseSerializer.data
+
+    def timed_data(self: BaseSerializer) -> Any:
+        with measure_serialization():
+            return data.fget(self)
+
+    BaseSerializer.data = property(timed_data)
+
+
+@contextmanager
+def measure_render() -> Iterator[None]:
+    """Добавляет время блока к времени отрисовки текущего запроса"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile = request_profile.get()
+        if profile is not None:
+            profile.render_time += time.perf_counter() - started
@@ -0,0 +1,61 @@
+import datetime as dt
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from transfers.archive import archivable_records, archive_cutoff, archive_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит в архив записи ДДС старше заданного числа месяцев (по умолчанию '
+        'ARCHIVE_AFTER_MONTHS) и записи, удаленные раньше заданного числа дней (по умолчанию '
+        'ARCHIVE_DELETED_AFTER_DAYS); рассчитана на запуск по расписанию'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=settings.ARCHIVE_AFTER_MONTHS,
+            help='Архивировать записи, созданные раньше начала месяца N месяцев назад',
+        )
+        parser.add_argument(
+            '--deleted-days',
+            type=int,
+            default=settings.ARCHIVE_DELETED_AFTER_DAYS,
+            help='Архивировать мягко удаленные записи, удаленные больше N дней назад',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать записи, которые будут перенесены',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options['months'] < 0 or options['deleted_days'] < 0 or options['batch_size'] < 1:
+            msg = (
+                '--months и --deleted-days не могут быть отрицательными, '
+                '--batch-size должен быть положительным'
+            )
+            raise CommandError(msg)
+        cutoff = archive_cutoff(options['months'])
+        deleted_cutoff = timezone.now() - dt.timedelta(days=options['deleted_days'])
+        if options['dry_run']:
+            counts = archivable_records(cutoff, deleted_cutoff).aggregate(
+                total=Count('id'),
+                deleted=Count('id', filter=Q(is_active=False)),
+            )
+            self.stdout.write(
+                f'К переносу в архив (создано до {cutoff:%Y-%m-%d}): {counts["total"]}, '
+                f'из них удаленных {counts["deleted"]}',
+            )
+            return
+        archived = archive_records(cutoff, deleted_cutoff, batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Перенесено в архив (создано до {cutoff:%Y-%m-%d}): {archived}'),
+        )
@@ -0,0 +1,387 @@
+import datetime as dt
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from transfers.models import CashFlowRecord, Category, Status, Subcategory, TransactionType
+
+RECORDS_URL = '/api/cash-flow-records/'
+ORDERINGS = (
+    '',
+    'created_at',
+    '-created_at',
+    'amount',
+    '-amount',
+    'operation_date',
+    '-operation_date',
+    'updated_at',
+    '-updated_at',
+)
+SEARCH_TERMS = ('оплата', 'VPS', 'аренда сервер', 'avit')
+REFERENCE_URLS = {
+    'statuses': '/api/statuses/',
+    'transaction_types': '/api/transaction-types/',
+    'categories': '/api/categories/',
+    'subcategories': '/api/subcategories/',
+    'bootstrap': '/api/references/bootstrap/',
+}
+# Разница в миллисекундах, которая не считается регрессией при любой относительной
+# погрешности: у быстрых запросов шум таймера сравним со временем ответа
+NOISE_MS = 1.0
+# Эталонная нагрузка без кода приложения: чтение страницы таблицы и JSON. Время
+# сценариев в базовой линии хранится в долях ее времени, снятого в том же процессе,
+# поэтому линия не зависит от скорости машины
+CALIBRATION_SQL = f'SELECT * FROM {CashFlowRecord._meta.db_table} ORDER BY id LIMIT 500'  # noqa: SLF001, S608
+CALIBRATION_REPEAT = 200
+METRICS = ('p50', 'p95')
+
+type Request = tuple[str, str, dict[str, Any] | None]
+type Scenario = Callable[[random.Random], Request]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки (p50/p95/p99) и число SQL-запросов основных эндпоинтов API '
+        'на базе с воспроизводимыми данными, пишет результат в JSON и завершается '
+        'ошибкой при регрессии относительно сохраненной базовой линии (числа запросов '
+        'и времени в долях эталонной нагрузки, снятой в том же замере)'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--records', type=int, default=20000, help='Записей ДДС в базе')
+        parser.add_argument('--repeat', type=int, default=20, help='Запросов на сценарий')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--output',
+            type=Path,
+            help='Файл для результатов в миллисекундах (JSON)',
+        )
+        parser.add_argument(
+            '--baseline',
+            type=Path,
+            default=settings.BASE_DIR / 'benchmarks' / 'api_baseline.json',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.5,
+            help='Допустимый относительный рост p50 и p95 (в долях эталонной нагрузки)',
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Сохранить результаты как новую базовую линию',
+        )
+        parser.add_argument('--child', action='store_true', help='Замер на текущей базе (JSON)')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options['repeat'] < 2:  # noqa: PLR2004
+            msg = '--repeat должен быть не меньше 2 для перцентилей'
+            raise CommandError(msg)
+        if options['child']:
+            self.stdout.write(json.dumps(self.run(options)))
+            return
+
+        result = self.run_child(options)
+        if options['output']:
+            options['output'].write_text(
+                json.dumps(result, ensure_ascii=False, indent=2) + '\n',
+                encoding='utf-8',
+            )
+        unit = result['unit_ms']
+        self.stdout.write(f'Эталонная нагрузка: {unit:.3f} мс')
+        for name, metrics in result['scenarios'].items():
+            self.stdout.write(
+                f'{name}: p50 {metrics["p50"]:.2f} мс (x{metrics["p50"] / unit:.2f}), '
+                f'p95 {metrics["p95"]:.2f} мс, p99 {metrics["p99"]:.2f} мс, '
+                f'запросов {metrics["queries"]}',
+            )
+
+        baseline_path: Path = options['baseline']
+        if options['update_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(self.dump_baseline(result), encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'Базовая линия сохранена: {baseline_path}'))
+            return
+        if not baseline_path.is_file():
+            self.stdout.write(self.style.WARNING(f'Нет базовой линии {baseline_path}'))
+            return
+
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        if (baseline['records'], baseline['seed']) != (result['records'], result['seed']):
+            msg = (
+                f'Базовая линия снята на {baseline["records"]} записях с seed '
+                f'{baseline["seed"]}, а замер - на {result["records"]} с seed {result["seed"]}'
+            )
+            raise CommandError(msg)
+        regressions = self.compare(result, baseline, options['tolerance'])
+        for line in regressions:
+            self.stdout.write(self.style.ERROR(line))
+        if regressions:
+            msg = f'Регрессии относительно {baseline_path}: {len(regressions)}'
+            raise CommandError(msg)
+        self.stdout.write(
+            self.style.SUCCESS(f'Регрессий нет: {len(baseline["scenarios"])} сценариев'),
+        )
+
+    def run_child(self, options: dict[str, Any]) -> dict[str, Any]:
+        """Замер в отдельном процессе на новой базе, чтобы не трогать рабочую"""
+        with tempfile.TemporaryDirectory() as directory:
+            command = [
+                sys.executable,
+                str(settings.BASE_DIR / 'manage.py'),
+                'benchmark_api',
+                '--child',
+                *(f'--{name}={options[name]}' for name in ('records', 'repeat', 'seed')),
+            ]
+            env = {
+                **os.environ,
+                'DATABASE_NAME': str(Path(directory) / 'benchmark.sqlite3'),
+                'DATABASE_REPLICAS': '',
+                'DEBUG': 'False',
+            }
+            completed = subprocess.run(  # noqa: S603
+                command,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+        if completed.returncode:
+            msg = f'Замер завершился с ошибкой:\n{completed.stderr}'
+            raise CommandError(msg)
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    @staticmethod
+    def dump_baseline(result: dict[str, Any]) -> str:
+        """Базовая линия: число запросов и время в долях эталонной нагрузки.
+
+        Сценарий занимает одну строку, чтобы новая базовая линия давала короткий diff.
+        """
+        unit = result['unit_ms']
+        header = ''.join(
+            f'  "{key}": {json.dumps(result[key])},\n' for key in ('records', 'seed', 'repeat')
+        )
+        scenarios = ',\n'.join(
+            f'    {json.dumps(name, ensure_ascii=False)}: '
+            + json.dumps(
+                {
+                    'queries': metrics['queries'],
+                    **{metric: round(metrics[metric] / unit, 2) for metric in METRICS},
+                },
+            )
+            for name, metrics in result['scenarios'].items()
+        )
+        return f'{{\n{header}  "scenarios": {{\n{scenarios}\n  }}\n}}\n'
+
+    @staticmethod
+    def compare(
+        result: dict[str, Any],
+        baseline: dict[str, Any],
+        tolerance: float,
+    ) -> list[str]:
+        unit = result['unit_ms']
+        regressions = []
+        for name, expected in baseline['scenarios'].items():
+            actual = result['scenarios'].get(name)
+            if actual is None:
+                regressions.append(f'{name}: сценарий пропал из замера')
+                continue
+            if actual['queries'] > expected['queries']:
+                regressions.append(
+                    f'{name}: SQL-запросов {actual["queries"]}, было {expected["queries"]}',
+                )
+            for metric in METRICS:
+                ratio = actual[metric] / unit
+                limit = expected[metric] * (1 + tolerance) + NOISE_MS / unit
+                if ratio > limit:
+                    regressions.append(
+                        f'{name}: {metric} x{ratio:.2f} ({actual[metric]:.2f} мс), было '
+                        f'x{expected[metric]:.2f} (допустимо до x{limit:.2f})',
+                    )
+        return regressions
+
+    def run(self, options: dict[str, Any]) -> dict[str, Any]:
+        call_command('migrate', verbosity=0)
+        call_command(
+            'seed_cashflow',
+            records=options['records'],
+            seed=options['seed'],
+            stdout=io.StringIO(),
+        )
+        self.client = Client(SERVER_NAME='localhost')
+        self.ids = list(
+            CashFlowRecord.objects.filter(is_active=True)
+            .order_by('id')
+            .values_list('id', flat=True),
+        )
+        self.statuses = list(Status.objects.filter(is_active=True).values_list('id', flat=True))
+        self.transaction_types = list(
+            TransactionType.objects.filter(is_active=True).values_list('id', flat=True),
+        )
+        self.subcategories = list(
+            Subcategory.objects.filter(is_active=True).values_list('id', 'category_id'),
+        )
+        unit = self.calibrate()
+        rng = random.Random(options['seed'])
+        scenarios = {}
+        for name, scenario in self.scenarios().items():
+            timings, queries = self.measure(scenario, rng, options['repeat'])
+            percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+            scenarios[name] = {
+                'p50': statistics.median(timings),
+                'p95': percentiles[94],
+                'p99': percentiles[98],
+                'mean': statistics.fmean(timings),
+                'queries': queries,
+            }
+        return {
+            'records': options['records'],
+            'seed': options['seed'],
+            'repeat': options['repeat'],
+            'unit_ms': unit,
+            'scenarios': scenarios,
+        }
+
+    @staticmethod
+    def calibrate() -> float:
+        """Медиана времени эталонной нагрузки в миллисекундах"""
+        timings = []
+        with connection.cursor() as cursor:
+            for _ in range(CALIBRATION_REPEAT + 1):
+                started = time.perf_counter()
+                cursor.execute(CALIBRATION_SQL)
+                json.dumps(cursor.fetchall(), default=str)
+                timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings[1:])
+
+    def measure(
+        self,
+        scenario: Scenario,
+        rng: random.Random,
+        repeat: int,
+    ) -> tuple[list[float], int]:
+        """Время ответов в миллисекундах и наибольшее число SQL-запросов на ответ"""
+        self.request(*scenario(rng))
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            method, path, data = scenario(rng)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                self.request(method, path, data)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len(captured))
+        return timings, queries
+
+    def request(self, method: str, path: str, data: dict[str, Any] | None) -> None:
+        call = getattr(self.client, method)
+        if data is None:
+            response = call(path)
+        else:
+            response = call(path, json.dumps(data), content_type='application/json')
+        if response.status_code >= 400:  # noqa: PLR2004
+            msg = f'{method.upper()} {path}: {response.status_code} {response.content[:200]!r}'
+            raise CommandError(msg)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+
+    def scenarios(self) -> dict[str, Scenario]:
+        return {
+            **self.list_scenarios(),
+            **{f'search {term}': self.get(RECORDS_URL, {'search': term}) for term in SEARCH_TERMS},
+            'retrieve': lambda rng: ('get', f'{RECORDS_URL}{rng.choice(self.ids)}/', None),
+            'create': self.create,
+            'partial_update': lambda rng: (
+                'patch',
+                f'{RECORDS_URL}{rng.choice(self.ids)}/',
+                {'amount': f'{rng.randint(100, 999999) / 100:.2f}'},
+            ),
+            'soft_delete': self.soft_delete,
+            **{f'references {name}': self.get(url) for name, url in REFERENCE_URLS.items()},
+        }
+
+    def list_scenarios(self) -> dict[str, Scenario]:
+        """Список записей для каждого фильтра и каждой сортировки"""
+        today = timezone.localdate()
+        quarter = {
+            'after': (today - dt.timedelta(days=90)).isoformat(),
+            'before': today.isoformat(),
+        }
+        subcategory = Subcategory.objects.order_by('id').first()
+        filters = {
+            'all': {},
+            'status': {'status': Status.objects.order_by('id').first().pk},
+            'transaction_type': {
+                'transaction_type': TransactionType.objects.order_by('id').first().pk,
+            },
+            'category': {'category': Category.objects.order_by('id').first().pk},
+            'subcategory': {'subcategory': subcategory.pk},
+            'created_at': {
+                'created_at_after': quarter['after'],
+                'created_at_before': quarter['before'],
+            },
+            'operation_date': {
+                'operation_date_after': quarter['after'],
+                'operation_date_before': quarter['before'],
+            },
+            'combined': {
+                'category': subcategory.category_id,
+                'subcategory': subcategory.pk,
+                'operation_date_after': quarter['after'],
+                'operation_date_before': quarter['before'],
+            },
+        }
+        return {
+            f'list {name} {ordering or "default"}': self.get(
+                RECORDS_URL,
+                {**params, **({'ordering': ordering} if ordering else {})},
+            )
+            for name, params in filters.items()
+            for ordering in ORDERINGS
+        }
+
+    @staticmethod
+    def get(path: str, params: dict[str, Any] | None = None) -> Scenario:
+        query = urlencode(params or {})
+        url = f'{path}?{query}' if query else path
+        return lambda _rng: ('get', url, None)
+
+    def create(self, rng: random.Random) -> Request:
+        subcategory = rng.choice(self.subcategories)
+        return (
+            'post',
+            RECORDS_URL,
+            {
+                'status': rng.choice(self.statuses),
+                'transaction_type': rng.choice(self.transaction_types),
+                'category': subcategory[1],
+                'subcategory': subcategory[0],
+                'amount': f'{rng.randint(100, 999999) / 100:.2f}',
+                'comment': 'benchmark',
+            },
+        )
+
+    def soft_delete(self, rng: random.Random) -> Request:
+        # Каждая запись удаляется один раз: повторный DELETE ответил бы 404
+        pk = self.ids.pop(rng.randrange(len(self.ids)))
+        return 'delete', f'{RECORDS_URL}{pk}/', None
@@ -0,0 +1,51 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+
+from transfers.query_plans import TABLE, check_plans, filter_params, param_combinations
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит EXPLAIN QUERY PLAN для каждой комбинации фильтров и сортировок '
+        'списка записей ДДС и завершается ошибкой, если план сводится к полному '
+        'сканированию таблицы или сортирует записи там, где порядок дает индекс. '
+        'Та же проверка на пустой базе - tests/test_query_plans.py; команда проверяет '
+        'планы на данных и статистике рабочей базы'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--show-plans',
+            action='store_true',
+            help='Выводить полный план для каждой комбинации',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        # Временные справочники для фильтров откатываются после проверки
+        with transaction.atomic():
+            failures, checked = self._check(options['show_plans'])
+            transaction.set_rollback(True)
+
+        if failures:
+            msg = (
+                f'{len(failures)} из {checked} планов сканируют {TABLE} целиком '
+                'или сортируют записи без индекса'
+            )
+            raise CommandError(msg)
+        self.stdout.write(self.style.SUCCESS(f'Все {checked} планов используют индексы'))
+
+    def _check(self, show_plans: bool) -> tuple[list[str], int]:  # noqa: FBT001
+        failures = []
+        checked = 0
+        for check in check_plans(param_combinations(filter_params())):
+            checked += 1
+            if check.problems:
+                failures.append(check.label)
+                self.stdout.write(self.style.ERROR(f'{check.kind:<5} {check.label}'))
+            else:
+                self.stdout.write(f'OK    {check.label}')
+            if show_plans or check.problems:
+                self.stdout.write(f'{check.plan}\n')
+        return failures, checked
@@ -0,0 +1,66 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+
+from transfers.models import TransactionDirection, TransactionType
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает направление каждого типа операций и меняет его для перечисленных '
+        'названий. Миграция 0010 делает все существующие типы выбытиями: поступления '
+        'оператор проверяет по списку и задает здесь'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        for direction in TransactionDirection:
+            parser.add_argument(
+                f'--{direction.value}',
+                action='append',
+                default=[],
+                metavar='NAME',
+                help=f'Тип операций, который становится: {direction.label.lower()}; '
+                'можно несколько',
+            )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что изменится',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        requested: dict[str, TransactionDirection] = {}
+        for direction in TransactionDirection:
+            for name in options[direction.value]:
+                if requested.setdefault(name, direction) != direction:
+                    msg = f'Тип «{name}» указан и как поступление, и как выбытие'
+                    raise CommandError(msg)
+
+        types = {obj.name: obj for obj in TransactionType.objects.order_by('name')}
+        unknown = sorted(set(requested) - set(types))
+        if unknown:
+            msg = f'Нет типов операций: {", ".join(unknown)}'
+            raise CommandError(msg)
+
+        changed = [
+            (types[name], direction)
+            for name, direction in requested.items()
+            if types[name].direction != direction
+        ]
+        # Сохранение по одному типу сбрасывает кэш справочников во всех процессах
+        with transaction.atomic():
+            for obj, direction in changed:
+                self.stdout.write(
+                    f'{obj.name}: {obj.get_direction_display()} -> {direction.label}',
+                )
+                if not options['dry_run']:
+                    obj.direction = direction
+                    obj.save(update_fields=['direction'])
+
+        for obj in types.values():
+            self.stdout.write(f'{obj.get_direction_display():<11} {obj.name}')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Будет изменено типов: {len(changed)}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Изменено типов: {len(changed)}'))
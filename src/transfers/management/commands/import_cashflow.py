@@ -0,0 +1,126 @@
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from transfers.imports import (
+    FORMATS,
+    IMPORT_CHUNK_SIZE,
+    ImportStats,
+    ReferenceResolver,
+    detect_format,
+    import_records,
+    read_rows,
+)
+from transfers.models import TransactionDirection
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает записи ДДС из CSV или JSONL со столбцами status, transaction_type, '
+        'category, subcategory (названия), amount, comment и необязательными created_at '
+        'и operation_date (по умолчанию - дата created_at)'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('path', type=Path)
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла; по умолчанию определяется по расширению',
+        )
+        parser.add_argument('--delimiter', default=',', help='Разделитель столбцов CSV')
+        parser.add_argument(
+            '--create-missing',
+            action='store_true',
+            help='Создавать отсутствующие статусы, типы, категории и подкатегории',
+        )
+        parser.add_argument(
+            '--default-direction',
+            choices=TransactionDirection.values,
+            help=(
+                'Направление создаваемых типов операций; без него строки с неизвестным '
+                'типом отклоняются и с --create-missing'
+            ),
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help='Количество записей в одной транзакции',
+        )
+        parser.add_argument(
+            '--rejects',
+            type=Path,
+            help='Файл для отклоненных строк (JSONL); по умолчанию <path>.rejects.jsonl',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path: Path = options['path']
+        if not path.is_file():
+            msg = f'Файл не найден: {path}'
+            raise CommandError(msg)
+        file_format = options['format'] or detect_format(path)
+        rejects_path: Path = options['rejects'] or path.with_name(f'{path.name}.rejects.jsonl')
+        resolver = ReferenceResolver(
+            create_missing=options['create_missing'],
+            default_direction=options['default_direction'],
+        )
+        started = time.perf_counter()
+
+        def report(stats: ImportStats) -> None:
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'Прочитано {stats.read}, загружено {stats.created}, отклонено {stats.rejected}'
+                f' ({stats.read / max(elapsed, 1e-9):.0f} строк/с)',
+            )
+
+        with (
+            path.open(encoding='utf-8-sig', newline='') as source,
+            rejects_path.open('w', encoding='utf-8') as rejects,
+        ):
+
+            def reject(line: int, row: dict[str, Any], errors: dict[str, Any]) -> None:
+                rejects.write(
+                    json.dumps({'line': line, 'row': row, 'errors': errors}, ensure_ascii=False)
+                    + '\n',
+                )
+
+            stats = import_records(
+                read_rows(source, file_format, options['delimiter']),
+                resolver,
+                chunk_size=options['chunk_size'],
+                on_reject=reject,
+                on_chunk=report,
+            )
+
+        elapsed = time.perf_counter() - started
+        created = ', '.join(
+            f'{model._meta.verbose_name_plural}: {count}'  # noqa: SLF001
+            for model, count in resolver.created.items()
+            if count
+        )
+        if created:
+            self.stdout.write(f'Созданы справочники - {created}')
+        if resolver.created_transaction_types:
+            direction = TransactionDirection(options['default_direction']).label
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Типы операций созданы с направлением «{direction}», проверьте его '
+                    f'в админке: {", ".join(resolver.created_transaction_types)}',
+                ),
+            )
+        if stats.rejected:
+            self.stdout.write(
+                self.style.WARNING(f'Отклонено строк: {stats.rejected}, см. {rejects_path}'),
+            )
+        else:
+            rejects_path.unlink()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Загружено {stats.created} из {stats.read} строк за {elapsed:.1f} с'
+                f' ({stats.read / max(elapsed, 1e-9):.0f} строк/с)',
+            ),
+        )
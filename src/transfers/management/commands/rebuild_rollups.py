@@ -0,0 +1,40 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from transfers.rollups import compute_rollups, rebuild_rollups, stored_rollups
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает своды ДДС по таблице записей или проверяет их расхождение'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сравнить своды с записями и завершиться ошибкой при расхождении',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not options['check']:
+            rows = rebuild_rollups(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Своды пересобраны: {rows} строк'))
+            return
+
+        expected = compute_rollups()
+        stored = stored_rollups()
+        drift = sorted(
+            (
+                key
+                for key in expected.keys() | stored.keys()
+                if expected.get(key) != stored.get(key)
+            ),
+            key=str,
+        )
+        for key in drift:
+            self.stdout.write(f'{key}: ожидалось {expected.get(key)}, в сводах {stored.get(key)}')
+        if drift:
+            msg = f'Расхождение в {len(drift)} из {len(expected)} строк сводов'
+            raise CommandError(msg)
+        self.stdout.write(self.style.SUCCESS(f'Своды совпадают с записями: {len(expected)} строк'))
@@ -0,0 +1,16 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transfers.search import is_available, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Заново заполняет полнотекстовый индекс записей ДДС'
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not is_available():
+            msg = 'Полнотекстовый индекс доступен только для SQLite'
+            raise CommandError(msg)
+        rows = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'Поисковый индекс перестроен: {rows} записей'))
@@ -0,0 +1,75 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from transfers.balances import (
+    BALANCE_FIELDS,
+    next_month,
+    rebuild_balance_snapshots,
+    record_totals,
+    refresh_balance_snapshots,
+)
+from transfers.models import CashFlowBalanceSnapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает снимки остатков ДДС на начало месяцев, прошедших с последнего снимка; '
+        'запускается по расписанию, например раз в сутки'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Удалить все снимки и посчитать их заново по записям и архиву',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сравнить снимки с записями и завершиться ошибкой при расхождении',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options['check']:
+            self.check_snapshots()
+            return
+        if options['rebuild']:
+            created = rebuild_balance_snapshots()
+            self.stdout.write(self.style.SUCCESS(f'Снимки остатков пересчитаны: {created}'))
+            return
+        created = refresh_balance_snapshots()
+        self.stdout.write(self.style.SUCCESS(f'Создано снимков остатков: {created}'))
+
+    def check_snapshots(self) -> None:
+        rows = CashFlowBalanceSnapshot.objects.values_list(
+            'period_start',
+            *BALANCE_FIELDS,
+            'record_count',
+            'total_amount',
+        )
+        stored: dict[Any, dict[Any, tuple[int, Any]]] = {}
+        for period_start, *key, count, amount in rows:
+            if count:
+                stored.setdefault(period_start, {})[tuple(key)] = (count, amount)
+
+        drift = 0
+        for period_start, snapshot in sorted(stored.items()):
+            expected = {
+                key: tuple(total)
+                for key, total in record_totals(None, period_start).items()
+                if total[0]
+            }
+            if expected != snapshot:
+                drift += 1
+                self.stdout.write(
+                    f'{period_start}: ожидалось {expected}, в снимке {snapshot}',
+                )
+        last = max(stored, default=None)
+        if last is not None and next_month(last) <= timezone.localdate():
+            self.stdout.write(self.style.WARNING(f'Последний снимок на {last}, нужен refresh'))
+        if drift:
+            msg = f'Расхождение в {drift} из {len(stored)} снимков остатков'
+            raise CommandError(msg)
+        self.stdout.write(self.style.SUCCESS(f'Снимки совпадают с записями: {len(stored)}'))
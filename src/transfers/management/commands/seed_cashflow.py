@@ -0,0 +1,24 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from transfers.seeding import seed_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу воспроизводимыми записями ДДС: справочники с реалистичными '
+        'частотами, логнормальные суммы, записи задним числом и мягко удаленные'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--records', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--months', type=int, default=24, help='Глубина истории записей')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options['records'] < 1 or options['months'] < 1:
+            msg = '--records и --months должны быть положительными'
+            raise CommandError(msg)
+        created = seed_records(options['records'], seed=options['seed'], months=options['months'])
+        self.stdout.write(self.style.SUCCESS(f'Создано записей ДДС: {created}'))
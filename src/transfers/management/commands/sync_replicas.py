@@ -0,0 +1,34 @@
+import sqlite3
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from transfers.routers import replica_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу в файлы реплик из DATABASE_REPLICAS: локальная замена '
+        'репликации для проверки маршрутизации чтения'
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        aliases = replica_aliases()
+        if not aliases:
+            msg = 'Реплики не настроены: задайте DATABASE_REPLICAS'
+            raise CommandError(msg)
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        for alias in aliases:
+            connections[alias].close()
+            path = settings.DATABASES[alias]['NAME']
+            replica = sqlite3.connect(path)
+            try:
+                # Резервная копия SQLite согласована, даже если в базу в это время пишут
+                primary.connection.backup(replica)
+            finally:
+                replica.close()
+            self.stdout.write(f'{alias}: {path}')
+        self.stdout.write(self.style.SUCCESS(f'Реплик обновлено: {len(aliases)}'))
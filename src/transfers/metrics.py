@@ -0,0 +1,201 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections.abc import Iterable
+from functools import cache
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponseBase
+
+type Labels = tuple[tuple[str, str], ...]
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Metric(NamedTuple):
+    name: str
+    kind: str
+    help: str
+    buckets: tuple[float, ...] = ()
+
+    @property
+    def size(self) -> int:
+        # Счетчик - одно значение; гистограмма - число наблюдений в каждой корзине,
+        # включая +Inf, и их сумма
+        return len(self.buckets) + 2 if self.kind == 'histogram' else 1
+
+
+REQUESTS = Metric('http_requests_total', 'counter', 'Requests by view, method and status')
+ERRORS = Metric('http_request_errors_total', 'counter', 'Requests answered with a 5xx status')
+DURATION = Metric(
+    'http_request_duration_seconds',
+    'histogram',
+    'Request duration by view',
+    DURATION_BUCKETS,
+)
+QUERIES = Metric('http_request_db_queries', 'histogram', 'SQL queries per request', QUERY_BUCKETS)
+METRICS = {metric.name: metric for metric in (REQUESTS, ERRORS, DURATION, QUERIES)}
+
+
+class MetricsRegistry:
+    """Счетчики и гистограммы процесса.
+
+    В многопроцессном режиме (METRICS_DIR) каждый процесс не чаще раза в
+    METRICS_FLUSH_SECONDS и при выходе пишет свой снимок в отдельный файл каталога, а
+    /metrics складывает снимки всех процессов. Значения только растут, поэтому файлы
+    завершившихся процессов остаются в сумме; каталог очищают при перезапуске сервиса.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.pid = os.getpid()
+        self.values: dict[tuple[str, Labels], list[float]] = {}
+        self.path: Path | None = None
+        self.flushed = time.monotonic()
+
+    def observe(self, metric: Metric, labels: dict[str, str], value: float = 1) -> None:
+        key = (metric.name, tuple(labels.items()))
+        with self.lock:
+            if self.pid != os.getpid():
+                # Процесс-воркер, созданный fork, начинает со своих нулей
+                self.reset()
+            values = self.values.setdefault(key, [0.0] * metric.size)
+            if metric.kind == 'histogram':
+                values[bisect_left(metric.buckets, value)] += 1
+            values[-1] += value
+
+    def flush(self, *, force: bool = False) -> None:
+        """Пишет снимок процесса в METRICS_DIR, если прошло METRICS_FLUSH_SECONDS"""
+        directory = settings.METRICS_DIR
+        if not directory or self.pid != os.getpid():
+            return
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.flushed < settings.METRICS_FLUSH_SECONDS:
+                return
+            self.flushed = now
+            snapshot = [
+                [name, dict(labels), values] for (name, labels), values in self.values.items()
+            ]
+            if self.path is None:
+                Path(directory).mkdir(parents=True, exist_ok=True)
+                # Случайный суффикс: pid может достаться новому процессу
+                self.path = Path(directory) / f'worker-{self.pid}-{uuid.uuid4().hex[:8]}.json'
+            temporary = self.path.with_suffix('.tmp')
+            temporary.write_text(json.dumps(snapshot), encoding='utf-8')
+            temporary.replace(self.path)
+
+    def collect(self) -> dict[tuple[str, Labels], list[float]]:
+        """Значения процесса или, в многопроцессном режиме, сумма снимков всех процессов"""
+        if not settings.METRICS_DIR:
+            with self.lock:
+                return {key: list(values) for key, values in self.values.items()}
+        self.flush(force=True)
+        merged: dict[tuple[str, Labels], list[float]] = {}
+        for path in sorted(Path(settings.METRICS_DIR).glob('worker-*.json')):
+            for name, labels, values in json.loads(path.read_text(encoding='utf-8')):
+                if name not in METRICS:
+                    continue
+                total = merged.setdefault((name, tuple(labels.items())), [0.0] * len(values))
+                for index, value in enumerate(values):
+                    total[index] += value
+        return merged
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush, force=True)
+
+
+@cache
+def route_prefixes() -> dict[type, str]:
+    from .urls import router  # noqa: PLC0415
+
+    return {viewset: prefix for prefix, viewset, _ in router.registry}
+
+
+def view_label(request: HttpRequest) -> str:
+    """Метка маршрута: префикс ViewSet и действие (cash-flow-records:list), иначе имя URL"""
+    match = request.resolver_match
+    if match is None:
+        return 'unresolved'
+    # Асинхронные представления чтения хранят исходный ViewSet как fallback
+    callback = getattr(match.func, 'view_initkwargs', {}).get('fallback') or match.func
+    prefix = route_prefixes().get(getattr(callback, 'cls', None))
+    actions = getattr(callback, 'actions', None)
+    if prefix is None or not actions:
+        return match.view_name
+    method = request.method.lower()
+    action = actions.get(method) or (actions.get('get') if method == 'head' else None)
+    return f'{prefix}:{action or method}'
+
+
+def record_request(
+    request: HttpRequest,
+    response: HttpResponseBase,
+    duration: float,
+    queries: int,
+) -> None:
+    labels = {'view': view_label(request)}
+    status = response.status_code
+    registry.observe(REQUESTS, {**labels, 'method': request.method, 'status': str(status)})
+    if status >= 500:  # noqa: PLR2004
+        registry.observe(ERRORS, labels)
+    registry.observe(DURATION, labels, duration)
+    registry.observe(QUERIES, labels, queries)
+    registry.flush()
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    pairs = ','.join(f'{name}="{escape(str(value))}"' for name, value in labels)
+    return f'{{{pairs}}}' if pairs else ''
+
+
+def format_number(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def exposition() -> str:
+    """Все метрики в текстовом формате Prometheus"""
+    values = registry.collect()
+    lines = []
+    for metric in METRICS.values():
+        lines += [f'# HELP {metric.name} {metric.help}', f'# TYPE {metric.name} {metric.kind}']
+        for (name, labels), sample in sorted(values.items()):
+            if name != metric.name:
+                continue
+            if metric.kind == 'counter':
+                lines.append(f'{name}{format_labels(labels)} {format_number(sample[0])}')
+                continue
+            lines.extend(histogram_lines(metric, labels, sample))
+    return '\n'.join(lines) + '\n'
+
+
+def histogram_lines(metric: Metric, labels: Labels, sample: list[float]) -> list[str]:
+    lines = []
+    count = 0.0
+    bounds: list[Any] = [*metric.buckets, '+Inf']
+    for bound, observed in zip(bounds, sample[:-1], strict=True):
+        count += observed
+        le = bound if isinstance(bound, str) else format_number(bound)
+        lines.append(
+            f'{metric.name}_bucket{format_labels((*labels, ("le", le)))} {format_number(count)}',
+        )
+    lines.append(f'{metric.name}_sum{format_labels(labels)} {format_number(sample[-1])}')
+    lines.append(f'{metric.name}_count{format_labels(labels)} {format_number(count)}')
+    return lines
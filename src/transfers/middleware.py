@@ -0,0 +1,203 @@
+from collections.abc import Callable
+from typing import Any
+
+import structlog
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponseBase
+from rest_framework.permissions import SAFE_METHODS
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .instrumentation import RequestProfile, request_profile
+from .metrics import record_request
+from .references import checked_snapshots
+from .routers import choose_replica, read_replica, replica_aliases
+
+PIN_COOKIE = 'pin_primary'
+PIN_HEADER = 'X-Read-After-Write'
+
+logger = structlog.get_logger(__name__)
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoiseMiddleware that keeps the ASGI middleware chain async.
+
+    WhiteNoise only declares sync support, so under ASGI Django would run every view
+    below it, including the async read views, through async_to_sync in a thread.
+    """
+
+    async_capable = True
+
+    def __init__(self, get_response: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaMiddleware:
+    """Sends reads of safe requests to a replica and pins clients to the primary after writes.
+
+    Requests with other methods read from the primary, so a write request sees its own
+    changes. A write also sets a cookie for REPLICA_PIN_SECONDS; while it is present
+    the client reads from the primary, so the window should exceed replica lag. Clients
+    that do not keep cookies, such as API scripts, send the X-Read-After-Write header
+    (any value) with reads that must see their earlier writes. The replica is released
+    by the request_finished receiver, after a streamed body.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[..., Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        read_replica.set(self.replica_for(request))
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        read_replica.set(self.replica_for(request))
+        return self.pin(request, await self.get_response(request))
+
+    @staticmethod
+    def replica_for(request: HttpRequest) -> str | None:
+        if (
+            request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES
+            or PIN_HEADER in request.headers
+        ):
+            return None
+        return choose_replica()
+
+    @staticmethod
+    def pin(request: HttpRequest, response: HttpResponseBase) -> HttpResponseBase:
+        if request.method not in SAFE_METHODS and replica_aliases():
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class ReferenceCheckMiddleware:
+    """Lets a request check the reference data version at most once.
+
+    The process-wide reference cache compares its snapshot with ReferenceDataVersion
+    on the first access in a request and reuses it for the rest of the request; outside
+    requests, and while a streamed body is sent, every access checks the version.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[..., Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = checked_snapshots.set({})
+        try:
+            return self.get_response(request)
+        finally:
+            checked_snapshots.reset(token)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        token = checked_snapshots.set({})
+        try:
+            return await self.get_response(request)
+        finally:
+            checked_snapshots.reset(token)
+
+
+class InstrumentationMiddleware:
+    """Measures every request: SQL count and time, the slowest statements, serializer and
+    render time.
+
+    Statements are recorded by the execute wrapper every connection gets on creation
+    (see transfers.signals), serializer.data by the wrapper installed in
+    TransfersConfig.ready, rendering by FastJSONRenderer. The measurement is logged
+    as a structlog event, sent in the Server-Timing header with SERVER_TIMING and added
+    to the per-route metrics served at /metrics (see transfers.metrics). A statement
+    run more than SQL_REPEATED_QUERY_BUDGET times, the usual sign of an N+1 pattern, is
+    logged as a warning. Queries made while a streamed body is sent happen after the
+    measurement and are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[..., Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = RequestProfile(settings.SQL_SLOWEST_QUERIES)
+        token = request_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_profile.reset(token)
+        return self.report(request, response, profile)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        profile = RequestProfile(settings.SQL_SLOWEST_QUERIES)
+        token = request_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_profile.reset(token)
+        return self.report(request, response, profile)
+
+    @staticmethod
+    def report(
+        request: HttpRequest,
+        response: HttpResponseBase,
+        profile: RequestProfile,
+    ) -> HttpResponseBase:
+        profile.finish()
+        record_request(request, response, profile.duration, profile.query_count)
+        log = logger.bind(method=request.method, path=request.path)
+        log.info(
+            'request_profile',
+            status=response.status_code,
+            queries=profile.query_count,
+            **{f'{name}_ms': round(duration, 2) for name, duration in profile.timings().items()},
+            slowest_queries=profile.slowest_queries(),
+        )
+        repeated = profile.repeated_queries(settings.SQL_REPEATED_QUERY_BUDGET)
+        if repeated:
+            log.warning(
+                'repeated_queries',
+                budget=settings.SQL_REPEATED_QUERY_BUDGET,
+                statements=repeated,
+            )
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = profile.server_timing()
+        return response
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:40
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cashflowrecord',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Сумма (руб.)'),
+        ),
+        migrations.AlterField(
+            model_name='cashflowrecord',
+            name='category',
+            field=models.ForeignKey(default=None, on_delete=django.db.models.deletion.PROTECT, to='transfers.category', verbose_name='Категория'),
+        ),
+        migrations.AlterField(
+            model_name='cashflowrecord',
+            name='subcategory',
+            field=models.ForeignKey(default=None, on_delete=django.db.models.deletion.PROTECT, to='transfers.subcategory', verbose_name='Подкатегория'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='cfr_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['amount', 'id'], name='cfr_active_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['updated_at', 'id'], name='cfr_active_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status', 'created_at'], name='cfr_active_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['transaction_type', 'created_at'], name='cfr_active_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'created_at'], name='cfr_active_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['subcategory', 'created_at'], name='cfr_active_subcategory_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:45
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0002_cashflowrecord_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashFlowRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'День'), ('month', 'Месяц')], max_length=5, verbose_name='Период')),
+                ('period_start', models.DateField(verbose_name='Начало периода')),
+                ('record_count', models.IntegerField(default=0, verbose_name='Количество записей')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18, verbose_name='Сумма (руб.)')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='transfers.category', verbose_name='Категория')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='transfers.status', verbose_name='Статус')),
+                ('subcategory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='transfers.subcategory', verbose_name='Подкатегория')),
+                ('transaction_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='transfers.transactiontype', verbose_name='Тип операции')),
+            ],
+            options={
+                'verbose_name': 'Свод ДДС',
+                'verbose_name_plural': 'Своды ДДС',
+                'ordering': ['period', 'period_start'],
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start', 'status', 'transaction_type', 'category', 'subcategory'), name='cfr_rollup_bucket_unique')],
+            },
+        ),
+    ]
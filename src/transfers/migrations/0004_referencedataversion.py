@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0003_cashflowrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceDataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'Версия справочников',
+                'verbose_name_plural': 'Версии справочников',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0004_referencedataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='referencedataversion',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Обновлено'),
+        ),
+    ]
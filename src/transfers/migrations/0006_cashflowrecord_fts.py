@@ -0,0 +1,141 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:50
+
+import django.db.models.deletion
+import transfers.models
+from django.db import migrations, models
+
+FTS_TABLE = 'transfers_cashflowrecord_fts'
+
+# Триггеры висят на таблицах записей и справочников. Операции, при которых SQLite
+# пересоздает таблицу (AddField, AlterField, RemoveField и т.п.), удаляют их без
+# ошибки, поэтому столбцы этих таблиц меняются через SeparateDatabaseAndState и
+# ALTER TABLE (см. 0008 и 0010); пропавшие триггеры находит проверка transfers.E001
+
+RECORD_DOCUMENT = '''
+    SELECT {id}, {comment},
+        (SELECT name FROM transfers_status WHERE id = {status_id}),
+        (SELECT name FROM transfers_transactiontype WHERE id = {transaction_type_id}),
+        (SELECT name FROM transfers_category WHERE id = {category_id}),
+        (SELECT name FROM transfers_subcategory WHERE id = {subcategory_id})
+'''
+
+FTS_COLUMNS = 'rowid, comment, status_name, transaction_type_name, category_name, subcategory_name'
+
+
+def record_document(prefix):
+    return RECORD_DOCUMENT.format(
+        **{
+            column: f'{prefix}.{column}'
+            for column in (
+                'id', 'comment', 'status_id', 'transaction_type_id', 'category_id', 'subcategory_id',
+            )
+        },
+    )
+
+
+FORWARD_SQL = [
+    f'''
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        comment, status_name, transaction_type_name, category_name, subcategory_name,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    ''',
+    f'''
+    INSERT INTO {FTS_TABLE} ({FTS_COLUMNS})
+    {record_document('r')} FROM transfers_cashflowrecord r
+    ''',
+    f'''
+    CREATE TRIGGER transfers_cashflowrecord_fts_insert
+    AFTER INSERT ON transfers_cashflowrecord BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_COLUMNS}) {record_document('NEW')};
+    END
+    ''',
+    f'''
+    CREATE TRIGGER transfers_cashflowrecord_fts_update
+    AFTER UPDATE OF comment, status_id, transaction_type_id, category_id, subcategory_id
+    ON transfers_cashflowrecord
+    WHEN OLD.comment IS NOT NEW.comment
+        OR OLD.status_id IS NOT NEW.status_id
+        OR OLD.transaction_type_id IS NOT NEW.transaction_type_id
+        OR OLD.category_id IS NOT NEW.category_id
+        OR OLD.subcategory_id IS NOT NEW.subcategory_id
+    BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id;
+        INSERT INTO {FTS_TABLE} ({FTS_COLUMNS}) {record_document('NEW')};
+    END
+    ''',
+    f'''
+    CREATE TRIGGER transfers_cashflowrecord_fts_delete
+    AFTER DELETE ON transfers_cashflowrecord BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id;
+    END
+    ''',
+    *(
+        f'''
+        CREATE TRIGGER transfers_{reference}_fts_rename
+        AFTER UPDATE OF name ON transfers_{reference}
+        WHEN OLD.name IS NOT NEW.name BEGIN
+            UPDATE {FTS_TABLE} SET {field}_name = NEW.name
+            WHERE rowid IN (SELECT id FROM transfers_cashflowrecord WHERE {field}_id = NEW.id);
+        END
+        '''
+        for reference, field in (
+            ('status', 'status'),
+            ('transactiontype', 'transaction_type'),
+            ('category', 'category'),
+            ('subcategory', 'subcategory'),
+        )
+    ),
+]
+
+REVERSE_SQL = [
+    *(
+        f'DROP TRIGGER IF EXISTS transfers_{reference}_fts_rename'
+        for reference in ('status', 'transactiontype', 'category', 'subcategory')
+    ),
+    'DROP TRIGGER IF EXISTS transfers_cashflowrecord_fts_delete',
+    'DROP TRIGGER IF EXISTS transfers_cashflowrecord_fts_update',
+    'DROP TRIGGER IF EXISTS transfers_cashflowrecord_fts_insert',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        # FTS5 и триггеры есть только в SQLite, на других СУБД поиск работает через LIKE
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0005_referencedataversion_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashFlowRecordSearch',
+            fields=[
+                ('record', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='transfers.cashflowrecord')),
+                ('document', transfers.models.SearchDocumentField(db_column='transfers_cashflowrecord_fts')),
+                ('rank', models.FloatField(db_column='rank')),
+                ('comment', models.TextField()),
+                ('status_name', models.TextField()),
+                ('transaction_type_name', models.TextField()),
+                ('category_name', models.TextField()),
+                ('subcategory_name', models.TextField()),
+            ],
+            options={
+                'verbose_name': 'Поисковый индекс записи ДДС',
+                'verbose_name_plural': 'Поисковый индекс записей ДДС',
+                'db_table': 'transfers_cashflowrecord_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(run_sqlite(FORWARD_SQL), run_sqlite(REVERSE_SQL)),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+RECORD_COLUMNS = (
+    'id, status_id, transaction_type_id, category_id, subcategory_id, '
+    'amount, comment, created_at, updated_at, is_active'
+)
+
+FORWARD_SQL = f'''
+    CREATE VIEW transfers_cashflowrecord_all AS
+    SELECT {RECORD_COLUMNS}, 0 AS archived FROM transfers_cashflowrecord
+    UNION ALL
+    SELECT {RECORD_COLUMNS}, 1 AS archived FROM transfers_cashflowrecordarchive
+'''
+
+REVERSE_SQL = 'DROP VIEW IF EXISTS transfers_cashflowrecord_all'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0006_cashflowrecord_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashFlowRecordWithArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Сумма (руб.)')),
+                ('comment', models.TextField(verbose_name='Комментарий')),
+                ('created_at', models.DateTimeField(verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(verbose_name='Обновлено')),
+                ('is_active', models.BooleanField(verbose_name='Активна')),
+                ('archived', models.BooleanField(verbose_name='В архиве')),
+            ],
+            options={
+                'verbose_name': 'Запись ДДС с архивом',
+                'verbose_name_plural': 'Записи ДДС с архивом',
+                'db_table': 'transfers_cashflowrecord_all',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CashFlowRecordArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Сумма (руб.)')),
+                ('comment', models.TextField(blank=True, default='', verbose_name='Комментарий')),
+                ('created_at', models.DateTimeField(verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(verbose_name='Обновлено')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активна')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Перенесена в архив')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='transfers.category', verbose_name='Категория')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='transfers.status', verbose_name='Статус')),
+                ('subcategory', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='transfers.subcategory', verbose_name='Подкатегория')),
+                ('transaction_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='transfers.transactiontype', verbose_name='Тип операции')),
+            ],
+            options={
+                'verbose_name': 'Архивная запись ДДС',
+                'verbose_name_plural': 'Архивные записи ДДС',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at', 'id'], name='cfr_archive_created_idx')],
+            },
+        ),
+        migrations.RunSQL(FORWARD_SQL, REVERSE_SQL),
+    ]
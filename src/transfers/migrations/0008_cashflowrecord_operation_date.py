@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:05
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+RECORD_COLUMNS = (
+    'id, status_id, transaction_type_id, category_id, subcategory_id, '
+    'amount, comment, created_at, updated_at, is_active'
+)
+
+TABLES = ('transfers_cashflowrecord', 'transfers_cashflowrecordarchive')
+
+
+def view_sql(columns):
+    return f'''
+    CREATE VIEW transfers_cashflowrecord_all AS
+    SELECT {columns}, 0 AS archived FROM transfers_cashflowrecord
+    UNION ALL
+    SELECT {columns}, 1 AS archived FROM transfers_cashflowrecordarchive
+    '''
+
+
+DROP_VIEW = 'DROP VIEW IF EXISTS transfers_cashflowrecord_all'
+
+# Столбец добавляется без пересоздания таблицы: при пересоздании SQLite удалил бы
+# триггеры полнотекстового индекса. Значение по умолчанию нужно только для ADD COLUMN
+# NOT NULL, существующие строки заполняются датой создания ниже
+ADD_COLUMNS = [
+    f"ALTER TABLE {table} ADD COLUMN operation_date date NOT NULL DEFAULT '1970-01-01'"
+    for table in TABLES
+]
+DROP_COLUMNS = [f'ALTER TABLE {table} DROP COLUMN operation_date' for table in TABLES]
+
+
+def backfill_operation_date(apps, schema_editor):
+    for name in ('CashFlowRecord', 'CashFlowRecordArchive'):
+        model = apps.get_model('transfers', name)
+        model.objects.update(operation_date=TruncDate('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0007_cashflowrecordarchive'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DROP_VIEW, view_sql(RECORD_COLUMNS)),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(add_column, drop_column)
+                for add_column, drop_column in zip(ADD_COLUMNS, DROP_COLUMNS)
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='cashflowrecord',
+                    name='operation_date',
+                    field=models.DateField(default=django.utils.timezone.localdate, verbose_name='Дата операции'),
+                ),
+                migrations.AddField(
+                    model_name='cashflowrecordarchive',
+                    name='operation_date',
+                    field=models.DateField(default=django.utils.timezone.localdate, verbose_name='Дата операции'),
+                    preserve_default=False,
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_operation_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['operation_date', 'id'], name='cfr_active_operation_idx'),
+        ),
+        migrations.RunSQL(view_sql(f'{RECORD_COLUMNS}, operation_date'), DROP_VIEW),
+    ]
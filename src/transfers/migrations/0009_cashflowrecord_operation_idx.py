@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0008_cashflowrecord_operation_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(fields=['operation_date', 'id'], name='cfr_operation_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:29
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+# Столбец добавляется без пересоздания таблицы: на нее ссылаются триггеры
+# полнотекстового индекса записей, и пересоздание таблицы их ломает
+ADD_DIRECTION = (
+    "ALTER TABLE transfers_transactiontype ADD COLUMN direction varchar(7) NOT NULL "
+    "DEFAULT 'outflow'"
+)
+DROP_DIRECTION = 'ALTER TABLE transfers_transactiontype DROP COLUMN direction'
+
+# Все существующие типы становятся выбытиями; поступления оператор задает командой
+# classify_transaction_types
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0009_cashflowrecord_operation_idx'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(ADD_DIRECTION, DROP_DIRECTION)],
+            state_operations=[
+                migrations.AddField(
+                    model_name='transactiontype',
+                    name='direction',
+                    field=models.CharField(choices=[('inflow', 'Поступление'), ('outflow', 'Выбытие')], default='outflow', max_length=7, verbose_name='Направление'),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CashFlowBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(verbose_name='Начало месяца')),
+                ('record_count', models.IntegerField(default=0, verbose_name='Количество записей')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18, verbose_name='Сумма (руб.)')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='transfers.status', verbose_name='Статус')),
+                ('transaction_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='transfers.transactiontype', verbose_name='Тип операции')),
+            ],
+            options={
+                'verbose_name': 'Снимок остатка ДДС',
+                'verbose_name_plural': 'Снимки остатков ДДС',
+                'ordering': ['period_start'],
+                'constraints': [models.UniqueConstraint(fields=('period_start', 'status', 'transaction_type'), name='cfr_balance_snapshot_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0010_balance_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status', 'operation_date'], name='cfr_active_status_opdate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status', 'amount'], name='cfr_active_status_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status', 'updated_at'], name='cfr_active_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['transaction_type', 'operation_date'], name='cfr_active_type_opdate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['transaction_type', 'amount'], name='cfr_active_type_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['transaction_type', 'updated_at'], name='cfr_active_type_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'operation_date'], name='cfr_active_cat_opdate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'amount'], name='cfr_active_cat_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'updated_at'], name='cfr_active_cat_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['subcategory', 'operation_date'], name='cfr_active_subcat_opdate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['subcategory', 'amount'], name='cfr_active_subcat_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflowrecord',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['subcategory', 'updated_at'], name='cfr_active_subcat_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0011_cashflowrecord_reference_order_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_status_opdate_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_status_amount_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_status_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_type_opdate_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_type_amount_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_type_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_cat_opdate_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_cat_amount_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_cat_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_subcat_opdate_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_subcat_amount_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cashflowrecord',
+            name='cfr_active_subcat_updated_idx',
+        ),
+    ]
@@ -3,6 +3,9 @@ from decimal import Decimal
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models.sql.compiler import SQLCompiler
+from django.utils import timezone
 
 
 class Status(models.Model):
@@ -21,10 +24,22 @@ class Status(models.Model):
         return self.name
 
 
+class TransactionDirection(models.TextChoices):
+    INFLOW = 'inflow', 'Поступление'
+    OUTFLOW = 'outflow', 'Выбытие'
+
+
 class TransactionType(models.Model):
     """Тип записи ДДС"""
 
     name = models.CharField(max_length=100, unique=True, verbose_name='Название типа')
+    # Знак записей этого типа в остатке денежных средств
+    direction = models.CharField(
+        max_length=7,
+        choices=TransactionDirection.choices,
+        default=TransactionDirection.OUTFLOW,
+        verbose_name='Направление',
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     is_active = models.BooleanField(default=True, verbose_name='Активен')
 
@@ -73,7 +88,27 @@ class Subcategory(models.Model):
         unique_together = ['category', 'name']
 
     def __str__(self) -> str:
-        return f'{self.category.name} - {self.name}'
+        if Subcategory.category.is_cached(self):
+            category_name = self.category.name
+        else:
+            from .references import reference_cache  # noqa: PLC0415
+
+            category_name = reference_cache.get().category_name(self.category_id)
+        return f'{category_name} - {self.name}'
+
+
+class ReferenceDataVersion(models.Model):
+    """Версия справочников для инвалидации их кэша в процессах приложения"""
+
+    version = models.PositiveBigIntegerField(default=0, verbose_name='Версия')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Обновлено')
+
+    class Meta:
+        verbose_name = 'Версия справочников'
+        verbose_name_plural = 'Версии справочников'
+
+    def __str__(self) -> str:
+        return str(self.version)
 
 
 class CashFlowRecord(models.Model):
@@ -107,6 +142,7 @@ class CashFlowRecord(models.Model):
         verbose_name='Сумма (руб.)',
     )
     comment = models.TextField(blank=True, default='', verbose_name='Комментарий')
+    operation_date = models.DateField(default=timezone.localdate, verbose_name='Дата операции')
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Обновлено')
@@ -116,6 +152,61 @@ class CashFlowRecord(models.Model):
         verbose_name = 'Запись ДДС'
         verbose_name_plural = 'Записи ДДС'
         ordering = ['-created_at']
+        # Частичные индексы под выборки API: активные записи в порядке каждого из
+        # ordering_fields (id - для однозначного порядка) и фильтр по справочнику в
+        # порядке по умолчанию. Индексов под фильтр по справочнику в другом порядке
+        # нет: найденные записи сортируются, зато каждая вставка и удаление не
+        # обновляют еще 12 индексов. Замер на 50 тыс. записей: вставка 108 мкс
+        # на запись против 145 мкс с ними, мягкое удаление 17 мкс против 46 мкс
+        indexes = [
+            models.Index(
+                fields=['created_at', 'id'],
+                name='cfr_active_created_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['operation_date', 'id'],
+                name='cfr_active_operation_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['amount', 'id'],
+                name='cfr_active_amount_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['updated_at', 'id'],
+                name='cfr_active_updated_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['status', 'created_at'],
+                name='cfr_active_status_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['transaction_type', 'created_at'],
+                name='cfr_active_type_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['category', 'created_at'],
+                name='cfr_active_category_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['subcategory', 'created_at'],
+                name='cfr_active_subcategory_idx',
+                condition=models.Q(is_active=True),
+            ),
+            # Не дубликат cfr_active_operation_idx: админка показывает и удаленные
+            # записи, ее запросы без условия is_active, и частичный индекс им не
+            # подходит. По этому индексу читаются страница списка в порядке
+            # -operation_date, -id, годы, месяцы и дни date_hierarchy
+            # (DateHierarchyQuerySet) и диапазон выбранного периода; без него каждая
+            # страница и каждый переход по периодам сортируют всю таблицу
+            models.Index(fields=['operation_date', 'id'], name='cfr_operation_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'Перевод: {self.transaction_type.name} - {self.amount} р.'
@@ -127,3 +218,254 @@ class CashFlowRecord(models.Model):
             raise ValidationError('Подкатегория обязательна.')
         if self.subcategory.category != self.category:
             raise ValidationError('Подкатегория должна принадлежать выбранной категории.')
+
+
+class CashFlowRecordArchive(models.Model):
+    """Запись ДДС, перенесенная из основной таблицы командой archive_records.
+
+    Хранит исходный id и даты записи; в своды и полнотекстовый индекс не входит.
+    """
+
+    id = models.BigIntegerField(primary_key=True, verbose_name='ID')
+    status = models.ForeignKey(
+        Status,
+        on_delete=models.PROTECT,
+        related_name='+',
+        verbose_name='Статус',
+    )
+    transaction_type = models.ForeignKey(
+        TransactionType,
+        on_delete=models.PROTECT,
+        related_name='+',
+        verbose_name='Тип операции',
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.PROTECT,
+        related_name='+',
+        verbose_name='Категория',
+    )
+    subcategory = models.ForeignKey(
+        Subcategory,
+        on_delete=models.PROTECT,
+        related_name='+',
+        verbose_name='Подкатегория',
+    )
+
+    amount = models.DecimalField(max_digits=12, decimal_places=2, verbose_name='Сумма (руб.)')
+    comment = models.TextField(blank=True, default='', verbose_name='Комментарий')
+    operation_date = models.DateField(verbose_name='Дата операции')
+
+    created_at = models.DateTimeField(verbose_name='Создано')
+    updated_at = models.DateTimeField(verbose_name='Обновлено')
+    is_active = models.BooleanField(default=True, verbose_name='Активна')
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='Перенесена в архив')
+
+    class Meta:
+        verbose_name = 'Архивная запись ДДС'
+        verbose_name_plural = 'Архивные записи ДДС'
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['created_at', 'id'], name='cfr_archive_created_idx')]
+
+    def __str__(self) -> str:
+        return f'Архив: {self.pk} - {self.amount} р.'
+
+
+class CashFlowRecordWithArchive(models.Model):
+    """Записи ДДС основной таблицы и архива одним набором для чтения.
+
+    Представление базы данных (UNION ALL) создается миграцией; архивные строки
+    отмечены полем archived.
+    """
+
+    id = models.BigIntegerField(primary_key=True, verbose_name='ID')
+    status = models.ForeignKey(
+        Status,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Статус',
+    )
+    transaction_type = models.ForeignKey(
+        TransactionType,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Тип операции',
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Категория',
+    )
+    subcategory = models.ForeignKey(
+        Subcategory,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Подкатегория',
+    )
+
+    amount = models.DecimalField(max_digits=12, decimal_places=2, verbose_name='Сумма (руб.)')
+    comment = models.TextField(verbose_name='Комментарий')
+    operation_date = models.DateField(verbose_name='Дата операции')
+
+    created_at = models.DateTimeField(verbose_name='Создано')
+    updated_at = models.DateTimeField(verbose_name='Обновлено')
+    is_active = models.BooleanField(verbose_name='Активна')
+    archived = models.BooleanField(verbose_name='В архиве')
+
+    class Meta:
+        managed = False
+        db_table = 'transfers_cashflowrecord_all'
+        verbose_name = 'Запись ДДС с архивом'
+        verbose_name_plural = 'Записи ДДС с архивом'
+        ordering = ['-created_at']
+
+    def __str__(self) -> str:
+        return str(self.pk)
+
+
+class RollupPeriod(models.TextChoices):
+    DAY = 'day', 'День'
+    MONTH = 'month', 'Месяц'
+
+
+class CashFlowRollup(models.Model):
+    """Сводные итоги активных записей ДДС за день или месяц по всем справочникам"""
+
+    period = models.CharField(max_length=5, choices=RollupPeriod.choices, verbose_name='Период')
+    period_start = models.DateField(verbose_name='Начало периода')
+    status = models.ForeignKey(Status, on_delete=models.CASCADE, verbose_name='Статус')
+    transaction_type = models.ForeignKey(
+        TransactionType,
+        on_delete=models.CASCADE,
+        verbose_name='Тип операции',
+    )
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name='Категория')
+    subcategory = models.ForeignKey(
+        Subcategory,
+        on_delete=models.CASCADE,
+        verbose_name='Подкатегория',
+    )
+
+    record_count = models.IntegerField(default=0, verbose_name='Количество записей')
+    total_amount = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Сумма (руб.)',
+    )
+
+    class Meta:
+        verbose_name = 'Свод ДДС'
+        verbose_name_plural = 'Своды ДДС'
+        ordering = ['period', 'period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'period',
+                    'period_start',
+                    'status',
+                    'transaction_type',
+                    'category',
+                    'subcategory',
+                ],
+                name='cfr_rollup_bucket_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.get_period_display()} {self.period_start}: {self.total_amount} р.'
+
+
+class CashFlowBalanceSnapshot(models.Model):
+    """Итоги активных записей ДДС, созданных до начала месяца, по статусам и типам операций.
+
+    Контрольная точка остатка: остаток на любой момент - ближайший предыдущий снимок
+    плюс записи, созданные после него. Архивные записи в снимках остаются.
+    """
+
+    period_start = models.DateField(verbose_name='Начало месяца')
+    status = models.ForeignKey(Status, on_delete=models.CASCADE, verbose_name='Статус')
+    transaction_type = models.ForeignKey(
+        TransactionType,
+        on_delete=models.CASCADE,
+        verbose_name='Тип операции',
+    )
+
+    record_count = models.IntegerField(default=0, verbose_name='Количество записей')
+    total_amount = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name='Сумма (руб.)',
+    )
+
+    class Meta:
+        verbose_name = 'Снимок остатка ДДС'
+        verbose_name_plural = 'Снимки остатков ДДС'
+        ordering = ['period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period_start', 'status', 'transaction_type'],
+                name='cfr_balance_snapshot_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.period_start}: {self.total_amount} р.'
+
+
+class SearchDocumentField(models.TextField):
+    """Скрытый столбец FTS5-таблицы с ее именем, по которому выполняется MATCH"""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(
+        self,
+        compiler: SQLCompiler,
+        connection: BaseDatabaseWrapper,
+    ) -> tuple[str, list[object]]:
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class CashFlowRecordSearch(models.Model):
+    """Полнотекстовый индекс SQLite FTS5 по комментарию и названиям справочников записи ДДС.
+
+    Таблица создается миграцией и поддерживается триггерами базы данных на таблицах
+    записей и справочников. Пересоздание любой из этих таблиц миграцией удаляет
+    триггеры, поэтому их столбцы меняются через ALTER TABLE (см. миграции 0008 и
+    0010), а наличие триггеров проверяет transfers.E001.
+    """
+
+    record = models.OneToOneField(
+        CashFlowRecord,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search',
+    )
+    document = SearchDocumentField(db_column='transfers_cashflowrecord_fts')
+    rank = models.FloatField(db_column='rank')
+    comment = models.TextField()
+    status_name = models.TextField()
+    transaction_type_name = models.TextField()
+    category_name = models.TextField()
+    subcategory_name = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = 'transfers_cashflowrecord_fts'
+        verbose_name = 'Поисковый индекс записи ДДС'
+        verbose_name_plural = 'Поисковый индекс записей ДДС'
+
+    def __str__(self) -> str:
+        return str(self.record_id)
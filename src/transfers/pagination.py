@@ -0,0 +1,332 @@
+import base64
+import binascii
+import json
+from collections.abc import Mapping
+from typing import Any, NamedTuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Model, Q, QuerySet
+from django.utils.encoding import force_str
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
+
+
+class Cursor(NamedTuple):
+    ordering: str
+    value: str
+    pk: int
+    reverse: bool
+
+
+class KeysetPagination(BasePagination):
+    """Keyset pagination on (ordering field, id) without COUNT(*) and OFFSET.
+
+    The position is encoded in an opaque cursor and a page is read from it as a range,
+    so its cost does not depend on how deep the client has paged. That holds while an
+    index gives the order: (field, id), or (reference, field) with a reference filter.
+    Search results and records of a date range on another field are sorted before the
+    page is taken; check_query_plans verifies both the list and the keyset plans.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+    display_page_controls = False
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view: APIView | None = None,
+    ) -> list[Model]:
+        return self.set_page(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view: APIView | None = None,
+    ) -> list[Model]:
+        page = self.page_queryset(queryset, request, view)
+        return self.set_page([row async for row in page])
+
+    def page_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view: APIView | None = None,
+    ) -> QuerySet:
+        """Unevaluated query of one page and one extra row that tells if there are more"""
+        self.request = request
+        self.ordering = self.get_ordering(request, queryset, view)
+        field, descending = self.ordering.lstrip('-'), self.ordering.startswith('-')
+
+        selected = queryset.query.values_select
+        if selected:
+            # A .values() projection must still carry the columns of the cursor
+            missing = [name for name in ('id', field) if name != 'pk' and name not in selected]
+            if missing:
+                queryset = queryset.values(*selected, *dict.fromkeys(missing))
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None and cursor.ordering != self.ordering:
+            raise NotFound(self.invalid_cursor_message)
+
+        reverse = cursor is not None and cursor.reverse
+        backwards = descending != reverse
+        prefix = '-' if backwards else ''
+        queryset = queryset.order_by(*dict.fromkeys([f'{prefix}{field}', f'{prefix}pk']))
+
+        if cursor is not None:
+            op = 'lt' if backwards else 'gt'
+            if field == 'pk':
+                queryset = queryset.filter(**{f'pk__{op}': cursor.pk})
+            else:
+                value = self.parse_value(queryset, field, cursor.value)
+                # The first condition is a plain range on the leading index column,
+                # the second one only resolves ties on the field value by id
+                queryset = queryset.filter(
+                    Q(**{f'{field}__{op}e': value}),
+                    Q(**{f'{field}__{op}': value}) | Q(**{f'pk__{op}': cursor.pk}),
+                )
+
+        self.field = field
+        self.cursor = cursor
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results: list[Any]) -> list[Any]:
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if self.cursor is not None and self.cursor.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data: list[dict[str, Any]]) -> Response:
+        return Response(
+            {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'results': data,
+            },
+        )
+
+    def get_paginated_response_schema(self, schema: dict[str, Any]) -> dict[str, Any]:
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_ordering(self, request: Request, queryset: QuerySet, view: APIView | None) -> str:
+        """Single ordering term taken from the view's OrderingFilter"""
+        ordering = None
+        if view is not None:
+            ordering = OrderingFilter().get_ordering(request, queryset, view)
+        if not ordering:
+            ordering = queryset.query.order_by or queryset.model._meta.ordering  # noqa: SLF001
+        terms = [term for term in ordering if isinstance(term, str)]
+        return next((term for term in terms if term.lstrip('-') not in ('id', 'pk')), '-pk')
+
+    def parse_value(self, queryset: QuerySet, field: str, raw: str) -> Any:
+        try:
+            return queryset.model._meta.get_field(field).to_python(raw)  # noqa: SLF001
+        except (DjangoValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message) from None
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request: Request) -> Cursor | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            return self.load_cursor(encoded)
+        except (binascii.Error, KeyError, TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message) from None
+
+    def encode_cursor(self, instance: Model | Mapping[str, Any], *, reverse: bool) -> str:
+        pk = instance['id'] if isinstance(instance, Mapping) else instance.pk
+        if self.field == 'pk':
+            value = pk
+        elif isinstance(instance, Mapping):
+            value = instance[self.field]
+        else:
+            value = getattr(instance, self.field)
+        encoded = self.dump_cursor(Cursor(self.ordering, force_str(value), pk, reverse))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def dump_cursor(cursor: Cursor) -> str:
+        data = {'o': cursor.ordering, 'v': cursor.value, 'p': cursor.pk, 'r': cursor.reverse}
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode())
+        return encoded.decode()
+
+    @staticmethod
+    def load_cursor(encoded: str) -> Cursor:
+        data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        return Cursor(str(data['o']), str(data['v']), int(data['p']), bool(data['r']))
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination that can also be evaluated with the async ORM.
+
+    The total may be counted on a separate ``count_queryset`` of the same rows, e.g.
+    the filtered rows before a ``.values()`` projection that joins nested relations.
+    """
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view: APIView | None = None,
+        count_queryset: QuerySet | None = None,
+    ) -> list[Any] | None:
+        paginator = self.get_paginator(queryset, request)
+        if paginator is None:
+            return None
+        paginator.count = (queryset if count_queryset is None else count_queryset).count()
+        return list(self.open_page(paginator, request))
+
+    async def apaginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view: APIView | None = None,
+        count_queryset: QuerySet | None = None,
+    ) -> list[Any] | None:
+        paginator = self.get_paginator(queryset, request)
+        if paginator is None:
+            return None
+        paginator.count = await (queryset if count_queryset is None else count_queryset).acount()
+        return [row async for row in self.open_page(paginator, request)]
+
+    def get_paginator(self, queryset: QuerySet, request: Request) -> Paginator | None:
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        return self.django_paginator_class(queryset, page_size)
+
+    def open_page(self, paginator: Paginator, request: Request) -> QuerySet:
+        """Unevaluated rows of the requested page"""
+        # Paginator.count is a cached property set by the caller, so the page is
+        # validated without a query
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg) from exc
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return self.page.object_list
+
+
+class CashFlowRecordPagination(BasePagination):
+    """Page numbers by default, keyset pagination with ?pagination=cursor"""
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self) -> None:
+        self.page_number = AsyncPageNumberPagination()
+        self.keyset = KeysetPagination()
+        self.active: BasePagination = self.page_number
+
+    @property
+    def display_page_controls(self) -> bool:
+        return getattr(self.active, 'display_page_controls', False)
+
+    def is_keyset(self, request: Request) -> bool:
+        mode = request.query_params.get(self.mode_query_param)
+        return mode == self.cursor_mode or self.keyset.cursor_query_param in request.query_params
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view: APIView | None = None,
+        count_queryset: QuerySet | None = None,
+    ) -> list[Model] | None:
+        if self.is_keyset(request):
+            self.active = self.keyset
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.active = self.page_number
+        return self.page_number.paginate_queryset(queryset, request, view, count_queryset)
+
+    async def apaginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view: APIView | None = None,
+        count_queryset: QuerySet | None = None,
+    ) -> list[Model] | None:
+        if self.is_keyset(request):
+            self.active = self.keyset
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        self.active = self.page_number
+        return await self.page_number.apaginate_queryset(queryset, request, view, count_queryset)
+
+    def get_page_state(self) -> str:
+        """Everything the paginated response depends on besides the rows of the page"""
+        if self.active is self.keyset:
+            return f'{self.keyset.has_next}|{self.keyset.has_previous}'
+        return str(self.page_number.page.paginator.count)
+
+    def get_paginated_response(self, data: list[dict[str, Any]]) -> Response:
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema: dict[str, Any]) -> dict[str, Any]:
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view: APIView) -> list[dict[str, Any]]:
+        return [
+            *self.page_number.get_schema_operation_parameters(view),
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" to switch to keyset pagination.',
+                'schema': {'type': 'string', 'enum': [self.cursor_mode]},
+            },
+            {
+                'name': self.keyset.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Keyset pagination cursor.',
+                'schema': {'type': 'string'},
+            },
+        ]
+
+    def to_html(self) -> str:
+        return self.active.to_html()
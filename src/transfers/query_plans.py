@@ -0,0 +1,151 @@
+import re
+from collections.abc import Iterable, Iterator
+from itertools import combinations, product
+from typing import NamedTuple
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .models import CashFlowRecord, Category, Status, Subcategory, TransactionType
+from .pagination import Cursor, KeysetPagination
+from .views import CashFlowRecordViewSet
+
+EXTRA_PARAMS = {
+    'created_at_after': '2025-01-01',
+    'created_at_before': '2025-12-31',
+    'operation_date_after': '2025-01-01',
+    'operation_date_before': '2025-12-31',
+    'search': 'оплата',
+}
+REFERENCE_PARAMS = ('status', 'transaction_type', 'category', 'subcategory')
+
+TABLE = CashFlowRecord._meta.db_table  # noqa: SLF001
+FULL_SCAN = re.compile(rf'\bSCAN {re.escape(TABLE)}$')
+TEMP_SORT = 'USE TEMP B-TREE'
+RANGE_SUFFIXES = ('_after', '_before')
+LIST_URL = '/api/cash-flow-records/'
+DEFAULT_ORDERING = '-created_at'
+
+# Позиция курсора по каждому полю сортировки для планов keyset-пагинации
+CURSOR_VALUES = {
+    'created_at': '2025-06-01T00:00:00+00:00',
+    'updated_at': '2025-06-01T00:00:00+00:00',
+    'operation_date': '2025-06-01',
+    'amount': '1000.00',
+    'pk': '1',
+}
+
+ORDERINGS = [
+    '',
+    '-created_at',
+    'created_at',
+    'amount',
+    '-amount',
+    'operation_date',
+    '-operation_date',
+    'updated_at',
+    '-updated_at',
+]
+
+
+class PlanCheck(NamedTuple):
+    """План запроса списка записей ДДС и его строки, которые считаются ошибкой"""
+
+    label: str
+    plan: str
+    problems: list[str]
+
+    @property
+    def kind(self) -> str:
+        if any(FULL_SCAN.search(line) for line in self.problems):
+            return 'SCAN'
+        return 'SORT' if self.problems else 'OK'
+
+
+def filter_params() -> dict[str, str]:
+    """Значения фильтров, которые пройдут валидацию CashFlowRecordFilter.
+
+    Фильтры по справочникам проверяют существование id, поэтому в пустой базе
+    создаются временные справочники: вызывающий откатывает их вместе с транзакцией.
+    """
+    status = Status.objects.first() or Status.objects.create(name='explain')
+    transaction_type = TransactionType.objects.first() or TransactionType.objects.create(
+        name='explain',
+    )
+    subcategory = Subcategory.objects.first() or Subcategory.objects.create(
+        category=Category.objects.first() or Category.objects.create(name='explain'),
+        name='explain',
+    )
+    return {
+        'status': str(status.pk),
+        'transaction_type': str(transaction_type.pk),
+        'category': str(subcategory.category_id),
+        'subcategory': str(subcategory.pk),
+        **EXTRA_PARAMS,
+    }
+
+
+def param_combinations(
+    values: dict[str, str],
+    orderings: Iterable[str] = ORDERINGS,
+) -> list[dict[str, str]]:
+    """Все подмножества фильтров CashFlowRecordFilter, умноженные на сортировки"""
+    names = list(values)
+    subsets = [subset for size in range(len(names) + 1) for subset in combinations(names, size)]
+    result = []
+    for subset, ordering in product(subsets, orderings):
+        params = {name: values[name] for name in subset}
+        if ordering:
+            params['ordering'] = ordering
+        result.append(params)
+    return result
+
+
+def list_plans(factory: APIRequestFactory, params: dict[str, str]) -> Iterator[tuple[str, str]]:
+    """Планы страницы списка и страницы keyset-пагинации после курсора"""
+    label = '&'.join(f'{key}={value}' for key, value in params.items()) or '(default)'
+    request = Request(factory.get(LIST_URL, params))
+    view = CashFlowRecordViewSet(request=request, action='list', format_kwarg=None)
+    queryset = view.filter_queryset(view.get_queryset())
+    yield label, queryset.explain()
+
+    keyset = KeysetPagination()
+    ordering = keyset.get_ordering(request, queryset, view)
+    value = CURSOR_VALUES[ordering.lstrip('-')]
+    cursor = keyset.dump_cursor(Cursor(ordering, value, 1, reverse=False))
+    request = Request(factory.get(LIST_URL, {**params, keyset.cursor_query_param: cursor}))
+    view = CashFlowRecordViewSet(request=request, action='list', format_kwarg=None)
+    queryset = view.filter_queryset(view.get_queryset())
+    yield f'{label} (cursor)', keyset.page_queryset(queryset, request, view).explain()
+
+
+def may_sort(params: dict[str, str]) -> bool:
+    """Разрешена ли сортировка отфильтрованных записей вместо чтения индекса по порядку.
+
+    Без ограничений каждая сортировка читается по индексу (поле, id), фильтр по
+    справочнику в порядке по умолчанию - по индексу (справочник, created_at).
+    Сортировать можно найденные поиском записи (порядок по релевантности или по
+    полю), записи справочника в другом порядке (индексов под эти сочетания нет, чтобы
+    не замедлять запись) и записи периода по другому полю: индекс задает либо
+    диапазон по одному столбцу, либо порядок по другому, и сортируются только записи
+    периода.
+    """
+    if 'search' in params:
+        return True
+    field = params.get('ordering', DEFAULT_ORDERING).lstrip('-')
+    if field != DEFAULT_ORDERING.lstrip('-') and any(name in params for name in REFERENCE_PARAMS):
+        return True
+    return any(
+        name.endswith(RANGE_SUFFIXES) and not name.startswith(f'{field}_') for name in params
+    )
+
+
+def check_plans(combinations: Iterable[dict[str, str]]) -> Iterator[PlanCheck]:
+    """Планы для каждого набора параметров с полными сканированиями и лишними сортировками"""
+    factory = APIRequestFactory()
+    for params in combinations:
+        for label, plan in list_plans(factory, params):
+            problems = [line for line in plan.splitlines() if FULL_SCAN.search(line)]
+            if not may_sort(params):
+                problems += [line for line in plan.splitlines() if TEMP_SORT in line]
+            yield PlanCheck(label, plan, problems)
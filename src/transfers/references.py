@@ -0,0 +1,204 @@
+import datetime as dt
+import threading
+from contextvars import ContextVar
+from functools import cached_property
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.db import models, router
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Category, ReferenceDataVersion, Status, Subcategory, TransactionType
+
+REFERENCE_MODELS: tuple[type[models.Model], ...] = (Status, TransactionType, Category, Subcategory)
+
+VERSION_PK = 1
+
+# Снимки, уже сверенные с версией в текущем HTTP-запросе, по базе, из которой читалась
+# версия (задает ReferenceCheckMiddleware); None - вне запроса, тогда версия сверяется
+# при каждом обращении к кэшу
+checked_snapshots: ContextVar[dict[str, 'ReferenceSnapshot'] | None] = ContextVar(
+    'checked_snapshots',
+    default=None,
+)
+
+
+class ReferenceSnapshot:
+    """Снимок всех справочников одной версии; объекты только для чтения"""
+
+    def __init__(self, version: int, rows: dict[type[models.Model], dict[int, Any]]) -> None:
+        self.version = version
+        self.rows = rows
+
+    def get(self, model: type[models.Model], pk: Any) -> Any:
+        return self.rows[model].get(pk)
+
+    def is_active(self, model: type[models.Model], pk: Any) -> bool:
+        obj = self.get(model, pk)
+        return obj is not None and obj.is_active
+
+    def category_name(self, pk: int) -> str:
+        category = self.get(Category, pk)
+        return category.name if category is not None else ''
+
+    def all(self, model: type[models.Model]) -> list[Any]:
+        return list(self.rows[model].values())
+
+    @cached_property
+    def bootstrap(self) -> dict[str, Any]:
+        """Активные справочники одним ответом, подкатегории вложены в категории"""
+
+        def active(model: type[models.Model]) -> list[Any]:
+            return [obj for obj in self.rows[model].values() if obj.is_active]
+
+        subcategories: dict[int, list[dict[str, Any]]] = {}
+        for subcategory in active(Subcategory):
+            subcategories.setdefault(subcategory.category_id, []).append(
+                {'id': subcategory.pk, 'name': subcategory.name},
+            )
+        return {
+            'version': self.version,
+            'statuses': [{'id': obj.pk, 'name': obj.name} for obj in active(Status)],
+            'transaction_types': [
+                {'id': obj.pk, 'name': obj.name} for obj in active(TransactionType)
+            ],
+            'categories': [
+                {
+                    'id': obj.pk,
+                    'name': obj.name,
+                    'subcategories': subcategories.get(obj.pk, []),
+                }
+                for obj in active(Category)
+            ],
+        }
+
+
+class ReferenceCache:
+    """Кэш справочников в памяти процесса.
+
+    Снимок сверяется с версией в ReferenceDataVersion один раз за HTTP-запрос (и при
+    каждом обращении вне запроса), поэтому изменения, сделанные другими процессами,
+    видны со следующего запроса после их коммита. Версия и снимок читаются из той же
+    базы, что и остальные данные запроса: из его реплики или из основной.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: ReferenceSnapshot | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ReferenceSnapshot:
+        alias = router.db_for_read(ReferenceDataVersion)
+        snapshot = self._checked(alias)
+        if snapshot is not None:
+            return snapshot
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != current_version(alias):
+            with self._lock:
+                # Другой поток мог уже заменить устаревший снимок
+                if self._snapshot is snapshot:
+                    self._snapshot = load_snapshot(alias)
+                snapshot = self._snapshot
+        return self._remember(alias, snapshot)
+
+    async def aget(self) -> ReferenceSnapshot:
+        alias = router.db_for_read(ReferenceDataVersion)
+        snapshot = self._checked(alias)
+        if snapshot is not None:
+            return snapshot
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == await acurrent_version(alias):
+            return self._remember(alias, snapshot)
+        return await sync_to_async(self.get)()
+
+    def _checked(self, alias: str) -> ReferenceSnapshot | None:
+        """Снимок, уже сверенный с версией в этом запросе, если он еще в кэше"""
+        checked = checked_snapshots.get()
+        snapshot = self._snapshot
+        if checked is not None and snapshot is not None and checked.get(alias) is snapshot:
+            return snapshot
+        return None
+
+    @staticmethod
+    def _remember(alias: str, snapshot: ReferenceSnapshot) -> ReferenceSnapshot:
+        checked = checked_snapshots.get()
+        if checked is not None:
+            checked[alias] = snapshot
+        return snapshot
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+
+def version_etag(version: int) -> str:
+    return f'"references-{version}"'
+
+
+def current_version(using: str | None = None) -> int:
+    version = (
+        ReferenceDataVersion.objects.using(using)
+        .filter(pk=VERSION_PK)
+        .values_list('version', flat=True)
+    )
+    return version.first() or 0
+
+
+async def acurrent_version(using: str | None = None) -> int:
+    version = (
+        ReferenceDataVersion.objects.using(using)
+        .filter(pk=VERSION_PK)
+        .values_list('version', flat=True)
+    )
+    return await version.afirst() or 0
+
+
+def current_version_state() -> tuple[int, dt.datetime | None]:
+    """Версия справочников и время ее последнего изменения"""
+    state = ReferenceDataVersion.objects.filter(pk=VERSION_PK).values_list('version', 'updated_at')
+    return state.first() or (0, None)
+
+
+async def acurrent_version_state() -> tuple[int, dt.datetime | None]:
+    state = ReferenceDataVersion.objects.filter(pk=VERSION_PK).values_list('version', 'updated_at')
+    return await state.afirst() or (0, None)
+
+
+def bump_version() -> None:
+    """Помечает кэши справочников во всех процессах устаревшими"""
+    updated = ReferenceDataVersion.objects.filter(pk=VERSION_PK).update(
+        version=F('version') + 1,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        ReferenceDataVersion.objects.get_or_create(pk=VERSION_PK, defaults={'version': 1})
+    # Запрос, изменивший справочники, дальше сверяет версию заново
+    checked = checked_snapshots.get()
+    if checked is not None:
+        checked.clear()
+
+
+def load_snapshot(using: str | None = None) -> ReferenceSnapshot:
+    """Снимок справочников из одной базы, без транзакции на запись.
+
+    Версия читается раньше строк: изменение, закоммиченное между чтениями, дает
+    снимок со старой версией и новыми строками, и следующая сверка перечитает его.
+    """
+    version = current_version(using)
+    rows = {
+        model: {obj.pk: obj for obj in model.objects.using(using)} for model in REFERENCE_MODELS
+    }
+    categories = rows[Category]
+    for subcategory in rows[Subcategory].values():
+        subcategory.category = categories[subcategory.category_id]
+    return ReferenceSnapshot(version, rows)
+
+
+def get_snapshot(context: dict[str, Any]) -> ReferenceSnapshot:
+    """Снимок справочников, общий для всех полей одного сериализатора"""
+    snapshot = context.get('reference_snapshot')
+    if snapshot is None:
+        snapshot = context['reference_snapshot'] = reference_cache.get()
+    return snapshot
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,58 @@
+from collections.abc import Mapping
+from typing import Any
+
+from rest_framework.renderers import JSONRenderer
+
+from .instrumentation import measure_render
+
+try:
+    import orjson
+except ImportError:  # optional, see the fast-json extra
+    orjson = None
+
+# Types orjson would format differently are passed to the DRF encoder
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+    if orjson is not None
+    else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson when it is installed.
+
+    The output is byte-identical to the stock renderer: datetimes, decimals and other
+    non-JSON types go through the same DRF encoder. Indented output and data orjson
+    cannot encode (such as integers over 64 bits) fall back to the stock renderer.
+    The time spent rendering is added to the request profile.
+    """
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: str | None = None,
+        renderer_context: Mapping[str, Any] | None = None,
+    ) -> bytes:
+        with measure_render():
+            return self.encode(data, accepted_media_type, renderer_context)
+
+    def encode(
+        self,
+        data: Any,
+        accepted_media_type: str | None,
+        renderer_context: Mapping[str, Any] | None,
+    ) -> bytes:
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as JSONRenderer keeps the output a strict JavaScript subset
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,322 @@
+import datetime as dt
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from decimal import Decimal
+from operator import itemgetter
+from typing import Any, NamedTuple
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, DateField, F, QuerySet, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .balances import CENT, shift_balance_snapshots
+from .models import CashFlowRecord, CashFlowRecordArchive, CashFlowRollup, RollupPeriod
+
+DIMENSIONS = ('status', 'transaction_type', 'category', 'subcategory')
+BUCKET_FIELDS = ('period', 'period_start', *(f'{name}_id' for name in DIMENSIONS))
+RECORD_FIELDS = ('created_at', 'amount', 'is_active', *(f'{name}_id' for name in DIMENSIONS))
+
+# Изменения сводов прибавляются к существующим строкам, недостающие строки создаются
+UPSERT_SQL = """
+INSERT INTO transfers_cashflowrollup (
+    period, period_start, status_id, transaction_type_id, category_id, subcategory_id,
+    record_count, total_amount
+)
+VALUES {values}
+ON CONFLICT (
+    period, period_start, status_id, transaction_type_id, category_id, subcategory_id
+) DO UPDATE SET
+    record_count = record_count + excluded.record_count,
+    total_amount = total_amount + excluded.total_amount
+"""
+UPSERT_VALUES = '(%s, %s, %s, %s, %s, %s, %s, CAST(%s AS NUMERIC))'
+
+# Строки сводов, в которых после изменений не осталось записей
+PRUNE_SQL = """
+DELETE FROM transfers_cashflowrollup
+WHERE record_count = 0
+    AND (period, period_start, status_id, transaction_type_id, category_id, subcategory_id)
+        IN (VALUES {values})
+"""
+PRUNE_VALUES = '(%s, %s, %s, %s, %s, %s)'
+
+
+class Contribution(NamedTuple):
+    """Вклад одной записи ДДС в сводные итоги"""
+
+    day: dt.date
+    status_id: int
+    transaction_type_id: int
+    category_id: int
+    subcategory_id: int
+    amount: Decimal
+
+
+class RollupDeltas:
+    """Накопитель изменений сводов, применяемый одним проходом.
+
+    Вместе со сводами изменения попадают в снимки остатков; balances=False - только в
+    своды, как при переносе записей в архив, который остатка не меняет.
+    """
+
+    def __init__(self, *, balances: bool = True) -> None:
+        self.buckets: dict[tuple[Any, ...], list[Any]] = defaultdict(lambda: [0, Decimal(0)])
+        self.balances = balances
+
+    def add(self, contribution: Contribution | None, sign: int = 1, count: int = 1) -> None:
+        """Добавляет вклад записи; при count > 1 - вклад count записей с общей суммой amount"""
+        if contribution is None:
+            return
+        dimensions = contribution[1:5]
+        day = contribution.day
+        for period, start in ((RollupPeriod.DAY, day), (RollupPeriod.MONTH, day.replace(day=1))):
+            bucket = self.buckets[(period.value, start, *dimensions)]
+            bucket[0] += sign * count
+            bucket[1] += sign * contribution.amount
+
+    def apply(self) -> None:
+        """Атомарно прибавляет накопленные изменения к строкам сводов"""
+        with transaction.atomic():
+            for key, (count, amount) in self.buckets.items():
+                if not count and not amount:
+                    continue
+                lookup = dict(zip(BUCKET_FIELDS, key, strict=True))
+                if not _increment(lookup, count, amount):
+                    try:
+                        with transaction.atomic():
+                            CashFlowRollup.objects.create(
+                                **lookup,
+                                record_count=count,
+                                total_amount=amount,
+                            )
+                    except IntegrityError:
+                        # Строку успел создать параллельный запрос
+                        _increment(lookup, count, amount)
+                if count < 0:
+                    CashFlowRollup.objects.filter(**lookup, record_count=0).delete()
+            self.apply_balances()
+        self.buckets.clear()
+
+    def apply_in_bulk(self, batch_size: int = 500) -> None:
+        """Применяет накопленные изменения несколькими запросами на все строки сводов.
+
+        Для изменений по тысячам строк сводов, например после массового действия или
+        пачки загрузки: изменения прибавляются одним INSERT ... ON CONFLICT на пачку
+        строк, без чтения сводов, а опустевшие строки удаляются одним DELETE на пачку.
+        """
+        changes = [(*key, *delta) for key, delta in self.buckets.items() if any(delta)]
+        emptied = [key for key, delta in self.buckets.items() if delta[0] < 0]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(changes), batch_size):
+                batch = changes[start : start + batch_size]
+                params = [value for row in batch for value in row]
+                values = ', '.join([UPSERT_VALUES] * len(batch))
+                cursor.execute(UPSERT_SQL.format(values=values), params)
+            for start in range(0, len(emptied), batch_size):
+                batch = emptied[start : start + batch_size]
+                params = [value for key in batch for value in key]
+                values = ', '.join([PRUNE_VALUES] * len(batch))
+                cursor.execute(PRUNE_SQL.format(values=values), params)
+            self.apply_balances()
+        self.buckets.clear()
+
+    def apply_balances(self) -> None:
+        """Переносит изменения дневных сводов по статусу и типу операции в снимки остатков"""
+        if not self.balances:
+            return
+        changes: dict[tuple[Any, ...], list[Any]] = defaultdict(lambda: [0, Decimal(0)])
+        for (period, day, status_id, transaction_type_id, *_), delta in self.buckets.items():
+            if period == RollupPeriod.DAY:
+                change = changes[(day, status_id, transaction_type_id)]
+                change[0] += delta[0]
+                change[1] += delta[1]
+        shift_balance_snapshots(changes)
+
+
+def _increment(lookup: Mapping[str, Any], count: int, amount: Decimal) -> int:
+    return CashFlowRollup.objects.filter(**lookup).update(
+        record_count=F('record_count') + count,
+        total_amount=F('total_amount') + amount,
+    )
+
+
+def contribution_from_values(values: Mapping[str, Any]) -> Contribution | None:
+    """Вклад записи по словарю полей; неактивные записи в сводах не учитываются"""
+    if not values['is_active']:
+        return None
+    return Contribution(
+        timezone.localdate(values['created_at']),
+        values['status_id'],
+        values['transaction_type_id'],
+        values['category_id'],
+        values['subcategory_id'],
+        values['amount'],
+    )
+
+
+def contribution_from_record(record: CashFlowRecord) -> Contribution | None:
+    return contribution_from_values({field: getattr(record, field) for field in RECORD_FIELDS})
+
+
+def stored_contribution(pk: int) -> Contribution | None:
+    """Вклад записи в том виде, в котором она сейчас сохранена в базе"""
+    values = CashFlowRecord.objects.filter(pk=pk).values(*RECORD_FIELDS).first()
+    return contribution_from_values(values) if values else None
+
+
+def apply_contributions(
+    added: Iterable[Contribution | None] = (),
+    removed: Iterable[Contribution | None] = (),
+    *,
+    balances: bool = True,
+) -> None:
+    deltas = RollupDeltas(balances=balances)
+    for contribution in added:
+        deltas.add(contribution)
+    for contribution in removed:
+        deltas.add(contribution, -1)
+    deltas.apply()
+
+
+def compute_rollups(queryset: QuerySet | None = None) -> dict[tuple[Any, ...], tuple[int, Decimal]]:
+    """Своды, посчитанные заново по таблице записей ДДС"""
+    if queryset is None:
+        queryset = CashFlowRecord.objects.all()
+    queryset = queryset.filter(is_active=True).order_by()
+    dimensions = [f'{name}_id' for name in DIMENSIONS]
+    result = {}
+    for period, trunc in ((RollupPeriod.DAY, TruncDate), (RollupPeriod.MONTH, TruncMonth)):
+        rows = (
+            queryset.annotate(period_start=trunc('created_at'))
+            .values('period_start', *dimensions)
+            .annotate(record_count=Count('id'), total_amount=Sum('amount'))
+        )
+        for row in rows:
+            start = row['period_start']
+            if isinstance(start, dt.datetime):
+                start = timezone.localdate(start)
+            key = (period.value, start, *(row[name] for name in dimensions))
+            # SQLite складывает суммы как float, поэтому итог округляется до копеек
+            result[key] = (row['record_count'], row['total_amount'].quantize(CENT))
+    return result
+
+
+def stored_rollups() -> dict[tuple[Any, ...], tuple[int, Decimal]]:
+    rows = CashFlowRollup.objects.values_list(*BUCKET_FIELDS, 'record_count', 'total_amount')
+    return {tuple(row[:-2]): (row[-2], row[-1]) for row in rows}
+
+
+def rebuild_rollups(batch_size: int = 1000) -> int:
+    """Полностью пересобирает таблицу сводов и возвращает количество строк"""
+    expected = compute_rollups()
+    with transaction.atomic():
+        CashFlowRollup.objects.all().delete()
+        CashFlowRollup.objects.bulk_create(
+            (
+                CashFlowRollup(
+                    **dict(zip(BUCKET_FIELDS, key, strict=True)),
+                    record_count=count,
+                    total_amount=amount,
+                )
+                for key, (count, amount) in expected.items()
+            ),
+            batch_size=batch_size,
+        )
+    return len(expected)
+
+
+def summarize_rollups(
+    granularity: str,
+    filters: Mapping[str, Any],
+    group_by: Iterable[str] = DIMENSIONS,
+) -> QuerySet:
+    """Итоги по периодам из таблицы сводов с фильтрами CashFlowRecordFilter"""
+    after = filters.get('created_at_after')
+    before = filters.get('created_at_before')
+    month_aligned = (after is None or after.day == 1) and (
+        before is None or (before + dt.timedelta(days=1)).day == 1
+    )
+
+    if granularity == RollupPeriod.MONTH and month_aligned:
+        queryset = CashFlowRollup.objects.filter(period=RollupPeriod.MONTH)
+        bucket = F('period_start')
+        if before is not None:
+            before = before.replace(day=1)
+    else:
+        # Границы внутри месяца считаем по дневным сводам
+        queryset = CashFlowRollup.objects.filter(period=RollupPeriod.DAY)
+        bucket = (
+            F('period_start') if granularity == RollupPeriod.DAY else TruncMonth('period_start')
+        )
+
+    if after is not None:
+        queryset = queryset.filter(period_start__gte=after)
+    if before is not None:
+        queryset = queryset.filter(period_start__lte=before)
+    for name in DIMENSIONS:
+        if filters.get(name) is not None:
+            queryset = queryset.filter(**{name: filters[name]})
+
+    columns = [column for name in group_by for column in (f'{name}_id', f'{name}__name')]
+    return (
+        queryset.annotate(bucket=bucket)
+        .values('bucket', *columns)
+        .annotate(count=Sum('record_count'), total=Sum('total_amount'))
+        .filter(count__gt=0)
+        .order_by('bucket', *columns[::2])
+    )
+
+
+def summarize_archive(
+    granularity: str,
+    filters: Mapping[str, Any],
+    group_by: Iterable[str] = DIMENSIONS,
+) -> QuerySet:
+    """Итоги активных архивных записей с теми же фильтрами и столбцами, что у сводов.
+
+    Архив в своды не входит, поэтому итоги считаются по его таблице.
+    """
+    queryset = CashFlowRecordArchive.objects.filter(is_active=True)
+    if filters.get('created_at_after') is not None:
+        queryset = queryset.filter(created_at__date__gte=filters['created_at_after'])
+    if filters.get('created_at_before') is not None:
+        queryset = queryset.filter(created_at__date__lte=filters['created_at_before'])
+    for name in DIMENSIONS:
+        if filters.get(name) is not None:
+            queryset = queryset.filter(**{name: filters[name]})
+
+    if granularity == RollupPeriod.DAY:
+        bucket = TruncDate('created_at')
+    else:
+        bucket = TruncMonth('created_at', output_field=DateField())
+    columns = [column for name in group_by for column in (f'{name}_id', f'{name}__name')]
+    return (
+        queryset.annotate(bucket=bucket)
+        .values('bucket', *columns)
+        .annotate(count=Count('id'), total=Sum('amount'))
+        .order_by('bucket', *columns[::2])
+    )
+
+
+def summarize_with_archive(
+    granularity: str,
+    filters: Mapping[str, Any],
+    group_by: Iterable[str] = DIMENSIONS,
+) -> list[dict[str, Any]]:
+    """Итоги сводов, сложенные с итогами архива по совпадающим периодам и справочникам"""
+    group_by = list(group_by)
+    ids = [f'{name}_id' for name in group_by]
+    merged: dict[tuple[Any, ...], dict[str, Any]] = {}
+    for rows in (
+        summarize_rollups(granularity, filters, group_by),
+        summarize_archive(granularity, filters, group_by),
+    ):
+        for row in rows:
+            key = (row['bucket'], *(row[column] for column in ids))
+            if key in merged:
+                merged[key]['count'] += row['count']
+                merged[key]['total'] += row['total']
+            else:
+                merged[key] = row
+    return sorted(merged.values(), key=itemgetter('bucket', *ids))
@@ -0,0 +1,55 @@
+import random
+from contextvars import ContextVar
+from typing import Any
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Model
+
+# Реплика, из которой читает текущий запрос; None - читать из основной базы
+read_replica: ContextVar[str | None] = ContextVar('read_replica', default=None)
+
+
+def replica_aliases() -> list[str]:
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def choose_replica() -> str | None:
+    """Случайная реплика на весь запрос, чтобы все его запросы видели одно состояние"""
+    aliases = replica_aliases()
+    return random.choice(aliases) if aliases else None
+
+
+class PrimaryReplicaRouter:
+    """Чтение моделей transfers из реплики, выбранной для запроса, запись - в основную базу.
+
+    Реплику назначает ReplicaMiddleware только безопасным запросам без закрепления за
+    основной базой, поэтому запрос с записью и дочитывает свои данные из основной базы;
+    команды, запись и транзакции всегда работают с основной базой, чтобы своды не
+    пересчитывались по отстающей копии. Роутер только читает выбор запроса и не меняет его.
+    """
+
+    app_labels = frozenset({'transfers'})
+
+    def db_for_read(self, model: type[Model], **hints: Any) -> str | None:
+        alias = read_replica.get()
+        if alias is None or model._meta.app_label not in self.app_labels:  # noqa: SLF001
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model: type[Model], **hints: Any) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> bool | None:
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:  # noqa: SLF001
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> bool | None:
+        # Реплики - копии основной базы, схема приходит вместе с данными
+        if db != DEFAULT_DB_ALIAS:
+            return False
+        return None
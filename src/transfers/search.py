@@ -0,0 +1,94 @@
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from .models import CashFlowRecord, CashFlowRecordSearch
+
+FTS_TABLE = CashFlowRecordSearch._meta.db_table  # noqa: SLF001
+
+REBUILD_SQL = [
+    f'DELETE FROM {FTS_TABLE}',  # noqa: S608
+    f"""
+    INSERT INTO {FTS_TABLE}
+        (rowid, comment, status_name, transaction_type_name, category_name, subcategory_name)
+    SELECT r.id, r.comment, s.name, t.name, c.name, sc.name
+    FROM transfers_cashflowrecord r
+    JOIN transfers_status s ON s.id = r.status_id
+    JOIN transfers_transactiontype t ON t.id = r.transaction_type_id
+    JOIN transfers_category c ON c.id = r.category_id
+    JOIN transfers_subcategory sc ON sc.id = r.subcategory_id
+    """,  # noqa: S608
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')",  # noqa: S608
+]
+
+
+# Triggers of migration 0006 that keep the index in sync with records and references.
+# SQLite drops the triggers of a table it rebuilds, see checks.check_search_triggers
+FTS_TRIGGERS = (
+    'transfers_cashflowrecord_fts_insert',
+    'transfers_cashflowrecord_fts_update',
+    'transfers_cashflowrecord_fts_delete',
+    *(
+        f'transfers_{reference}_fts_rename'
+        for reference in ('status', 'transactiontype', 'category', 'subcategory')
+    ),
+)
+
+
+def is_available() -> bool:
+    return connection.vendor == 'sqlite'
+
+
+def missing_triggers() -> list[str]:
+    """Sync triggers absent from the database, none before the index is created"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master WHERE type = 'trigger' OR name = %s",
+            [FTS_TABLE],
+        )
+        names = {name: kind for kind, name in cursor.fetchall()}
+    if names.get(FTS_TABLE) != 'table':
+        return []
+    return [name for name in FTS_TRIGGERS if names.get(name) != 'trigger']
+
+
+def match_expression(terms: list[str]) -> str:
+    """FTS5 query where every term is a quoted prefix and all terms must match"""
+    quoted = []
+    for term in terms:
+        escaped = term.replace('"', '""')
+        quoted.append(f'"{escaped}"*')
+    return ' '.join(quoted)
+
+
+def rebuild_search_index() -> int:
+    """Repopulate the full-text index from the records table"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        for statement in REBUILD_SQL:
+            cursor.execute(statement)
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')  # noqa: S608
+        return cursor.fetchone()[0]
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """Search over the FTS5 index ranked by bm25, LIKE search on other databases.
+
+    Querysets that include archived records are searched with LIKE as well, the archive
+    is not indexed.
+
+    Must run after OrderingFilter: without an explicit ``ordering`` parameter the
+    results are sorted by relevance, then by the view's default ordering.
+    """
+
+    def filter_queryset(self, request: Request, queryset: QuerySet, view: APIView) -> QuerySet:
+        terms = self.get_search_terms(request)
+        if not terms or not is_available() or queryset.model is not CashFlowRecord:
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = queryset.filter(search__document__match=match_expression(terms))
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('search__rank', *getattr(view, 'ordering', None) or [])
+        return queryset
@@ -0,0 +1,139 @@
+import datetime as dt
+import random
+from decimal import Decimal
+from itertools import accumulate
+
+from django.utils import timezone
+
+from .balances import rebuild_balance_snapshots
+from .imports import create_records
+from .models import (
+    CashFlowRecord,
+    Category,
+    Status,
+    Subcategory,
+    TransactionDirection,
+    TransactionType,
+)
+from .rollups import rebuild_rollups
+
+SEED_CHUNK_SIZE = 5000
+
+# Справочники с относительными частотами: большая часть записей - бизнес-расходы
+# на несколько популярных подкатегорий, остальные встречаются заметно реже
+STATUSES = {'Бизнес': 60, 'Личное': 30, 'Налог': 10}
+TRANSACTION_TYPES = {'Списание': 70, 'Пополнение': 30}
+INFLOW_TYPES = {'Пополнение'}
+CATEGORIES = {
+    'Инфраструктура': {'VPS': 30, 'Proxy': 15, 'Домены': 5},
+    'Маркетинг': {'Avito': 25, 'Farpost': 10, 'Контекстная реклама': 15},
+    'Офис': {'Аренда': 10, 'Связь': 6, 'Канцелярия': 2},
+    'Зарплата': {'Оклад': 12, 'Премия': 3},
+    'Продажи': {'Розница': 20, 'Опт': 8},
+    'Налоги': {'НДС': 4, 'НДФЛ': 3, 'Страховые взносы': 3},
+}
+COMMENT_WORDS = (
+    'оплата',
+    'счет',
+    'аренда',
+    'сервер',
+    'реклама',
+    'возврат',
+    'аванс',
+    'поставщик',
+    'клиент',
+    'договор',
+    'подписка',
+    'продление',
+    'закупка',
+    'перевод',
+    'комиссия',
+)
+COMMENT_SHARE = 0.7
+BACKDATED_SHARE = 0.1
+DELETED_SHARE = 0.03
+MAX_AMOUNT = Decimal('9999999999.99')
+
+
+class Weighted:
+    """Выбор значения по относительным частотам"""
+
+    def __init__(self, weights: dict[int, int]) -> None:
+        self.values = list(weights)
+        self.cumulative = list(accumulate(weights.values()))
+
+    def pick(self, rng: random.Random) -> int:
+        return rng.choices(self.values, cum_weights=self.cumulative)[0]
+
+
+def seed_references() -> dict[str, Weighted]:
+    """Создает недостающие справочники и возвращает частоты их id"""
+    statuses = {
+        Status.objects.get_or_create(name=name)[0].pk: weight for name, weight in STATUSES.items()
+    }
+    transaction_types = {
+        TransactionType.objects.get_or_create(
+            name=name,
+            defaults={
+                'direction': TransactionDirection.INFLOW
+                if name in INFLOW_TYPES
+                else TransactionDirection.OUTFLOW,
+            },
+        )[0].pk: weight
+        for name, weight in TRANSACTION_TYPES.items()
+    }
+    subcategories = {}
+    for category_name, names in CATEGORIES.items():
+        category, _ = Category.objects.get_or_create(name=category_name)
+        for name, weight in names.items():
+            subcategory, _ = Subcategory.objects.get_or_create(category=category, name=name)
+            subcategories[subcategory.pk] = weight
+    return {
+        'status': Weighted(statuses),
+        'transaction_type': Weighted(transaction_types),
+        'subcategory': Weighted(subcategories),
+    }
+
+
+def seed_records(count: int, *, seed: int = 1, months: int = 24) -> int:
+    """Создает count записей ДДС за последние months месяцев и пересобирает своды и снимки.
+
+    Данные зависят только от seed: суммы распределены логнормально, часть записей
+    проведена задним числом, часть мягко удалена.
+    """
+    rng = random.Random(seed)
+    references = seed_references()
+    categories = dict(Subcategory.objects.values_list('id', 'category_id'))
+    now = timezone.now()
+    span = int(dt.timedelta(days=months * 30).total_seconds())
+
+    def record() -> CashFlowRecord:
+        subcategory = references['subcategory'].pick(rng)
+        created_at = now - dt.timedelta(seconds=rng.randrange(span))
+        operation_date = timezone.localdate(created_at)
+        if rng.random() < BACKDATED_SHARE:
+            operation_date -= dt.timedelta(days=rng.randint(1, 30))
+        amount = Decimal(f'{rng.lognormvariate(8, 1.2):.2f}').max(Decimal('0.01'))
+        comment = ''
+        if rng.random() < COMMENT_SHARE:
+            comment = ' '.join(rng.sample(COMMENT_WORDS, rng.randint(1, 4)))
+        return CashFlowRecord(
+            status_id=references['status'].pick(rng),
+            transaction_type_id=references['transaction_type'].pick(rng),
+            category_id=categories[subcategory],
+            subcategory_id=subcategory,
+            amount=amount.min(MAX_AMOUNT),
+            comment=comment,
+            operation_date=operation_date,
+            created_at=created_at,
+            is_active=rng.random() >= DELETED_SHARE,
+        )
+
+    created = 0
+    while created < count:
+        chunk = [record() for _ in range(min(SEED_CHUNK_SIZE, count - created))]
+        create_records(chunk)
+        created += len(chunk)
+    rebuild_rollups()
+    rebuild_balance_snapshots()
+    return created
@@ -1,15 +1,39 @@
+import functools
+from collections.abc import Callable, Mapping
 from decimal import Decimal
-from typing import Any
+from typing import Any, NamedTuple
 
+from django.utils import timezone
 from rest_framework import serializers
 
 from .models import (
     CashFlowRecord,
     Category,
+    RollupPeriod,
     Status,
     Subcategory,
     TransactionType,
 )
+from .references import get_snapshot
+
+# Largest number of record ids listed in one bulk action
+MAX_BULK_IDS = 10000
+
+
+class CachedReferenceField(serializers.PrimaryKeyRelatedField):
+    """Primary key field resolved from the in-process reference cache"""
+
+    def to_internal_value(self, data: Any) -> Any:
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = get_snapshot(self.context).get(self.queryset.model, pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
 
 
 class StatusSerializer(serializers.ModelSerializer):
@@ -26,7 +50,7 @@ class TransactionTypeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TransactionType
-        fields = ['id', 'name', 'created_at', 'is_active']
+        fields = ['id', 'name', 'direction', 'created_at', 'is_active']
         read_only_fields = ['id', 'created_at']
 
 
@@ -52,14 +76,12 @@ class SubcategorySerializer(serializers.ModelSerializer):
 
     def validate_category_id(self, value: int) -> int:
         """Validate that the category exists and is active"""
-        try:
-            category = Category.objects.get(id=value)
-        except Category.DoesNotExist:
-            raise serializers.ValidationError('Category does not exist') from None
-        else:
-            if not category.is_active:
-                raise serializers.ValidationError('Selected category is not active')
-            return value
+        category = get_snapshot(self.context).get(Category, value)
+        if category is None:
+            raise serializers.ValidationError('Category does not exist')
+        if not category.is_active:
+            raise serializers.ValidationError('Selected category is not active')
+        return value
 
 
 class CashFlowRecordSerializer(serializers.ModelSerializer):
@@ -80,6 +102,7 @@ class CashFlowRecordSerializer(serializers.ModelSerializer):
             'subcategory',
             'amount',
             'comment',
+            'operation_date',
             'created_at',
             'updated_at',
             'is_active',
@@ -99,14 +122,12 @@ class CashFlowRecordSerializer(serializers.ModelSerializer):
 
         # Validate subcategory belongs to category
         if subcategory_id and category_id:
-            try:
-                subcategory = Subcategory.objects.get(id=subcategory_id)
-                if subcategory.category_id != category_id:
-                    raise serializers.ValidationError(
-                        'Subcategory must belong to the selected category',
-                    )
-            except Subcategory.DoesNotExist:
-                pass  # Already validated in field validation
+            subcategory = get_snapshot(self.context).get(Subcategory, subcategory_id)
+            # Missing subcategory is already validated in field validation
+            if subcategory is not None and subcategory.category_id != category_id:
+                raise serializers.ValidationError(
+                    'Subcategory must belong to the selected category',
+                )
 
         return attrs
 
@@ -141,9 +162,110 @@ class CashFlowRecordSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+# Fields whose to_representation returns database values of these types unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+
+class FieldPlan(NamedTuple):
+    """How one output key is read from a ``.values()`` row"""
+
+    key: str
+    source: str
+    represent: Callable[[Any], Any] | None = None
+    nested: tuple['FieldPlan', ...] | None = None
+    sources: tuple[str, ...] = ()
+
+
+def build_field_plan(serializer: serializers.Serializer, prefix: str = '') -> tuple[FieldPlan, ...]:
+    """Field plan of a declared serializer with nested serializers flattened to lookups"""
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        source = prefix + '__'.join(field.source_attrs)
+        if isinstance(field, serializers.BaseSerializer):
+            nested = build_field_plan(field, f'{source}__')
+            plan.append(FieldPlan(name, source, nested=nested, sources=plan_values(nested)))
+        elif isinstance(field, PASSTHROUGH_FIELDS):
+            plan.append(FieldPlan(name, source))
+        else:
+            plan.append(FieldPlan(name, source, field.to_representation))
+    return tuple(plan)
+
+
+def plan_values(plan: tuple[FieldPlan, ...]) -> tuple[str, ...]:
+    """Lookups for ``.values()`` needed by a field plan"""
+    names: list[str] = []
+    for item in plan:
+        names.extend(item.sources if item.nested is not None else [item.source])
+    return tuple(names)
+
+
+@functools.cache
+def field_plan(serializer_class: type[serializers.Serializer]) -> tuple[FieldPlan, ...]:
+    return build_field_plan(serializer_class())
+
+
+class ValuesSerializer(serializers.BaseSerializer):
+    """Read-only serializer producing the output of ``template`` from ``.values()`` rows.
+
+    The field plan is computed once per template, so no serializer objects are created
+    per row, and every nested object is rendered once per distinct value.
+    """
+
+    template: type[serializers.Serializer]
+
+    def __init__(
+        self,
+        *args: Any,
+        plan: tuple[FieldPlan, ...] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.plan = plan if plan is not None else field_plan(self.template)
+        self.rendered: dict[tuple[Any, ...], dict[str, Any] | None] = {}
+
+    @classmethod
+    def values_fields(cls, plan: tuple[FieldPlan, ...] | None = None) -> tuple[str, ...]:
+        return plan_values(plan if plan is not None else field_plan(cls.template))
+
+    def to_representation(self, instance: Mapping[str, Any]) -> dict[str, Any]:
+        return self.render(self.plan, instance)
+
+    def render(self, plan: tuple[FieldPlan, ...], row: Mapping[str, Any]) -> dict[str, Any]:
+        data: dict[str, Any] = {}
+        for key, source, represent, nested, sources in plan:
+            if nested is not None:
+                memo = (source, *(row[name] for name in sources))
+                if memo not in self.rendered:
+                    empty = all(value is None for value in memo[1:])
+                    self.rendered[memo] = None if empty else self.render(nested, row)
+                data[key] = self.rendered[memo]
+                continue
+            value = row[source]
+            data[key] = value if value is None or represent is None else represent(value)
+        return data
+
+
+class CashFlowRecordReadSerializer(ValuesSerializer):
+    """Fast list/retrieve path with the same output as CashFlowRecordSerializer"""
+
+    template = CashFlowRecordSerializer
+
+
 class CashFlowRecordCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating CashFlowRecord with validation"""
 
+    status = CachedReferenceField(queryset=Status.objects.all())
+    transaction_type = CachedReferenceField(queryset=TransactionType.objects.all())
+    category = CachedReferenceField(queryset=Category.objects.all())
+    subcategory = CachedReferenceField(queryset=Subcategory.objects.all())
+
     class Meta:
         model = CashFlowRecord
         fields = [
@@ -153,6 +275,7 @@ class CashFlowRecordCreateSerializer(serializers.ModelSerializer):
             'subcategory',
             'amount',
             'comment',
+            'operation_date',
         ]
 
     def validate_amount(self, value: Decimal) -> Decimal:
@@ -186,3 +309,154 @@ class CashFlowRecordCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Subcategory must belong to the selected category')
 
         return attrs
+
+
+class CashFlowRecordBatchItemSerializer(serializers.Serializer):
+    """Serializer for one item of a batch create, references are checked per batch"""
+
+    status = serializers.IntegerField()
+    transaction_type = serializers.IntegerField()
+    category = serializers.IntegerField()
+    subcategory = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    comment = serializers.CharField(required=False, allow_blank=True, default='')
+    operation_date = serializers.DateField(required=False, default=timezone.localdate)
+
+    def validate_amount(self, value: Decimal) -> Decimal:
+        """Validate amount is positive"""
+        if value <= 0:
+            raise serializers.ValidationError('Amount must be greater than 0')
+        return value
+
+
+class CashFlowRecordBatchQuerySerializer(serializers.Serializer):
+    """Query parameters of the batch create"""
+
+    on_error = serializers.ChoiceField(choices=['stop', 'skip'], default='stop')
+
+
+class CashFlowRecordBulkQuerySerializer(serializers.Serializer):
+    """Query parameters of the bulk actions besides the record filters"""
+
+    dry_run = serializers.BooleanField(default=False)
+
+
+class CashFlowRecordBulkSerializer(serializers.Serializer):
+    """Explicit record ids of a bulk action, combined with the record filters"""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_BULK_IDS,
+    )
+
+
+class CashFlowRecordBulkUpdateSerializer(CashFlowRecordBulkSerializer):
+    """New references of the records selected by a bulk update"""
+
+    fields_to_update = ('status', 'category', 'subcategory')
+
+    status = CachedReferenceField(queryset=Status.objects.all(), required=False)
+    category = CachedReferenceField(queryset=Category.objects.all(), required=False)
+    subcategory = CachedReferenceField(queryset=Subcategory.objects.all(), required=False)
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        """Validate that something changes and the new references are usable"""
+        if not any(name in attrs for name in self.fields_to_update):
+            msg = f'Pass at least one of: {", ".join(self.fields_to_update)}'
+            raise serializers.ValidationError(msg)
+
+        for name in self.fields_to_update:
+            if name in attrs and not attrs[name].is_active:
+                msg = f'Selected {name} is not active'
+                raise serializers.ValidationError(msg)
+
+        category = attrs.get('category')
+        subcategory = attrs.get('subcategory')
+        if subcategory and category and subcategory.category_id != category.pk:
+            raise serializers.ValidationError('Subcategory must belong to the selected category')
+        return attrs
+
+    def column_values(self) -> dict[str, int]:
+        """New values of the updated columns"""
+        return {
+            f'{name}_id': self.validated_data[name].pk
+            for name in self.fields_to_update
+            if name in self.validated_data
+        }
+
+
+class CashFlowArchiveQuerySerializer(serializers.Serializer):
+    """Query parameters of the reads that can include archived records"""
+
+    include_archived = serializers.BooleanField(default=False)
+
+
+class CashFlowSummaryQuerySerializer(serializers.Serializer):
+    """Query parameters of the cash flow summary"""
+
+    dimensions = ('status', 'transaction_type', 'category', 'subcategory')
+
+    granularity = serializers.ChoiceField(choices=RollupPeriod.choices, default=RollupPeriod.DAY)
+    group_by = serializers.CharField(required=False, default=','.join(dimensions))
+
+    def validate_group_by(self, value: str) -> list[str]:
+        """Validate comma separated list of reference fields"""
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = sorted(set(names) - set(self.dimensions))
+        if unknown:
+            msg = f'Unknown fields: {", ".join(unknown)}'
+            raise serializers.ValidationError(msg)
+        return [name for name in self.dimensions if name in names]
+
+
+class CashFlowSummarySerializer(serializers.Serializer):
+    """Serializer for cash flow totals of one period bucket"""
+
+    period = serializers.DateField(source='bucket')
+    status = serializers.IntegerField(source='status_id', required=False)
+    status_name = serializers.CharField(source='status__name', required=False)
+    transaction_type = serializers.IntegerField(source='transaction_type_id', required=False)
+    transaction_type_name = serializers.CharField(
+        source='transaction_type__name',
+        required=False,
+    )
+    category = serializers.IntegerField(source='category_id', required=False)
+    category_name = serializers.CharField(source='category__name', required=False)
+    subcategory = serializers.IntegerField(source='subcategory_id', required=False)
+    subcategory_name = serializers.CharField(source='subcategory__name', required=False)
+    count = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=18, decimal_places=2)
+
+
+class CashFlowBalanceQuerySerializer(serializers.Serializer):
+    """Query parameters of the running balance"""
+
+    at = serializers.DateField(default=timezone.localdate)
+    granularity = serializers.ChoiceField(choices=RollupPeriod.choices, default=RollupPeriod.DAY)
+
+
+class CashFlowStatusBalanceSerializer(serializers.Serializer):
+    """Serializer for the running balance of one status"""
+
+    status = serializers.IntegerField(source='status_id')
+    status_name = serializers.CharField()
+    inflow = serializers.DecimalField(max_digits=18, decimal_places=2)
+    outflow = serializers.DecimalField(max_digits=18, decimal_places=2)
+    balance = serializers.DecimalField(max_digits=18, decimal_places=2)
+    count = serializers.IntegerField()
+
+
+class CashFlowBalanceSerializer(serializers.Serializer):
+    """Serializer for the running balance at the end of a day or a month"""
+
+    at = serializers.DateField()
+    granularity = serializers.CharField()
+    as_of = serializers.DateField()
+    snapshot = serializers.DateField(allow_null=True)
+    inflow = serializers.DecimalField(max_digits=18, decimal_places=2)
+    outflow = serializers.DecimalField(max_digits=18, decimal_places=2)
+    balance = serializers.DecimalField(max_digits=18, decimal_places=2)
+    count = serializers.IntegerField()
+    statuses = CashFlowStatusBalanceSerializer(many=True)
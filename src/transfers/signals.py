@@ -0,0 +1,62 @@
+from typing import Any
+
+from django.core.signals import request_finished
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .instrumentation import record_query
+from .models import CashFlowRecord, Category, Status, Subcategory, TransactionType
+from .references import bump_version
+from .rollups import apply_contributions, contribution_from_record, stored_contribution
+from .routers import read_replica
+
+
+@receiver(pre_save, sender=CashFlowRecord)
+def remember_stored_contribution(sender: type, instance: CashFlowRecord, **kwargs: Any) -> None:
+    """Запоминает вклад записи в своды до сохранения изменений"""
+    adding = instance._state.adding or instance.pk is None  # noqa: SLF001
+    instance._rollup_previous = None if adding else stored_contribution(instance.pk)  # noqa: SLF001
+
+
+@receiver(post_save, sender=CashFlowRecord)
+def update_rollups_on_save(sender: type, instance: CashFlowRecord, **kwargs: Any) -> None:
+    """Переносит вклад записи в своды: создание, изменение, мягкое удаление и включение"""
+    previous = instance.__dict__.pop('_rollup_previous', None)
+    apply_contributions(added=[contribution_from_record(instance)], removed=[previous])
+
+
+@receiver(post_delete, sender=CashFlowRecord)
+def update_rollups_on_delete(sender: type, instance: CashFlowRecord, **kwargs: Any) -> None:
+    apply_contributions(removed=[contribution_from_record(instance)])
+
+
+@receiver(post_save, sender=Status)
+@receiver(post_save, sender=TransactionType)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Subcategory)
+@receiver(post_delete, sender=Status)
+@receiver(post_delete, sender=TransactionType)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Subcategory)
+def invalidate_reference_cache(sender: type, **kwargs: Any) -> None:
+    """Любое изменение справочника сбрасывает их кэш во всех процессах"""
+    bump_version()
+
+
+@receiver(request_finished)
+def release_read_replica(sender: type, **kwargs: Any) -> None:
+    """Следующий код потока после ответа снова читает из основной базы"""
+    read_replica.set(None)
+
+
+@receiver(connection_created)
+def install_query_recorder(
+    sender: type,
+    connection: BaseDatabaseWrapper,
+    **kwargs: Any,
+) -> None:
+    """Запросы каждого соединения попадают в замер HTTP-запроса, если он идет"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
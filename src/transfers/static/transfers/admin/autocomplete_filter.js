@@ -0,0 +1,15 @@
+'use strict';
+{
+    // Выбор значения в фильтре с автодополнением перезагружает список с этим фильтром
+    const $ = django.jQuery;
+    $(function() {
+        $('.autocomplete-filter select').on('change', function() {
+            const allUrl = this.closest('.autocomplete-filter').dataset.allUrl;
+            const params = new URLSearchParams(allUrl);
+            if (this.value) {
+                params.set(this.name, this.value);
+            }
+            window.location.search = params.toString();
+        });
+    });
+}
@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
     CashFlowRecordViewSet,
     CategoryViewSet,
+    ReferenceBootstrapView,
     StatusViewSet,
     SubcategoryViewSet,
     TransactionTypeViewSet,
@@ -19,6 +21,17 @@ router.register(r'categories', CategoryViewSet)
 router.register(r'subcategories', SubcategoryViewSet)
 router.register(r'cash-flow-records', CashFlowRecordViewSet)
 
+bootstrap_view = ReferenceBootstrapView.as_view()
+api_urls = router.urls
+
+# Под ASGI чтение обслуживается асинхронными представлениями
+if settings.ASYNC_READS:
+    from .async_views import ReferenceBootstrapAsyncView, async_read_urls
+
+    bootstrap_view = ReferenceBootstrapAsyncView.as_view(fallback=bootstrap_view)
+    api_urls = async_read_urls(api_urls)
+
 urlpatterns = [
-    path('', include(router.urls)),
+    path('references/bootstrap/', bootstrap_view, name='references-bootstrap'),
+    path('', include(api_urls)),
 ]
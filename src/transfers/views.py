@@ -1,21 +1,68 @@
+import datetime as dt
+from collections.abc import Sequence
+from typing import Any
+
 import structlog
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import DateTimeField, QuerySet
+from django.http import HttpRequest, HttpResponse, HttpResponseBase
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from django_filters import DateFilter
+from django_filters.constants import EMPTY_VALUES
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet
-from rest_framework import filters, serializers, viewsets
+from django_filters.utils import translate_validation
+from rest_framework import filters, serializers, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
 from rest_framework.response import Response
-
+from rest_framework.views import APIView
+
+from .archive import ArchiveFilterBackend, IncludeArchivedMixin
+from .balances import running_balance
+from .batch import MAX_BATCH_SIZE, create_batch, validate_batch
+from .bulk import bulk_update_records, inconsistent_records
+from .conditional import (
+    detail_validators,
+    list_etag,
+    not_modified,
+    set_validators,
+    with_validator_columns,
+)
+from .export import (
+    CSVExportRenderer,
+    NDJSONExportRenderer,
+    requested_format,
+    streaming_export,
+)
+from .fieldsets import SparseFieldsMixin
+from .metrics import PROMETHEUS_CONTENT_TYPE, exposition
 from .models import (
     CashFlowRecord,
+    CashFlowRecordWithArchive,
     Category,
     Status,
     Subcategory,
     TransactionType,
 )
+from .pagination import CashFlowRecordPagination
+from .references import reference_cache, version_etag
+from .rollups import summarize_rollups, summarize_with_archive
+from .search import FullTextSearchFilter
 from .serializers import (
+    CashFlowBalanceQuerySerializer,
+    CashFlowBalanceSerializer,
+    CashFlowRecordBatchQuerySerializer,
+    CashFlowRecordBulkQuerySerializer,
+    CashFlowRecordBulkSerializer,
+    CashFlowRecordBulkUpdateSerializer,
     CashFlowRecordCreateSerializer,
     CashFlowRecordSerializer,
+    CashFlowSummaryQuerySerializer,
+    CashFlowSummarySerializer,
     CategorySerializer,
     StatusSerializer,
     SubcategorySerializer,
@@ -24,12 +71,42 @@ from .serializers import (
 
 logger = structlog.get_logger(__name__)
 
+# Deprecated since direction was added; a missing direction is rejected in the next release
+MISSING_DIRECTION_WARNING = (
+    '299 - "direction is missing, the transaction type was created as an outflow; '
+    'send direction (inflow or outflow), it will be required in the next release"'
+)
+
+
+class DayBoundFilter(DateFilter):
+    """Bound of an inclusive range of days, applied as a half-open range [after, before + 1).
+
+    On a DateTimeField the bound is the start of the day in the current time zone, so the
+    last day is included completely and the predicate stays an index range.
+    """
+
+    def __init__(self, *args: Any, end: bool = False, **kwargs: Any) -> None:
+        kwargs['lookup_expr'] = 'lt' if end else 'gte'
+        super().__init__(*args, **kwargs)
+        self.end = end
+
+    def filter(self, qs: QuerySet, value: dt.date | None) -> QuerySet:
+        if value in EMPTY_VALUES:
+            return qs
+        if self.end:
+            value += dt.timedelta(days=1)
+        if isinstance(qs.model._meta.get_field(self.field_name), DateTimeField):  # noqa: SLF001
+            value = timezone.make_aware(dt.datetime.combine(value, dt.time.min))
+        return super().filter(qs, value)
+
 
 class CashFlowRecordFilter(FilterSet):
     """Custom filter for CashFlowRecord with date range filtering"""
 
-    created_at_after = DateFilter(field_name='created_at', lookup_expr='gte')
-    created_at_before = DateFilter(field_name='created_at', lookup_expr='lte')
+    created_at_after = DayBoundFilter(field_name='created_at')
+    created_at_before = DayBoundFilter(field_name='created_at', end=True)
+    operation_date_after = DayBoundFilter(field_name='operation_date')
+    operation_date_before = DayBoundFilter(field_name='operation_date', end=True)
 
     class Meta:
         model = CashFlowRecord
@@ -40,10 +117,19 @@ class CashFlowRecordFilter(FilterSet):
             'subcategory',
             'created_at_after',
             'created_at_before',
+            'operation_date_after',
+            'operation_date_before',
         ]
 
 
-class StatusViewSet(viewsets.ModelViewSet):
+class CashFlowRecordWithArchiveFilter(CashFlowRecordFilter):
+    """CashFlowRecordFilter for the records together with the archived ones"""
+
+    class Meta(CashFlowRecordFilter.Meta):
+        model = CashFlowRecordWithArchive
+
+
+class StatusViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for managing Status objects"""
 
     queryset = Status.objects.all()
@@ -57,19 +143,19 @@ class StatusViewSet(viewsets.ModelViewSet):
     def perform_destroy(self, instance: Status) -> None:
         """Soft delete by setting is_active to False"""
         instance.is_active = False
-        instance.save()
+        instance.save(update_fields=['is_active'])
 
     @action(detail=True, methods=['post'])
     def enable(self, request: Request, pk: str | None = None) -> Response:
         """Enable a status"""
         status_obj = self.get_object()
         status_obj.is_active = True
-        status_obj.save()
+        status_obj.save(update_fields=['is_active'])
         serializer = self.get_serializer(status_obj)
         return Response(serializer.data)
 
 
-class TransactionTypeViewSet(viewsets.ModelViewSet):
+class TransactionTypeViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for managing TransactionType objects"""
 
     queryset = TransactionType.objects.all()
@@ -80,22 +166,34 @@ class TransactionTypeViewSet(viewsets.ModelViewSet):
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
 
+    def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Create a transaction type; without a direction it is an outflow, with a warning"""
+        response = super().create(request, *args, **kwargs)
+        if 'direction' not in request.data:
+            logger.warning(
+                'transaction_type_direction_missing',
+                transaction_type_id=response.data['id'],
+                direction=response.data['direction'],
+            )
+            response['Warning'] = MISSING_DIRECTION_WARNING
+        return response
+
     def perform_destroy(self, instance: TransactionType) -> None:
         """Soft delete by setting is_active to False"""
         instance.is_active = False
-        instance.save()
+        instance.save(update_fields=['is_active'])
 
     @action(detail=True, methods=['post'])
     def enable(self, request: Request, pk: str | None = None) -> Response:
         """Enable a transaction type"""
         transaction_type = self.get_object()
         transaction_type.is_active = True
-        transaction_type.save()
+        transaction_type.save(update_fields=['is_active'])
         serializer = self.get_serializer(transaction_type)
         return Response(serializer.data)
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for managing Category objects"""
 
     queryset = Category.objects.all()
@@ -109,19 +207,19 @@ class CategoryViewSet(viewsets.ModelViewSet):
     def perform_destroy(self, instance: Category) -> None:
         """Soft delete by setting is_active to False"""
         instance.is_active = False
-        instance.save()
+        instance.save(update_fields=['is_active'])
 
     @action(detail=True, methods=['post'])
     def enable(self, request: Request, pk: str | None = None) -> Response:
         """Enable a category"""
         category = self.get_object()
         category.is_active = True
-        category.save()
+        category.save(update_fields=['is_active'])
         serializer = self.get_serializer(category)
         return Response(serializer.data)
 
 
-class SubcategoryViewSet(viewsets.ModelViewSet):
+class SubcategoryViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """ViewSet for managing Subcategory objects"""
 
     queryset = Subcategory.objects.select_related('category').all()
@@ -135,14 +233,14 @@ class SubcategoryViewSet(viewsets.ModelViewSet):
     def perform_destroy(self, instance: Subcategory) -> None:
         """Soft delete by setting is_active to False"""
         instance.is_active = False
-        instance.save()
+        instance.save(update_fields=['is_active'])
 
     @action(detail=True, methods=['post'])
     def enable(self, request: Request, pk: str | None = None) -> Response:
         """Enable a subcategory"""
         subcategory = self.get_object()
         subcategory.is_active = True
-        subcategory.save()
+        subcategory.save(update_fields=['is_active'])
         serializer = self.get_serializer(subcategory)
         return Response(serializer.data)
 
@@ -161,7 +259,21 @@ class SubcategoryViewSet(viewsets.ModelViewSet):
         return Response({'subcategories': list(subcategories)})
 
 
-class CashFlowRecordViewSet(viewsets.ModelViewSet):
+class ReferenceBootstrapView(APIView):
+    """All active reference data in one unpaginated response with an ETag"""
+
+    def get(self, request: Request) -> HttpResponseBase:
+        # The checked snapshot also gives the ETag, so the version is read once
+        snapshot = reference_cache.get()
+        response = not_modified(request, version_etag(snapshot.version))
+        if response is not None:
+            return response
+        response = Response(snapshot.bootstrap)
+        set_validators(response, version_etag(snapshot.version))
+        return response
+
+
+class CashFlowRecordViewSet(SparseFieldsMixin, IncludeArchivedMixin, viewsets.ModelViewSet):
     """ViewSet for managing CashFlowRecord objects"""
 
     queryset = CashFlowRecord.objects.select_related(
@@ -170,9 +282,17 @@ class CashFlowRecordViewSet(viewsets.ModelViewSet):
         'category',
         'subcategory',
     ).filter(is_active=True)
+    archive_queryset = CashFlowRecordWithArchive.objects.select_related(
+        'status',
+        'transaction_type',
+        'category',
+        'subcategory',
+    ).filter(is_active=True)
     serializer_class = CashFlowRecordSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = CashFlowRecordPagination
+    filter_backends = [ArchiveFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_class = CashFlowRecordFilter
+    archive_filterset_class = CashFlowRecordWithArchiveFilter
     search_fields = [
         'comment',
         'status__name',
@@ -180,16 +300,225 @@ class CashFlowRecordViewSet(viewsets.ModelViewSet):
         'category__name',
         'subcategory__name',
     ]
-    ordering_fields = ['amount', 'created_at', 'updated_at']
+    ordering_fields = ['amount', 'operation_date', 'created_at', 'updated_at']
     ordering = ['-created_at']
 
-    def get_serializer_class(self) -> type[serializers.ModelSerializer]:
+    def get_serializer_class(self) -> type[serializers.BaseSerializer]:
         """Use different serializer for create/update operations"""
         if self.action in ['create', 'update', 'partial_update']:
             return CashFlowRecordCreateSerializer
-        return CashFlowRecordSerializer
+        if self.action == 'bulk_update':
+            return CashFlowRecordBulkUpdateSerializer
+        if self.action in ['bulk_delete', 'bulk_restore']:
+            return CashFlowRecordBulkSerializer
+        return super().get_serializer_class()
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        """List records, answering unchanged polls with 304 before serialization.
+
+        The ETag is computed from the page that is read anyway, so a poll costs the same
+        queries as the page: the count of the filtered rows, made without the joins of
+        the ?fields= projection, and the read of the page rows.
+        """
+        rows = self.filter_rows(self.get_queryset())
+        page = self.paginator.paginate_queryset(
+            with_validator_columns(self.project(rows)),
+            request,
+            self,
+            count_queryset=rows,
+        )
+        etag = list_etag(request, page, self.paginator.get_page_state())
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        set_validators(response, etag)
+        return response
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        """Retrieve a record, answering unchanged copies with 304 before serialization"""
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            updated_at = (
+                self.get_queryset()
+                .filter(**{self.lookup_field: pk})
+                .values_list('updated_at', flat=True)
+                .first()
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            updated_at = None
+        if updated_at is None:
+            raise NotFound
+        etag, last_modified = detail_validators(pk, updated_at, request.GET.urlencode())
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = super().retrieve(request, *args, **kwargs)
+        set_validators(response, etag, last_modified)
+        return response
 
     def perform_destroy(self, instance: CashFlowRecord) -> None:
         """Soft delete by setting is_active to False"""
         instance.is_active = False
-        instance.save()
+        instance.save(update_fields=['is_active', 'updated_at'])
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request: Request) -> Response:
+        """Get totals by period and reference fields from the rollup table.
+
+        Archived records are not in the rollups; with ?include_archived=1 their totals
+        are aggregated from the archive and added to the matching buckets.
+        """
+        query = CashFlowSummaryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        filterset = self.filterset_class(request.query_params, request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        operation_dates = [
+            name
+            for name in ('operation_date_after', 'operation_date_before')
+            if filterset.form.cleaned_data.get(name) is not None
+        ]
+        if operation_dates:
+            msg = 'Summary periods follow created_at, use created_at_after/created_at_before'
+            raise serializers.ValidationError({name: [msg] for name in operation_dates})
+
+        summarize = summarize_with_archive if self.include_archived else summarize_rollups
+        buckets = summarize(
+            query.validated_data['granularity'],
+            filterset.form.cleaned_data,
+            query.validated_data['group_by'],
+        )
+        serializer = CashFlowSummarySerializer(buckets, many=True)
+        return Response(
+            {'granularity': query.validated_data['granularity'], 'results': serializer.data},
+        )
+
+    @action(detail=False, methods=['get'])
+    def balance(self, request: Request) -> Response:
+        """Get the running balance by status at the end of a day or a month.
+
+        The nearest balance snapshot before that moment is combined with the records
+        created after it, archived ones included.
+        """
+        query = CashFlowBalanceQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        balance = running_balance(query.validated_data['at'], query.validated_data['granularity'])
+        return Response(CashFlowBalanceSerializer(balance).data)
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request: Request) -> Response:
+        """Create many records with set-based validation and a single bulk insert"""
+        query = CashFlowRecordBatchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise serializers.ValidationError({'non_field_errors': ['Expected a list of items']})
+        if len(items) > MAX_BATCH_SIZE:
+            raise serializers.ValidationError(
+                {'non_field_errors': [f'Batch size must not exceed {MAX_BATCH_SIZE} items']},
+            )
+
+        stop_on_error = query.validated_data['on_error'] == 'stop'
+        rows, errors = validate_batch(items, stop_on_error=stop_on_error)
+        error_list = [{'index': index, 'errors': errors[index]} for index in sorted(errors)]
+        if errors and (stop_on_error or not rows):
+            return Response({'errors': error_list}, status=status.HTTP_400_BAD_REQUEST)
+
+        records = create_batch(attrs for _, attrs in rows)
+        return Response(
+            {
+                'created': len(records),
+                'ids': [record.pk for record in records],
+                'errors': error_list,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request: Request) -> Response:
+        """Soft delete the records selected by filters or ids with one UPDATE"""
+        return self.bulk_action(request, {'is_active': False})
+
+    @action(detail=False, methods=['post'], url_path='bulk-restore')
+    def bulk_restore(self, request: Request) -> Response:
+        """Restore the soft-deleted records selected by filters or ids with one UPDATE"""
+        return self.bulk_action(request, {'is_active': True}, active=False)
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request: Request) -> Response:
+        """Move the records selected by filters or ids to another status or category.
+
+        The category and subcategory of every changed record must still match, which is
+        checked in SQL before the UPDATE.
+        """
+        return self.bulk_action(request)
+
+    def bulk_action(
+        self,
+        request: Request,
+        values: dict[str, Any] | None = None,
+        *,
+        active: bool = True,
+    ) -> Response:
+        """Apply values to the selected records, or only count them with ?dry_run=1"""
+        query = CashFlowRecordBulkQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if values is None:
+            values = serializer.column_values()
+
+        queryset = self.bulk_queryset(request, serializer.validated_data.get('ids'))
+        queryset = queryset.filter(is_active=active)
+        dry_run = query.validated_data['dry_run']
+        with transaction.atomic():
+            conflicts = inconsistent_records(queryset, values)
+            if conflicts:
+                msg = f'Subcategory would not belong to the category in {conflicts} records'
+                raise serializers.ValidationError({'non_field_errors': [msg]})
+            result = bulk_update_records(queryset, values, dry_run=dry_run)
+        logger.info(
+            'bulk_records',
+            action=self.action,
+            matched=result.matched,
+            affected=result.affected,
+            dry_run=dry_run,
+        )
+        return Response({**result._asdict(), 'dry_run': dry_run})
+
+    def bulk_queryset(self, request: Request, ids: Sequence[int] | None) -> QuerySet:
+        """Records matching the list filters and the ids; a selection is required"""
+        filterset = self.filterset_class(
+            request.query_params,
+            queryset=CashFlowRecord.objects.all(),
+            request=request,
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        filtered = any(value not in EMPTY_VALUES for value in filterset.form.cleaned_data.values())
+        if not filtered and ids is None:
+            msg = 'Pass ids or at least one filter, bulk actions never apply to all records'
+            raise serializers.ValidationError({'non_field_errors': [msg]})
+        queryset = filterset.qs
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        return queryset
+
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[CSVExportRenderer, NDJSONExportRenderer, JSONRenderer],
+    )
+    def export(self, request: Request) -> HttpResponseBase:
+        """Stream filtered records as CSV or NDJSON (?format=csv|ndjson)"""
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_export(queryset, requested_format(request.accepted_renderer.format))
+
+
+@require_GET
+def metrics(request: HttpRequest) -> HttpResponse:
+    """Per-route request metrics of all workers in the Prometheus text format"""
+    return HttpResponse(exposition(), content_type=PROMETHEUS_CONTENT_TYPE)
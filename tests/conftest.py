@@ -0,0 +1,24 @@
+from collections.abc import Iterator
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+
+from transfers.references import reference_cache
+
+STATIC_STORAGE = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
+
+
+@pytest.fixture(autouse=True)
+def _clear_reference_cache() -> Iterator[None]:
+    """The cache lives in the process; every test starts from its own database"""
+    reference_cache.clear()
+    yield
+    reference_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _plain_static_storage() -> Iterator[None]:
+    """Templates resolve static files without the manifest collectstatic writes"""
+    with override_settings(STORAGES={**settings.STORAGES, 'staticfiles': STATIC_STORAGE}):
+        yield
@@ -0,0 +1,98 @@
+from collections import Counter
+from collections.abc import Callable
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+import pytest
+from django.conf import settings
+from django.test import Client
+from django.urls import reverse
+
+from transfers.models import CashFlowRecord
+from transfers.seeding import seed_records
+
+pytestmark = pytest.mark.django_db
+
+RECORDS = 1000
+MAX_QUERIES = 12
+REFERENCE_FIELDS = ('status', 'transaction_type', 'category', 'subcategory')
+CHANGELISTS = (
+    'list',
+    'second page',
+    'year',
+    'month',
+    'day',
+    'status',
+    'category and subcategory',
+    'search',
+    'ordered by amount',
+)
+PAGES = (
+    *(f'changelist, {name}' for name in CHANGELISTS),
+    'change',
+    'add',
+    *(f'autocomplete {field}' for field in REFERENCE_FIELDS),
+)
+
+
+def changelist_query(name: str, record: CashFlowRecord) -> dict[str, object]:
+    """Filtered, paged, drilled-down and sorted variants of the changelist"""
+    day = record.operation_date
+    return {
+        'list': {},
+        'second page': {'p': 2},
+        'year': {'operation_date__year': day.year},
+        'month': {'operation_date__year': day.year, 'operation_date__month': day.month},
+        'day': {
+            'operation_date__year': day.year,
+            'operation_date__month': day.month,
+            'operation_date__day': day.day,
+        },
+        'status': {'status__id__exact': record.status_id},
+        'category and subcategory': {
+            'category__id__exact': record.category_id,
+            'subcategory__id__exact': record.subcategory_id,
+        },
+        'search': {'q': 'оплата'},
+        'ordered by amount': {'o': '5'},
+    }[name]
+
+
+def page_url(page: str, record: CashFlowRecord) -> str:
+    if page == 'change':
+        return reverse('admin:transfers_cashflowrecord_change', args=[record.pk])
+    if page == 'add':
+        return reverse('admin:transfers_cashflowrecord_add')
+    if page.startswith('autocomplete '):
+        query = {
+            'app_label': 'transfers',
+            'model_name': 'cashflowrecord',
+            'field_name': page.removeprefix('autocomplete '),
+            'term': '',
+        }
+        return f'{reverse("admin:autocomplete")}?{urlencode(query)}'
+    query = changelist_query(page.removeprefix('changelist, '), record)
+    return f'{reverse("admin:transfers_cashflowrecord_changelist")}?{urlencode(query)}'
+
+
+@pytest.fixture
+def record() -> CashFlowRecord:
+    seed_records(RECORDS, seed=1)
+    return CashFlowRecord.objects.order_by('-operation_date', '-id').first()
+
+
+@pytest.mark.parametrize('page', PAGES)
+def test_admin_page_query_budget(
+    admin_client: Client,
+    django_assert_max_num_queries: Callable,
+    record: CashFlowRecord,
+    page: str,
+) -> None:
+    url = page_url(page, record)
+    with django_assert_max_num_queries(MAX_QUERIES) as captured:
+        response = admin_client.get(url)
+
+    assert response.status_code == HTTPStatus.OK
+    # A statement repeated per row is an N+1 pattern even within the total budget
+    sql, repeated = Counter(query['sql'] for query in captured.captured_queries).most_common(1)[0]
+    assert repeated <= settings.SQL_REPEATED_QUERY_BUDGET, f'{repeated} x {sql}'
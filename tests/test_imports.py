@@ -0,0 +1,123 @@
+import datetime as dt
+import math
+import random
+import time
+from collections.abc import Iterator
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from transfers.imports import IMPORT_CHUNK_SIZE, ReferenceResolver, SourceRow, import_records
+from transfers.models import (
+    CashFlowRecord,
+    Category,
+    Status,
+    Subcategory,
+    TransactionDirection,
+    TransactionType,
+)
+from transfers.rollups import compute_rollups, stored_rollups
+
+pytestmark = pytest.mark.django_db
+
+# A million records must load within 10 minutes
+TARGET_ROWS = 1_000_000
+TARGET_SECONDS = 600
+ROWS = 20_000
+ROLLUP_BATCH_SIZE = 500
+
+STATUSES = ('Бизнес', 'Личное', 'Налог')
+TRANSACTION_TYPES = ('Пополнение', 'Списание')
+SUBCATEGORIES = {'Маркетинг': ('Avito', 'Farpost'), 'Офис': ('Аренда', 'Связь')}
+
+
+@pytest.fixture
+def references() -> None:
+    for name in STATUSES:
+        Status.objects.create(name=name)
+    for name in TRANSACTION_TYPES:
+        TransactionType.objects.create(name=name)
+    for category_name, names in SUBCATEGORIES.items():
+        category = Category.objects.create(name=category_name)
+        for name in names:
+            Subcategory.objects.create(category=category, name=name)
+
+
+def historical_rows(count: int) -> Iterator[SourceRow]:
+    """Export rows spread over ten years, so most of them land in a daily rollup of their own"""
+    rng = random.Random(count)
+    start = dt.datetime(2016, 1, 1)
+    for line_number in range(2, count + 2):
+        category = rng.choice(list(SUBCATEGORIES))
+        created_at = start + dt.timedelta(minutes=rng.randrange(10 * 365 * 24 * 60))
+        yield (
+            line_number,
+            {
+                'status': rng.choice(STATUSES),
+                'transaction_type': rng.choice(TRANSACTION_TYPES),
+                'category': category,
+                'subcategory': rng.choice(SUBCATEGORIES[category]),
+                'amount': str(Decimal(rng.randrange(1, 1_000_000)) / 100),
+                'comment': 'x',
+                'created_at': created_at.isoformat(),
+            },
+        )
+
+
+def reject(line_number: int, row: dict, errors: dict) -> None:
+    pytest.fail(f'Line {line_number} rejected: {errors}')
+
+
+@pytest.mark.usefixtures('references')
+def test_import_writes_rollups_in_batches() -> None:
+    """Rollups of a chunk take one statement per batch of buckets, not one per bucket"""
+    with CaptureQueriesContext(connection) as queries:
+        stats = import_records(historical_rows(ROWS), ReferenceResolver(), on_reject=reject)
+
+    assert stats.created == ROWS
+    rollup_queries = [query for query in queries if 'transfers_cashflowrollup' in query['sql']]
+    chunks = math.ceil(ROWS / IMPORT_CHUNK_SIZE)
+    # Every record touches up to two rollup rows: its day and its month
+    assert len(rollup_queries) <= chunks * math.ceil(2 * IMPORT_CHUNK_SIZE / ROLLUP_BATCH_SIZE)
+    assert stored_rollups() == compute_rollups()
+
+
+@pytest.mark.usefixtures('references')
+def test_import_throughput() -> None:
+    started = time.perf_counter()
+    stats = import_records(historical_rows(ROWS), ReferenceResolver(), on_reject=reject)
+    elapsed = time.perf_counter() - started
+
+    assert CashFlowRecord.objects.count() == stats.created == ROWS
+    rows_per_second = ROWS / elapsed
+    assert rows_per_second >= TARGET_ROWS / TARGET_SECONDS, (
+        f'{rows_per_second:.0f} rows/s: {TARGET_ROWS} rows would take '
+        f'{TARGET_ROWS / rows_per_second / 60:.1f} min'
+    )
+
+
+@pytest.mark.usefixtures('references')
+def test_missing_transaction_types_need_a_direction() -> None:
+    row = {
+        'status': 'Налог',
+        'transaction_type': 'Возврат',
+        'category': 'Офис',
+        'subcategory': 'Связь',
+        'amount': '10.00',
+    }
+    rejected = []
+    resolver = ReferenceResolver(create_missing=True)
+    import_records([(2, row)], resolver, on_reject=lambda *args: rejected.append(args))
+    assert [line for line, _, _ in rejected] == [2]
+    assert not TransactionType.objects.filter(name='Возврат').exists()
+
+    resolver = ReferenceResolver(
+        create_missing=True,
+        default_direction=TransactionDirection.INFLOW,
+    )
+    stats = import_records([(2, row)], resolver, on_reject=reject)
+    assert stats.created == 1
+    assert resolver.created_transaction_types == ['Возврат']
+    assert TransactionType.objects.get(name='Возврат').direction == TransactionDirection.INFLOW
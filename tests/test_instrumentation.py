@@ -0,0 +1,51 @@
+import time
+
+import pytest
+from django.test import Client, override_settings
+
+from transfers.instrumentation import RequestProfile, request_profile
+from transfers.models import CashFlowRecord
+from transfers.seeding import seed_records
+from transfers.serializers import CashFlowRecordSerializer
+
+pytestmark = pytest.mark.django_db
+
+SEGMENTS = ['db', 'app', 'ser', 'render', 'total']
+
+
+def server_timing(header: str) -> dict[str, float]:
+    durations = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        durations[name] = next(
+            float(param.removeprefix('dur=')) for param in params if param.startswith('dur=')
+        )
+    return durations
+
+
+@override_settings(SERVER_TIMING=True)
+def test_server_timing_separates_serialization(client: Client) -> None:
+    seed_records(200, seed=1)
+    response = client.get('/api/cash-flow-records/', {'page_size': 100})
+
+    durations = server_timing(response.headers['Server-Timing'])
+    assert list(durations) == SEGMENTS
+    assert durations['ser'] > 0
+    parts = sum(durations[name] for name in SEGMENTS[:-1])
+    assert parts == pytest.approx(durations['total'], abs=0.05)
+
+
+def test_serialization_time_excludes_its_queries() -> None:
+    seed_records(200, seed=1)
+    profile = RequestProfile()
+    token = request_profile.set(profile)
+    try:
+        started = time.perf_counter()
+        # The queryset is evaluated, and the nested serializers run, inside .data
+        CashFlowRecordSerializer(CashFlowRecord.objects.all(), many=True).data  # noqa: B018
+        elapsed = time.perf_counter() - started
+    finally:
+        request_profile.reset(token)
+
+    assert profile.sql_time > 0
+    assert 0 < profile.serialize_time <= elapsed - profile.sql_time
@@ -0,0 +1,16 @@
+import pytest
+
+from transfers.query_plans import ORDERINGS, check_plans, filter_params, param_combinations
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize('ordering', ORDERINGS)
+def test_list_plans_use_indexes(ordering: str) -> None:
+    """Every filter combination reads the records through an index, in index order"""
+    failures = [
+        f'{check.kind} {check.label}\n{check.plan}'
+        for check in check_plans(param_combinations(filter_params(), [ordering]))
+        if check.problems
+    ]
+    assert not failures, '\n'.join(failures)
@@ -0,0 +1,129 @@
+import datetime as dt
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from transfers.models import (
+    CashFlowRecord,
+    Category,
+    Status,
+    Subcategory,
+    TransactionDirection,
+    TransactionType,
+)
+from transfers.serializers import CashFlowRecordReadSerializer, CashFlowRecordSerializer
+
+pytestmark = pytest.mark.django_db
+
+AMOUNTS = ('0.01', '10', '100.50', '1234.5', '9999999999.99')
+RELATED = ('status', 'transaction_type', 'category', 'subcategory__category')
+
+renderer = JSONRenderer()
+
+
+@pytest.fixture
+def records() -> list[CashFlowRecord]:
+    """Records with active and inactive references, odd amounts and a deleted record"""
+    statuses = [
+        Status.objects.create(name='Бизнес'),
+        Status.objects.create(name='Архив "старый"', is_active=False),
+    ]
+    types = [
+        TransactionType.objects.create(name='Пополнение', direction=TransactionDirection.INFLOW),
+        TransactionType.objects.create(name='Списание', is_active=False),
+    ]
+    categories = [
+        Category.objects.create(name='Маркетинг'),
+        Category.objects.create(name='Офис', is_active=False),
+    ]
+    subcategories = [
+        Subcategory.objects.create(category=categories[0], name='Avito'),
+        Subcategory.objects.create(category=categories[1], name='Связь', is_active=False),
+    ]
+    created = []
+    for index, amount in enumerate(AMOUNTS):
+        side = index % 2
+        created.append(
+            CashFlowRecord.objects.create(
+                status=statuses[side],
+                transaction_type=types[side],
+                category=categories[side],
+                subcategory=subcategories[side],
+                amount=Decimal(amount),
+                comment='' if side else 'Оплата «рекламы»\n\t\\ 🚀',
+                operation_date=dt.date(2025, 1, index + 1),
+                is_active=not side,
+            ),
+        )
+    return created
+
+
+def render(data: Any) -> bytes:
+    return renderer.render(data)
+
+
+def values_row(record: Any) -> dict[str, Any]:
+    """The ``.values()`` row of a record, None for lookups through a missing relation"""
+    row = {}
+    for lookup in CashFlowRecordReadSerializer.values_fields():
+        value: Any = record
+        for name in lookup.split('__'):
+            value = None if value is None else getattr(value, name)
+        row[lookup] = value
+    return row
+
+
+def test_list_output_is_identical(records: list[CashFlowRecord]) -> None:
+    queryset = CashFlowRecord.objects.order_by('pk')
+    expected = CashFlowRecordSerializer(queryset.select_related(*RELATED), many=True).data
+    rows = queryset.values(*CashFlowRecordReadSerializer.values_fields())
+    actual = CashFlowRecordReadSerializer(rows, many=True).data
+
+    assert len(actual) == len(records)
+    for expected_item, actual_item in zip(expected, actual, strict=True):
+        assert render(actual_item) == render(expected_item)
+    assert render(actual) == render(expected)
+
+
+def test_retrieve_output_is_identical(records: list[CashFlowRecord]) -> None:
+    for record in records:
+        row = (
+            CashFlowRecord.objects.filter(pk=record.pk)
+            .values(*CashFlowRecordReadSerializer.values_fields())
+            .get()
+        )
+        expected = CashFlowRecordSerializer(
+            CashFlowRecord.objects.select_related(*RELATED).get(pk=record.pk),
+        ).data
+        assert render(CashFlowRecordReadSerializer(row).data) == render(expected)
+
+
+def test_decimal_formatting(records: list[CashFlowRecord]) -> None:
+    rows = CashFlowRecord.objects.order_by('pk').values(
+        *CashFlowRecordReadSerializer.values_fields(),
+    )
+    amounts = [item['amount'] for item in CashFlowRecordReadSerializer(rows, many=True).data]
+    assert amounts == ['0.01', '10.00', '100.50', '1234.50', '9999999999.99']
+
+
+@pytest.mark.parametrize('relation', ['status', 'transaction_type', 'category', 'subcategory'])
+def test_null_relation_output_is_identical(
+    records: list[CashFlowRecord],
+    relation: str,
+) -> None:
+    """A null relation renders as null on both paths.
+
+    The record columns are NOT NULL, so the record is read as a plain object, the way
+    DRF reads a nullable foreign key, and as the ``.values()`` row an outer join gives.
+    """
+    record = CashFlowRecord.objects.select_related(*RELATED).get(pk=records[0].pk)
+    attrs = {name: getattr(record, name) for name in CashFlowRecordSerializer.Meta.fields}
+    instance = SimpleNamespace(**{**attrs, relation: None})
+    expected = CashFlowRecordSerializer(instance).data
+    actual = CashFlowRecordReadSerializer(values_row(instance)).data
+
+    assert actual[relation] is None
+    assert render(actual) == render(expected)
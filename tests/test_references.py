@@ -0,0 +1,76 @@
+from collections.abc import Iterator
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from transfers.models import ReferenceDataVersion, Status
+from transfers.references import checked_snapshots, load_snapshot, reference_cache
+
+pytestmark = pytest.mark.django_db
+
+VERSION_TABLE = ReferenceDataVersion._meta.db_table  # noqa: SLF001
+BOOTSTRAP_URL = '/api/references/bootstrap/'
+
+
+def version_queries(queries: CaptureQueriesContext) -> int:
+    return sum(VERSION_TABLE in query['sql'] for query in queries)
+
+
+@pytest.fixture
+def in_request() -> Iterator[None]:
+    """The state ReferenceCheckMiddleware sets for a request"""
+    token = checked_snapshots.set({})
+    yield
+    checked_snapshots.reset(token)
+
+
+def test_snapshot_is_read_without_a_transaction() -> None:
+    Status.objects.create(name='Бизнес')
+    with CaptureQueriesContext(connection) as queries:
+        snapshot = load_snapshot()
+
+    statements = [query['sql'] for query in queries]
+    assert VERSION_TABLE in statements[0], 'the version is read before the rows'
+    assert not any('SAVEPOINT' in sql or 'BEGIN' in sql for sql in statements)
+    assert [status.name for status in snapshot.all(Status)] == ['Бизнес']
+
+
+@pytest.mark.usefixtures('in_request')
+def test_version_is_checked_once_per_request() -> None:
+    first = reference_cache.get()
+    with CaptureQueriesContext(connection) as queries:
+        assert reference_cache.get() is first
+        assert reference_cache.get() is first
+    assert len(queries) == 0
+
+    # A reference changed by the request itself is visible to it right away
+    Status.objects.create(name='Личное')
+    snapshot = reference_cache.get()
+    with CaptureQueriesContext(connection) as queries:
+        assert reference_cache.get() is snapshot
+    assert len(queries) == 0
+    assert snapshot is not first
+    assert [status.name for status in snapshot.all(Status)] == ['Личное']
+
+
+def test_version_is_checked_on_every_call_outside_requests() -> None:
+    reference_cache.get()
+    with CaptureQueriesContext(connection) as queries:
+        reference_cache.get()
+        reference_cache.get()
+    assert version_queries(queries) == 2  # noqa: PLR2004
+
+
+def test_bootstrap_reads_the_version_once(client: Client) -> None:
+    Status.objects.create(name='Бизнес')
+    etag = client.get(BOOTSTRAP_URL).headers['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(BOOTSTRAP_URL)
+        not_modified = client.get(BOOTSTRAP_URL, headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    assert version_queries(queries) == 2  # noqa: PLR2004
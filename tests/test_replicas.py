@@ -0,0 +1,64 @@
+from collections.abc import Iterator
+
+import pytest
+from django.http import HttpRequest, HttpResponse
+from django.test import RequestFactory
+
+from transfers import middleware
+from transfers.middleware import PIN_COOKIE, PIN_HEADER, ReplicaMiddleware
+from transfers.models import CashFlowRecord
+from transfers.routers import PrimaryReplicaRouter, read_replica
+
+REPLICA = 'replica1'
+
+
+@pytest.fixture(autouse=True)
+def _one_replica(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setattr(middleware, 'choose_replica', lambda: REPLICA)
+    monkeypatch.setattr(middleware, 'replica_aliases', lambda: [REPLICA])
+    token = read_replica.set(None)
+    yield
+    read_replica.reset(token)
+
+
+def serve(request: HttpRequest) -> tuple[str | None, HttpResponse]:
+    """The replica the view reads from and the response"""
+    seen = []
+
+    def view(request: HttpRequest) -> HttpResponse:
+        seen.append(read_replica.get())
+        return HttpResponse()
+
+    response = ReplicaMiddleware(view)(request)
+    return seen[0], response
+
+
+def test_safe_request_reads_from_a_replica() -> None:
+    alias, response = serve(RequestFactory().get('/api/cash-flow-records/'))
+    assert alias == REPLICA
+    assert PIN_COOKIE not in response.cookies
+
+
+def test_write_reads_from_the_primary_and_pins_the_client() -> None:
+    alias, response = serve(RequestFactory().post('/api/cash-flow-records/'))
+    assert alias is None
+    assert PIN_COOKIE in response.cookies
+
+
+@pytest.mark.parametrize(
+    'pin',
+    [{'COOKIES': {PIN_COOKIE: '1'}}, {'headers': {PIN_HEADER: '1'}}],
+    ids=['cookie', 'header'],
+)
+def test_pinned_read_goes_to_the_primary(pin: dict) -> None:
+    request = RequestFactory().get('/api/cash-flow-records/', headers=pin.get('headers'))
+    request.COOKIES.update(pin.get('COOKIES', {}))
+    alias, _ = serve(request)
+    assert alias is None
+
+
+def test_router_write_leaves_the_read_choice_alone() -> None:
+    router = PrimaryReplicaRouter()
+    read_replica.set(REPLICA)
+    assert router.db_for_write(CashFlowRecord) == 'default'
+    assert read_replica.get() == REPLICA
@@ -0,0 +1,71 @@
+import io
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client
+
+from transfers.models import TransactionDirection, TransactionType
+
+pytestmark = pytest.mark.django_db
+
+URL = '/api/transaction-types/'
+
+
+def test_create_without_direction_is_an_outflow_with_a_warning(client: Client) -> None:
+    response = client.post(URL, {'name': 'Списание'}, content_type='application/json')
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['direction'] == TransactionDirection.OUTFLOW
+    assert 'direction' in response.headers['Warning']
+
+
+def test_create_with_direction(client: Client) -> None:
+    response = client.post(
+        URL,
+        {'name': 'Пополнение', 'direction': TransactionDirection.INFLOW},
+        content_type='application/json',
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['direction'] == TransactionDirection.INFLOW
+    assert 'Warning' not in response.headers
+
+
+def classify(*args: str) -> str:
+    stdout = io.StringIO()
+    call_command('classify_transaction_types', *args, stdout=stdout)
+    return stdout.getvalue()
+
+
+def directions() -> dict[str, str]:
+    return dict(TransactionType.objects.values_list('name', 'direction'))
+
+
+def test_classify_sets_the_listed_directions() -> None:
+    for name in ('Пополнение', 'Возврат', 'Списание'):
+        TransactionType.objects.create(name=name)
+
+    output = classify('--inflow', 'Пополнение', '--dry-run')
+    assert 'Пополнение: Выбытие -> Поступление' in output
+    assert set(directions().values()) == {TransactionDirection.OUTFLOW}
+
+    classify('--inflow', 'Пополнение', '--inflow', 'Возврат', '--outflow', 'Списание')
+    assert directions() == {
+        'Пополнение': TransactionDirection.INFLOW,
+        'Возврат': TransactionDirection.INFLOW,
+        'Списание': TransactionDirection.OUTFLOW,
+    }
+
+
+@pytest.mark.parametrize(
+    'args',
+    [('--inflow', 'Нет такого'), ('--inflow', 'Возврат', '--outflow', 'Возврат')],
+    ids=['unknown name', 'both directions'],
+)
+def test_classify_rejects_bad_names(args: tuple[str, ...]) -> None:
+    TransactionType.objects.create(name='Возврат')
+    with pytest.raises(CommandError):
+        classify(*args)
+    assert directions() == {'Возврат': TransactionDirection.OUTFLOW}